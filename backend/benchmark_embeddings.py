@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark vector index quantization: recall@k against exact search, query
+latency, bytes scanned per vector and bytes each query actually reads for
+float32, float16 and int8 codes, with and without full-precision re-ranking,
+to help pick ANN_QUANTIZATION.
+
+Usage:
+    python benchmark_embeddings.py [--index embeddings/index/<model>/chunks] [--synthetic 200000]
+                                   [--queries 200] [--k 10] [--nprobe 16] [--json out.json]
+"""
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from services.ann_index import AnnIndex
+from services.embeddings import EMBEDDING_DIM
+from services.quantization import QUANTIZATIONS, SCORE_BLOCK
+
+
+def load_vectors(index_dir: Path) -> np.ndarray:
+    """Full-precision vectors of an existing index snapshot"""
+    with open(index_dir / "current.json", "r", encoding="utf-8") as f:
+        generation = json.load(f)["generation"]
+    return np.load(index_dir / generation / "vectors.npy", mmap_mode="r")
+
+
+def synthetic_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors around a few thousand topics, roughly like paper embeddings"""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((max(1, count // 500), dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, len(topics), count)] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def scanned_rows(index_dir: Path, queries: np.ndarray, nprobe: int) -> float:
+    """Average rows in the nprobe lists each query scans, from the snapshot's centroids and offsets"""
+    with open(index_dir / "current.json", "r", encoding="utf-8") as f:
+        generation = index_dir / json.load(f)["generation"]
+    centroids = np.load(generation / "centroids.npy")
+    sizes = np.diff(np.load(generation / "offsets.npy"))
+    if nprobe >= len(centroids):
+        return float(sizes.sum())
+    probes = np.argpartition(-(queries @ centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+    return float(sizes[probes].sum(axis=1).mean())
+
+
+def exact_top(vectors: np.ndarray, queries: np.ndarray, k: int):
+    results = []
+    for query in queries:
+        scores = np.asarray(vectors @ query)
+        results.append(set(np.argpartition(-scores, k - 1)[:k].tolist()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vector index quantization settings")
+    parser.add_argument("--index", help="Existing index directory to take vectors from")
+    parser.add_argument("--synthetic", type=int, default=200000, help="Synthetic vectors when --index is not given")
+    parser.add_argument("--queries", type=int, default=200, help="Queries (perturbed copies of indexed vectors)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--rerank", type=int, default=4, help="Candidates re-scored per result when re-ranking")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.index:
+        vectors = np.asarray(load_vectors(Path(args.index)), dtype=np.float32)
+    else:
+        vectors = synthetic_vectors(args.synthetic, EMBEDDING_DIM)
+    if len(vectors) < args.k:
+        print("❌ Not enough vectors")
+        return 1
+    dim = vectors.shape[1]
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)] + 0.3 * rng.standard_normal(
+        (args.queries, dim)).astype(np.float32) / np.sqrt(dim)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = exact_top(vectors, queries, args.k)
+
+    print(f"\n🧭 {len(vectors)} vectors x {dim}, {args.queries} queries, recall@{args.k}, nprobe {args.nprobe}\n")
+    results = {}
+    work_dir = Path(tempfile.mkdtemp(prefix="ann-bench-"))
+    try:
+        ids = [str(i) for i in range(len(vectors))]
+        for kind in QUANTIZATIONS:
+            index = AnnIndex(work_dir / kind, dim, nprobe=args.nprobe, quantization=kind)
+            for start in range(0, len(vectors), 50000):
+                index.add(ids[start:start + 50000], vectors[start:start + 50000])
+            built = time.perf_counter()
+            index.snapshot()
+            build_seconds = time.perf_counter() - built
+            index = AnnIndex(work_dir / kind, dim, nprobe=args.nprobe, quantization=kind)  # memory-mapped
+            stats = index.stats()
+            code_bytes = stats["scan_bytes"] // max(1, stats["snapshot_vectors"])
+            scanned = scanned_rows(work_dir / kind, queries, args.nprobe)
+            for rerank in ([0] if kind == "float32" else [0, args.rerank]):
+                index.search(queries[0], args.k, rerank=rerank)
+                started = time.perf_counter()
+                found = [index.search(query, args.k, rerank=rerank) for query in queries]
+                elapsed = time.perf_counter() - started
+                recall = np.mean([len(expected & {int(item_id) for item_id, _ in hits}) / args.k
+                                  for expected, hits in zip(truth, found)])
+                # Per query: codes of the probed lists, plus full-precision rows for re-ranking;
+                # quantized codes are widened through one SCORE_BLOCK-row float32 buffer
+                read_bytes = scanned * code_bytes + (args.k * rerank * dim * 4 if rerank else 0)
+                results[f"{kind}{'+rerank' if rerank else ''}"] = {
+                    "recall": round(float(recall), 4),
+                    "ms_per_query": round(elapsed / len(queries) * 1000, 3),
+                    "bytes_per_vector": code_bytes,
+                    "read_kb_per_query": round(read_bytes / 1024, 1),
+                    "decode_buffer_kb": 0 if kind == "float32" else round(SCORE_BLOCK * dim * 4 / 1024, 1),
+                    "scan_mb": round(stats["scan_bytes"] / (1024 * 1024), 1),
+                    "full_precision_mb": round(stats["full_precision_bytes"] / (1024 * 1024), 1),
+                    "build_seconds": round(build_seconds, 2)
+                }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'setting':<16} {'recall':>7} {'ms/query':>9} {'B/vector':>9} {'KB/query':>9} {'buffer KB':>10} "
+          f"{'scan MB':>9} {'build s':>8}")
+    print("-" * 84)
+    for name, r in results.items():
+        print(f"{name:<16} {r['recall']:>7.3f} {r['ms_per_query']:>9.3f} {r['bytes_per_vector']:>9} "
+              f"{r['read_kb_per_query']:>9.1f} {r['decode_buffer_kb']:>10.1f} {r['scan_mb']:>9.1f} "
+              f"{r['build_seconds']:>8.2f}")
+    print("\nKB/query is what one query reads: codes of the probed lists plus the full-precision rows it "
+          "re-ranks. buffer KB is the float32 scratch used to widen codes while scoring. scan MB is what must "
+          "stay in the page cache for queries to be fast; the full-precision file is only touched for "
+          "re-ranked candidates. float16 speed depends on the CPU's half-precision conversion support.")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"vectors": len(vectors), "dim": dim, "k": args.k, "nprobe": args.nprobe,
+                       "results": results}, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
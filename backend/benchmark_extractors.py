@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PDF extraction backends over a corpus of sample PDFs.
+Reports pages/second, peak resident memory and text similarity to pdfplumber,
+to help pick PDF_EXTRACT_BACKEND for a deployment. Timed runs are untraced;
+memory is measured separately, in a fresh process per backend, from its
+peak RSS so native buffers (pypdfium2, PyMuPDF) are counted too.
+
+Usage:
+    python benchmark_extractors.py [PDF or directory ...] [--backends pypdfium2,pymupdf] [--repeat 3] [--json out.json]
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from services.pdf_parser import BACKENDS, DEFAULT_BACKEND, available_backends, extract_page_range
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def collect_pdfs(paths):
+    pdfs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            pdfs.extend(sorted(path.glob("*.pdf")))
+        elif path.suffix.lower() == ".pdf":
+            pdfs.append(path)
+    return pdfs
+
+
+def page_similarity(a: str, b: str) -> float:
+    """Word-sequence similarity of two page texts (1.0 = same words in the same order)"""
+    words_a, words_b = _WORD_RE.findall(a.lower()), _WORD_RE.findall(b.lower())
+    if not words_a and not words_b:
+        return 1.0
+    return SequenceMatcher(None, words_a, words_b, autojunk=False).ratio()
+
+
+def run_backend(backend: str, pdf: Path, repeat: int):
+    """Best-of-repeat wall time for one document"""
+    best = None
+    pages = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pages = extract_page_range(str(pdf), 0, sys.maxsize, backend=backend)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return pages, best
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB elsewhere
+
+
+def report_peak_rss(backend: str, pdfs):
+    """Child process: extract every PDF once and print peak RSS before and after as JSON"""
+    extract_page_range(str(pdfs[0]), 0, 1, backend=backend)  # library import and first open
+    baseline = peak_rss_mb()
+    for pdf in pdfs:
+        extract_page_range(str(pdf), 0, sys.maxsize, backend=backend)
+    print(json.dumps({"baseline_mb": baseline, "peak_mb": peak_rss_mb()}))
+
+
+def measure_memory(backend: str, pdfs):
+    """Peak RSS of a fresh process extracting the corpus with one backend; None where unsupported"""
+    if resource is None:
+        return None
+    proc = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--peak-rss", backend, *map(str, pdfs)],
+                          capture_output=True, text=True, cwd=Path(__file__).parent)
+    try:
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        print(f"   ❌ Memory run failed for {backend}: {proc.stderr.strip()[-200:]}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF text extraction backends")
+    parser.add_argument("paths", nargs="*", default=[str(Path(__file__).parent / "uploads")],
+                        help="PDF files or directories (default: uploads/)")
+    parser.add_argument("--backends", default=",".join(available_backends()),
+                        help=f"Comma-separated backends (known: {', '.join(BACKENDS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per document; the fastest is kept")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--peak-rss", metavar="BACKEND", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    pdfs = collect_pdfs(args.paths)
+    if not pdfs:
+        print("❌ No PDFs found")
+        return 1
+    if args.peak_rss:
+        report_peak_rss(args.peak_rss, pdfs)
+        return 0
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    missing = [b for b in backends if b not in BACKENDS or not BACKENDS[b].available()]
+    if missing:
+        print(f"⚠️ Skipping unavailable backends: {', '.join(missing)}")
+    backends = [b for b in backends if b not in missing]
+    # pdfplumber is the reference for similarity, so it always runs
+    if DEFAULT_BACKEND not in backends:
+        backends.insert(0, DEFAULT_BACKEND)
+
+    print(f"\n📄 {len(pdfs)} PDFs, backends: {', '.join(backends)}, best of {args.repeat}\n")
+    reference = {}
+    results = {}
+    # Memory runs go first: a child's ru_maxrss starts from its parent's peak at
+    # fork, so the children are started while this process is still small
+    memory = {backend: measure_memory(backend, pdfs) for backend in backends}
+    for backend in backends:
+        total_pages = total_time = 0.0
+        similarities = []
+        # Warm-up so library import and first-open costs are not timed
+        try:
+            extract_page_range(str(pdfs[0]), 0, 1, backend=backend)
+        except Exception:
+            pass
+        for pdf in pdfs:
+            try:
+                pages, elapsed = run_backend(backend, pdf, args.repeat)
+            except Exception as e:
+                print(f"   ❌ {backend} failed on {pdf.name}: {e}")
+                continue
+            total_pages += len(pages)
+            total_time += elapsed
+            if backend == DEFAULT_BACKEND:
+                reference[pdf] = pages
+            elif pdf in reference:
+                similarities.extend(page_similarity(a, b) for a, b in zip(reference[pdf], pages))
+        results[backend] = {
+            "pages": int(total_pages),
+            "seconds": round(total_time, 3),
+            "pages_per_second": round(total_pages / total_time, 1) if total_time else 0.0,
+            "peak_rss_mb": round(memory[backend]["peak_mb"], 1) if memory[backend] else None,
+            "rss_growth_mb": round(memory[backend]["peak_mb"] - memory[backend]["baseline_mb"], 1)
+                             if memory[backend] else None,
+            "similarity_to_pdfplumber": round(sum(similarities) / len(similarities), 3) if similarities else
+                                        (1.0 if backend == DEFAULT_BACKEND else None)
+        }
+
+    print(f"{'backend':<12} {'pages':>7} {'pages/s':>9} {'peak RSS MB':>12} {'growth MB':>10} {'similarity':>11}")
+    print("-" * 66)
+    for backend, r in results.items():
+        similarity = "-" if r["similarity_to_pdfplumber"] is None else f"{r['similarity_to_pdfplumber']:.3f}"
+        peak = "-" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.1f}"
+        growth = "-" if r["rss_growth_mb"] is None else f"{r['rss_growth_mb']:.1f}"
+        print(f"{backend:<12} {r['pages']:>7} {r['pages_per_second']:>9.1f} {peak:>12} {growth:>10} {similarity:>11}")
+    if resource is None:
+        print("\nPeak RSS needs the resource module (not available on Windows).")
+    else:
+        print("\nPeak RSS is measured in a separate process per backend and includes native buffers; "
+              "growth is the part above the idle process after the library is loaded.")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"pdfs": [str(p) for p in pdfs], "results": results}, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
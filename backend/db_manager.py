@@ -7,6 +7,7 @@ import mysql.connector
 from mysql.connector import Error
 import os
 import logging
+import threading
 from typing import Dict, List, Optional
 from datetime import datetime
 from pathlib import Path
@@ -32,6 +33,8 @@ class DatabaseManager:
         self.port = int(os.getenv('DATABASE_PORT', 3306))
         self.connection = None
         self.cursor = None
+        # One connection is shared by request handlers and worker threads
+        self._lock = threading.RLock()
     
     def connect(self) -> bool:
         """Establish MySQL connection"""
@@ -60,42 +63,45 @@ class DatabaseManager:
     
     def execute_query(self, query: str, params: tuple = None) -> bool:
         """Execute a query (INSERT, UPDATE, DELETE)"""
-        try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            logger.info(f"✅ Query executed: {query[:60]}...")
-            return True
-        except Error as e:
-            logger.error(f"❌ Query error: {e}")
-            self.connection.rollback()
-            return False
+        with self._lock:
+            try:
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+                self.connection.commit()
+                logger.info(f"✅ Query executed: {query[:60]}...")
+                return True
+            except Error as e:
+                logger.error(f"❌ Query error: {e}")
+                self.connection.rollback()
+                return False
     
     def fetch_all(self, query: str, params: tuple = None) -> List[Dict]:
         """Fetch multiple rows"""
-        try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            return self.cursor.fetchall()
-        except Error as e:
-            logger.error(f"❌ Fetch error: {e}")
-            return []
+        with self._lock:
+            try:
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+                return self.cursor.fetchall()
+            except Error as e:
+                logger.error(f"❌ Fetch error: {e}")
+                return []
     
     def fetch_one(self, query: str, params: tuple = None) -> Optional[Dict]:
         """Fetch single row"""
-        try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            return self.cursor.fetchone()
-        except Error as e:
-            logger.error(f"❌ Fetch error: {e}")
-            return None
+        with self._lock:
+            try:
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+                return self.cursor.fetchone()
+            except Error as e:
+                logger.error(f"❌ Fetch error: {e}")
+                return None
     
     def run_setup_script(self, script_path: str) -> bool:
         """Run SQL setup script from file"""
@@ -154,6 +160,24 @@ class DatabaseManager:
         query = "SELECT * FROM papers ORDER BY saved_date DESC LIMIT %s OFFSET %s"
         return self.fetch_all(query, (limit, offset))
     
+    def search_papers(self, query: str, limit: int = 20) -> List[Dict]:
+        """Find papers whose title or abstract contains every query word"""
+        words = [w for w in query.split() if w][:8]
+        if not words:
+            return []
+        conditions = " AND ".join(["(title LIKE %s ESCAPE '!' OR abstract LIKE %s ESCAPE '!')"] * len(words))
+        params = []
+        for word in words:
+            # Match % and _ in the query literally
+            pattern = "%" + word.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+            params.extend([pattern, pattern])
+        query_sql = f"""
+            SELECT paper_id, title, authors, abstract, url, published_date, notes
+            FROM papers WHERE {conditions}
+            ORDER BY saved_date DESC LIMIT %s
+        """
+        return self.fetch_all(query_sql, tuple(params) + (limit,))
+    
     def delete_paper(self, paper_id: str) -> bool:
         """Delete a paper (cascades to summaries, QA, etc.)"""
         query = "DELETE FROM papers WHERE paper_id = %s"
@@ -211,15 +235,89 @@ class DatabaseManager:
         params = (source_paper_id, recommended_paper_id, similarity_score, reason, ai_provider)
         return self.execute_query(query, params)
     
-    def get_recommendations(self, source_paper_id: str, limit: int = 10) -> List[Dict]:
-        """Get recommendations for a paper"""
+    def replace_recommendations(self, source_paper_id: str, recommendations: List[Dict],
+                                ai_provider: str = "embedding") -> bool:
+        """Store a paper's current recommendations (recommended_paper_id, similarity_score, reason) in rank order, dropping older ones"""
         query = """
-            SELECT * FROM recommendations 
-            WHERE source_paper_id = %s 
-            ORDER BY similarity_score DESC 
+            INSERT INTO recommendations (source_paper_id, recommended_paper_id, similarity_score, reason, ai_provider)
+            VALUES (%s, %s, %s, %s, %s)
+        """
+        params = [(source_paper_id, r['recommended_paper_id'], r.get('similarity_score', 0.0), r.get('reason', ''),
+                   ai_provider) for r in recommendations]
+        with self._lock:
+            try:
+                self.cursor.execute("DELETE FROM recommendations WHERE source_paper_id = %s", (source_paper_id,))
+                if params:
+                    self.cursor.executemany(query, params)
+                self.connection.commit()
+                return True
+            except Error as e:
+                logger.error(f"❌ Recommendations insert error: {e}")
+                self.connection.rollback()
+                return False
+    
+    def get_recommendations(self, source_paper_id: str, limit: int = 10, ranked: bool = False,
+                            max_age_seconds: Optional[int] = None) -> List[Dict]:
+        """
+        Get recommendations for a paper, by similarity or (ranked) in the order they were stored.
+        With max_age_seconds, only rows stored within that many seconds; rows carry age_seconds.
+        """
+        max_age = "AND created_at >= NOW() - INTERVAL %s SECOND" if max_age_seconds is not None else ""
+        query = f"""
+            SELECT *, TIMESTAMPDIFF(SECOND, created_at, NOW()) AS age_seconds FROM recommendations 
+            WHERE source_paper_id = %s {max_age}
+            ORDER BY {'id ASC' if ranked else 'similarity_score DESC'} 
             LIMIT %s
         """
-        return self.fetch_all(query, (source_paper_id, limit))
+        params = (source_paper_id,) + ((max_age_seconds,) if max_age_seconds is not None else ()) + (limit,)
+        return self.fetch_all(query, params)
+    
+    # =============== UPLOAD OPERATIONS ===============
+    
+    def create_upload(self, filename: str, file_path: str, file_size: int) -> Optional[int]:
+        """Insert an uploads row in 'pending' state and return its id"""
+        query = """
+            INSERT INTO uploads (filename, file_path, file_size, processing_status)
+            VALUES (%s, %s, %s, 'pending')
+        """
+        with self._lock:
+            try:
+                self.cursor.execute(query, (filename, file_path, file_size))
+                self.connection.commit()
+                return self.cursor.lastrowid
+            except Error as e:
+                logger.error(f"❌ Upload insert error: {e}")
+                self.connection.rollback()
+                return None
+    
+    def update_upload_status(self, upload_id: int, status: str, error_message: str = None) -> bool:
+        """Set processing_status (pending, processing, processed, error) for an upload"""
+        query = "UPDATE uploads SET processing_status = %s, error_message = %s WHERE id = %s"
+        return self.execute_query(query, (status, error_message, upload_id))
+    
+    # =============== SEARCH HISTORY OPERATIONS ===============
+    
+    def log_searches(self, entries: List[Dict]) -> bool:
+        """Insert a batch of search_history rows"""
+        query = """
+            INSERT INTO search_history (query, results_count, search_source)
+            VALUES (%s, %s, %s)
+        """
+        params = [(e['query'], e.get('results_count'), e.get('search_source')) for e in entries]
+        with self._lock:
+            try:
+                self.cursor.executemany(query, params)
+                self.connection.commit()
+                return True
+            except Error as e:
+                logger.error(f"❌ Search history insert error: {e}")
+                self.connection.rollback()
+                return False
+    
+    def get_search_query_counts(self) -> Dict[str, int]:
+        """Aggregate how often each query was searched"""
+        rows = self.fetch_all("SELECT query, COUNT(*) as count FROM search_history GROUP BY query")
+        return {row['query']: row['count'] for row in rows}
     
     # =============== STATISTICS ===============
     
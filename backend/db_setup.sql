@@ -123,7 +123,7 @@ CREATE TABLE IF NOT EXISTS uploads (
     file_size BIGINT COMMENT 'File size in bytes',
     paper_id VARCHAR(255) COMMENT 'Associated paper ID (after processing)',
     extracted_text LONGTEXT COMMENT 'Extracted text from PDF',
-    processing_status VARCHAR(50) DEFAULT 'pending' COMMENT 'pending, processed, error',
+    processing_status VARCHAR(50) DEFAULT 'pending' COMMENT 'pending, processing, processed, error',
     error_message TEXT COMMENT 'Error details if processing failed',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
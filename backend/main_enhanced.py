@@ -8,29 +8,80 @@ import json
 import logging
 import io
 import asyncio
+import threading
+import time
+import zipfile
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 import re
+from urllib.parse import unquote
+
+import numpy as np
 
 # Fix Windows encoding issue with emoji
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr, validator
 from dotenv import load_dotenv
 import requests
 import smtplib
+import xml.etree.ElementTree as ET
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 # Load environment variables
 load_dotenv()
 
+from services.arxiv_fetch import (
+    ARXIV_API_URL,
+    MAX_BATCH_IDS,
+    fetch_papers_by_ids,
+    metadata_cache,
+    parse_arxiv_feed,
+)
+from services.blob_store import BlobStore
+from services.chunking import chunk_pages
+from services.citation_graph import CitationGraph
+from services.ann_index import AnnIndex
+from services.autocomplete import QueryAutocomplete, SearchHistoryLogger, load_history_counts
+from services.document_store import DocumentStore, make_doc_id
+from services.embeddings import DEFAULT_MODEL, EmbeddingService, load_embedder
+from services.extraction_cache import ExtractionCache
+from services.facets import FacetCache, FacetIndex
+from services.file_serving import file_response
+from services.paper_index import LocalPaperIndex, paper_key, tokenize
+from services.pdf_parser import PdfExtractor
+from services.references import parse_references
+from services.recommender import RecommendationCache, Recommender
+from services.upload_manifest import SORT_FIELDS, InvalidCursor, UploadManifest
+from services.upload_pipeline import ProcessingJob, UploadPipeline
+from services.upload_store import (
+    ArchiveMember,
+    BodySizeLimit,
+    UploadTooLarge,
+    archive_pdf_members,
+    safe_filename,
+)
+from services.search_engine import FederatedSearch
+from services.sections import (
+    SUMMARY_SECTIONS,
+    allocate_budget,
+    classify_heading,
+    segment_pages,
+    span_text,
+)
+from services.spelling import SEED_VOCABULARY, SpellingCorrector
+from services.storage_manager import StorageManager
+from services.text_normalizer import normalize_pages, normalize_text
+from services.vector_store import PaperVectorStore, top_chunks
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -77,16 +128,32 @@ logger.info(f"USE_REAL_AI: {USE_REAL_AI}")
 class SearchQuery(BaseModel):
     query: str
     max_results: int = 10
+    categories: Optional[list] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    authors: Optional[list] = None
+    correct_spelling: bool = True
+
+class FederatedSearchQuery(BaseModel):
+    query: str
+    max_results: int = 20
+    sources: Optional[list] = None
+    correct_spelling: bool = True
+
+class BatchLookupRequest(BaseModel):
+    ids: list
 
 class AnswerRequest(BaseModel):
     paper_id: str
     question: str
     text: Optional[str] = None
+    doc_id: Optional[str] = None  # Uploaded document; replaces text
 
 class SummarizeRequest(BaseModel):
     paper_id: str
     text: Optional[str] = None
     title: Optional[str] = None
+    doc_id: Optional[str] = None
 
 class SavePaperRequest(BaseModel):
     paper_id: str
@@ -100,6 +167,9 @@ class RecommendRequest(BaseModel):
     paper_id: str
     text: Optional[str] = None
     title: Optional[str] = None
+    doc_id: Optional[str] = None
+    limit: int = 5
+    refresh: bool = False
 
 class LiteratureReviewRequest(BaseModel):
     papers: list
@@ -135,6 +205,601 @@ def save_db(data):
     with open(db_path, 'w') as f:
         json.dump(data, f, indent=2)
 
+# Uploads
+UPLOAD_DIR = Path(__file__).parent / os.getenv("UPLOAD_FOLDER", "uploads")
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 50_000_000))
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 100))
+MAX_BATCH_UPLOAD_SIZE = int(os.getenv("MAX_BATCH_UPLOAD_SIZE", MAX_FILE_SIZE * MAX_BATCH_FILES))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+# Body limits are enforced while the request is received, before multipart parsing
+# spools it to disk; the allowance covers multipart headers and boundaries
+app.add_middleware(BodySizeLimit, limits={
+    "/api/upload": MAX_FILE_SIZE + 64 * 1024,
+    "/api/upload/batch": MAX_BATCH_UPLOAD_SIZE
+})
+pdf_extractor = PdfExtractor(
+    workers=int(os.getenv("PDF_EXTRACT_WORKERS", 0)) or None,
+    backend=os.getenv("PDF_EXTRACT_BACKEND", "pdfplumber")
+)
+
+extraction_cache = ExtractionCache(
+    Path(__file__).parent / os.getenv("EXTRACTION_CACHE_DIR", "db/extraction_cache"),
+    max_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_MB", 256)) * 1024 * 1024,
+    max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", 5000))
+)
+
+@app.on_event("shutdown")
+def shutdown_pdf_extractor():
+    pdf_extractor.shutdown()
+
+document_store = DocumentStore(Path(__file__).parent / "db" / "documents.json")
+
+# Upload listings and file info are served from the manifest, not the upload directory
+upload_manifest = UploadManifest(Path(__file__).parent / "db" / "uploads_manifest.json")
+MAX_UPLOADS_PAGE = int(os.getenv("MAX_UPLOADS_PAGE", 500))
+
+def describe_existing_upload(file_path: Path) -> Optional[dict]:
+    """Manifest fields for a file uploaded before the manifest existed"""
+    doc = document_store.by_filename(file_path.name)
+    if not doc:
+        return None
+    cached = extraction_cache.get(doc["sha256"])
+    return {
+        "doc_id": doc["doc_id"],
+        "sha256": doc["sha256"],
+        "page_count": doc.get("page_count"),
+        "status": doc.get("status", "processed"),
+        "preview": cached["preview"][:300] if cached else ""
+    }
+
+if not upload_manifest.loaded and UPLOAD_DIR.exists():
+    upload_manifest.rebuild(UPLOAD_DIR, describe_existing_upload)
+
+# Uploaded files are stored once per distinct content; filenames map to blobs via the manifest
+blob_store = BlobStore(UPLOAD_DIR / "blobs")
+
+def migrate_flat_uploads():
+    """Move files saved as uploads/<filename> (before the blob store) into it"""
+    migrated = 0
+    for file_path in UPLOAD_DIR.glob("*.pdf"):
+        try:
+            sha256 = extraction_cache.hash_file(file_path)
+            stored, _ = blob_store.adopt(file_path, sha256)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not migrate {file_path.name} to blob storage: {str(e)}")
+            continue
+        extraction_cache.remember_hash(stored.path, sha256)
+        doc_id = document_store.register(sha256, file_path.name)["doc_id"]
+        if upload_manifest.get(file_path.name):
+            upload_manifest.update(file_path.name, sha256=sha256, doc_id=doc_id)
+        else:
+            upload_manifest.record(file_path.name, stored.size, sha256, doc_id, status="processed")
+        migrated += 1
+    if migrated:
+        logger.info(f"📦 Migrated {migrated} uploads to content-addressed storage")
+
+def release_blob(sha256: Optional[str]) -> int:
+    """Delete a blob once no filename refers to it and no upload of it is in flight; returns the bytes freed"""
+    if not sha256 or upload_manifest.references(sha256) or blob_store.in_flight(sha256):
+        return 0
+    return blob_store.remove(sha256)
+
+if UPLOAD_DIR.exists():
+    migrate_flat_uploads()
+
+def forget_upload(filename: str) -> Optional[dict]:
+    """Drop a filename from the manifest, document store, search index and citation graph"""
+    entry = upload_manifest.remove(filename)
+    document_store.remove_filename(filename)
+    paper_index.remove(f"upload:{filename}")
+    if entry and entry["doc_id"] and document_store.get(entry["doc_id"]) is None:
+        citation_graph.remove_document(entry["doc_id"])
+        unindex_chunks(entry["sha256"])
+    return entry
+
+_UPLOAD_URL_RE = re.compile(r"/api/uploads/(?:info/)?([^/?#]+)")
+
+def pinned_uploads() -> set:
+    """sha256 of uploads referenced by a saved paper, or by a published paper when MySQL is up"""
+    references = set()
+    papers = [dict(paper, paper_id=paper_id) for paper_id, paper in load_db().items()]
+    if db_manager:
+        papers += [row for row in db_manager.get_all_papers(limit=10000) if 'Category:' in (row.get('notes') or '')]
+    for paper in papers:
+        references.add(str(paper.get('paper_id') or '').removeprefix("upload:"))
+        references.update(unquote(name) for name in _UPLOAD_URL_RE.findall(paper.get('url') or ''))
+    pinned = set()
+    for sha256, filenames in upload_manifest.by_sha().items():
+        if any(name in references for name in filenames) or make_doc_id(sha256) in references:
+            pinned.add(sha256)
+    return pinned
+
+def upload_busy(sha256: str) -> bool:
+    job = upload_pipeline.get(make_doc_id(sha256))
+    return sha256 in extractions or blob_store.in_flight(sha256) or (job is not None and not job.finished)
+
+# Disk quota over uploads and their derived artifacts; 0 disables a limit
+storage_manager = StorageManager(
+    blob_store, upload_manifest,
+    quota_bytes=int(os.getenv("STORAGE_QUOTA_MB", 10240)) * 1024 * 1024,
+    max_age_seconds=float(os.getenv("STORAGE_MAX_AGE_DAYS", 0)) * 86400,
+    pinned=pinned_uploads,
+    busy=upload_busy,
+    on_evict=forget_upload
+)
+storage_manager.add_artifacts("extracted_text", extraction_cache.usage, extraction_cache.discard,
+                              owner=lambda key: key.split("-")[0])
+STORAGE_GC_INTERVAL = float(os.getenv("STORAGE_GC_INTERVAL_MINUTES", 60)) * 60
+
+async def storage_gc_loop():
+    while True:
+        await asyncio.sleep(STORAGE_GC_INTERVAL)
+        try:
+            await asyncio.to_thread(storage_manager.collect)
+        except Exception as e:
+            logger.error(f"❌ Storage GC failed: {str(e)}")
+
+@app.on_event("startup")
+async def start_storage_gc():
+    if STORAGE_GC_INTERVAL > 0:
+        asyncio.create_task(storage_gc_loop())
+
+DOC_CONTEXT_CHARS = int(os.getenv("DOC_CONTEXT_CHARS", 20000))
+
+REFERENCES_MAX_CHARS = int(os.getenv("REFERENCES_MAX_CHARS", 100000))
+citation_graph = CitationGraph(Path(__file__).parent / "db" / "citation_graph.json")
+
+# Retrieval for Q&A: each document is chunked and embedded once, questions score only its chunks
+embedding_service = EmbeddingService(
+    load_embedder(os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL)),
+    cache_dir=Path(__file__).parent / os.getenv("EMBEDDINGS_DIR", "embeddings") / "cache",
+    batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", 64)),
+    max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 10)),
+    workers=int(os.getenv("EMBEDDING_WORKERS", 1)),
+    cache_max_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_MB", 512)) * 1024 * 1024
+)
+vector_store = PaperVectorStore(Path(__file__).parent / os.getenv("EMBEDDINGS_DIR", "embeddings"))
+ASK_TOP_K = int(os.getenv("ASK_TOP_K", 4))
+ASK_CONTEXT_CHARS = int(os.getenv("ASK_CONTEXT_CHARS", 6000))
+
+# Nearest-neighbour indexes over paper embeddings (title + abstract) and chunk embeddings ("<sha256>:<chunk id>")
+VECTOR_INDEX_DIR = vector_store.root / "index" / embedding_service.name
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", 16))
+ANN_SNAPSHOT_INTERVAL = float(os.getenv("ANN_SNAPSHOT_INTERVAL_SECONDS", 300))
+# Lists are scanned as int8 codes by default (4x less memory); top candidates are re-scored in float32
+ANN_QUANTIZATION = os.getenv("ANN_QUANTIZATION", "int8")
+ANN_RERANK = int(os.getenv("ANN_RERANK", 4))
+paper_vectors = AnnIndex(VECTOR_INDEX_DIR / "papers", embedding_service.dim, nprobe=ANN_NPROBE,
+                         quantization=ANN_QUANTIZATION, rerank=ANN_RERANK)
+chunk_vectors = AnnIndex(VECTOR_INDEX_DIR / "chunks", embedding_service.dim, nprobe=ANN_NPROBE,
+                         quantization=ANN_QUANTIZATION, rerank=ANN_RERANK)
+
+# Recommendations: nearest papers re-ranked for diversity, cached per source paper
+recommender = Recommender(paper_vectors, candidates=int(os.getenv("RECOMMEND_CANDIDATES", 50)),
+                          diversity=float(os.getenv("RECOMMEND_DIVERSITY", 0.3)))
+recommendation_cache = RecommendationCache(ttl_seconds=int(os.getenv("RECOMMEND_CACHE_TTL_SECONDS", 3600)))
+
+def unindex_chunks(sha256: str) -> int:
+    """Drop a document's chunks from the chunk index"""
+    loaded = vector_store.load(sha256)
+    if loaded is None:
+        return 0
+    return chunk_vectors.remove(f"{sha256}:{chunk['id']}" for chunk in loaded[0]["chunks"])
+
+def discard_vectors(sha256: str) -> int:
+    unindex_chunks(sha256)
+    return vector_store.remove(sha256)
+
+storage_manager.add_artifacts("vectors", vector_store.usage, discard_vectors)
+
+INITIAL_EXTRACT_PAGES = int(os.getenv("PDF_INITIAL_PAGES", 50))
+MAX_TEXT_PAGE_RANGE = int(os.getenv("MAX_TEXT_PAGE_RANGE", 100))
+extractions = {}  # sha256 -> in-flight extraction {"task", "prefix_ready"}
+
+async def get_extracted_pages(file_path: Path, sha256: str) -> dict:
+    """
+    Extraction metadata for an upload, parsed once per distinct file content.
+    Waits only for the first INITIAL_EXTRACT_PAGES pages; the rest of a
+    longer document keeps extracting in the background.
+    """
+    cached = extraction_cache.get(sha256)
+    if cached is not None:
+        logger.info(f"🗂️ Extraction cache hit for {file_path.name} ({sha256[:12]})")
+        if not cached["complete"]:
+            schedule_extraction(file_path, sha256)
+        return cached
+    task = schedule_extraction(file_path, sha256)
+    prefix_ready = asyncio.ensure_future(extractions[sha256]["prefix_ready"].wait())
+    try:
+        await asyncio.wait([prefix_ready, task], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        prefix_ready.cancel()
+    cached = extraction_cache.get(sha256)
+    if cached is None:
+        raise RuntimeError(f"Could not extract text from {file_path.name}")
+    return cached
+
+def schedule_extraction(file_path: Path, sha256: str) -> asyncio.Task:
+    """Start (or join) the background extraction of a document into the cache"""
+    extraction = extractions.get(sha256)
+    if extraction is None:
+        extraction = {"prefix_ready": asyncio.Event()}
+        extraction["task"] = asyncio.create_task(run_extraction(file_path, sha256, extraction["prefix_ready"]))
+        extraction["task"].add_done_callback(lambda _: extractions.pop(sha256, None))
+        extractions[sha256] = extraction
+    return extraction["task"]
+
+async def run_extraction(file_path: Path, sha256: str, prefix_ready: asyncio.Event) -> Optional[dict]:
+    """Extract and cache the first pages, then the rest of the document"""
+    doc_id = make_doc_id(sha256)
+    try:
+        entry = extraction_cache.get(sha256)
+        if entry is None:
+            page_count = await pdf_extractor.count_pages(file_path)
+            upload_pipeline.progress(doc_id, 0, page_count)
+            page_texts, page_count = await pdf_extractor.extract_pages(
+                file_path, max_pages=INITIAL_EXTRACT_PAGES,
+                progress=lambda done, _: upload_pipeline.progress(doc_id, done, page_count))
+            entry = await asyncio.to_thread(extraction_cache.put, sha256, page_texts, page_count)
+        prefix_ready.set()
+        if not entry["complete"]:
+            pages = await asyncio.to_thread(extraction_cache.read_pages, sha256, 0, entry["pages_extracted"])
+            rest, page_count = await pdf_extractor.extract_pages(
+                file_path, start_page=len(pages),
+                progress=lambda done, _: upload_pipeline.progress(doc_id, len(pages) + done, entry["page_count"]))
+            entry = await asyncio.to_thread(extraction_cache.put, sha256, pages + rest, page_count)
+            logger.info(f"📄 Full extraction finished for {file_path.name}: {page_count} pages")
+        upload_pipeline.progress(doc_id, entry["pages_extracted"], entry["page_count"])
+        return entry
+    except Exception as e:
+        logger.error(f"❌ Background extraction failed for {file_path.name}: {str(e)}")
+        return None
+
+# Upload processing pipeline: stages run in the background after /api/upload returns
+def record_upload_status(job: ProcessingJob):
+    document_store.update(job.doc_id, status=job.status, page_count=job.page_count or None, error=job.error)
+    # Filenames that joined the job share its blob and follow its status
+    upload_manifest.update_sha(job.sha256, status=job.status, page_count=job.page_count or None, error=job.error)
+    if db_manager and job.upload_id:
+        db_manager.update_upload_status(job.upload_id, job.status, job.error)
+
+async def extract_stage(job: ProcessingJob):
+    entry = await asyncio.shield(schedule_extraction(job.file_path, job.sha256))
+    if entry is None:
+        raise RuntimeError("Text extraction failed")
+    job.page_count = entry["page_count"]
+    job.pages_done = entry["pages_extracted"]
+    await asyncio.to_thread(upload_manifest.update_sha, job.sha256, page_count=entry["page_count"], preview=entry["preview"])
+
+async def normalize_stage(job: ProcessingJob):
+    """Strip headers/footers, page numbers, hyphenation and ligatures before any prompt sees the text"""
+    doc = document_store.get(job.doc_id) or {}
+    if doc.get("normalization") and extraction_cache.get(normalized_key(job.sha256)) is not None:
+        return  # same content seen before
+    await normalize_document(job.doc_id, job.sha256)
+
+async def segment_stage(job: ProcessingJob):
+    """Detect section headings and store their page/offset spans in the document store"""
+    if (document_store.get(job.doc_id) or {}).get("sections") is not None:
+        return
+    pages = await asyncio.to_thread(extraction_cache.read_pages, normalized_key(job.sha256))
+    sections = await asyncio.to_thread(segment_pages, pages)
+    document_store.update(job.doc_id, sections=sections)
+    logger.info(f"📑 {job.filename}: sections {[s['name'] for s in sections]}")
+
+async def references_stage(job: ProcessingJob):
+    """Parse the reference list into structured entries and add them to the citation graph"""
+    doc = document_store.get(job.doc_id) or {}
+    if "references" in doc and citation_graph.node(f"doc:{job.doc_id}") is not None:
+        return  # same content seen before
+    references = []
+    if "references" in {s["name"] for s in doc.get("sections") or []}:
+        text = await load_document_text(job.doc_id, max_chars=REFERENCES_MAX_CHARS, sections=("references",))
+        references = await asyncio.to_thread(parse_references, text)
+    title = await document_title(job.sha256, job.filename)
+    edges = await asyncio.to_thread(citation_graph.set_references, job.doc_id, {"title": title}, references)
+    document_store.update(job.doc_id, title=title, references=len(references))
+    logger.info(f"🕸️ {job.filename}: {len(references)} references, {edges} linked works")
+
+async def document_title(sha256: str, filename: str) -> str:
+    """First substantial line of the first page, or the filename"""
+    pages = await asyncio.to_thread(extraction_cache.read_pages, normalized_key(sha256), 0, 1)
+    for line in (pages[0] if pages else "").split("\n")[:8]:
+        line = line.strip()
+        if 3 <= len(line.split()) <= 30 and not classify_heading(line):
+            return line
+    return Path(filename).stem.replace('_', ' ')
+
+async def embed_stage(job: ProcessingJob):
+    """Chunk the normalized text and store the chunk vectors for question answering"""
+    if vector_store.has(job.sha256, embedding_service.name):
+        return  # same content seen before
+    if await embed_document(document_store.get(job.doc_id)):
+        logger.info(f"🧮 {job.filename}: embedded {len(vector_store.load(job.sha256)[0]['chunks'])} chunks")
+
+async def index_stage(job: ProcessingJob):
+    """Make the upload's text searchable through the local index and the paper vector index"""
+    text = await load_document_text(job.doc_id, max_chars=2000, sections=("abstract", "introduction"))
+    paper = {
+        "id": f"upload:{job.filename}",
+        "title": Path(job.filename).stem.replace('_', ' '),
+        "authors": [],
+        "abstract": text,
+        "url": f"/api/uploads/info/{job.filename}",
+        "filename": job.filename,
+        "doc_id": job.doc_id
+    }
+    paper_index.add(paper, "upload")
+
+upload_pipeline = UploadPipeline(on_status=record_upload_status)
+upload_pipeline.add_stage("extract", extract_stage)
+upload_pipeline.add_stage("normalize", normalize_stage)
+upload_pipeline.add_stage("segment", segment_stage)
+upload_pipeline.add_stage("references", references_stage)
+upload_pipeline.add_stage("embed", embed_stage)
+upload_pipeline.add_stage("index", index_stage)
+
+def normalized_key(sha256: str) -> str:
+    """Extraction cache key of a document's normalized text"""
+    return f"{sha256}-normalized"
+
+async def normalize_document(doc_id: str, sha256: str) -> dict:
+    """Normalize a fully extracted document, cache the result and record the token report"""
+    pages = await asyncio.to_thread(extraction_cache.read_pages, sha256)
+    normalized, report = await asyncio.to_thread(normalize_pages, pages)
+    entry = await asyncio.to_thread(extraction_cache.put, normalized_key(sha256), normalized, len(normalized))
+    document_store.update(doc_id, normalization=report)
+    logger.info(f"🧹 Normalized {doc_id}: {report['tokens_before']} -> {report['tokens_after']} tokens "
+                f"(-{report['token_reduction_pct']}%)")
+    return entry
+
+async def get_document_pages(doc: dict) -> tuple:
+    """
+    (cache key, metadata) of the pages prompts should read: the normalized
+    copy, rebuilt if it was evicted, or the raw prefix while a long
+    document is still being extracted.
+    """
+    key = normalized_key(doc["sha256"])
+    blob_store.touch(doc["sha256"])
+    entry = extraction_cache.get(key)
+    if entry is not None:
+        return key, entry
+    raw = extraction_cache.get(doc["sha256"])
+    if raw is None:
+        # Evicted from the extraction cache: parse the upload again
+        file_path = blob_store.path(doc["sha256"])
+        if not file_path.exists():
+            raise HTTPException(status_code=404, detail=f"Document {doc['doc_id']} file is missing")
+        raw = await get_extracted_pages(file_path, doc["sha256"])
+    if raw["complete"]:
+        return key, await normalize_document(doc["doc_id"], doc["sha256"])
+    return doc["sha256"], raw
+
+async def load_document_text(doc_id: str, max_chars: int = DOC_CONTEXT_CHARS,
+                             sections: Optional[tuple] = None) -> str:
+    """
+    Normalized text of a stored document, reading pages only until max_chars
+    is reached. With sections, returns those sections (in that order) sharing
+    the budget, and falls back to the start of the document when none were detected.
+    """
+    doc = document_store.get(doc_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
+    key, extraction = await get_document_pages(doc)
+    normalized = key != doc["sha256"]
+    
+    # Section offsets refer to the normalized pages
+    found = {s["name"]: s for s in doc.get("sections") or []} if normalized else {}
+    chosen = [found[name] for name in (sections or ()) if name in found]
+    if chosen:
+        budget = allocate_budget([s["length"] for s in chosen], max_chars)
+        parts = []
+        for section, chars in zip(chosen, budget):
+            pages = await asyncio.to_thread(extraction_cache.read_pages, key,
+                                            section["start"][0], section["end"][0] + 1)
+            parts.append(span_text(pages, section)[:chars].strip())
+        return "\n\n".join(part for part in parts if part)
+    
+    text = ""
+    page = 0
+    while len(text) < max_chars and page < extraction["pages_extracted"]:
+        batch = await asyncio.to_thread(extraction_cache.read_pages, key, page, page + 5)
+        if not batch:
+            break
+        text += "".join(t + "\n" for t in batch if t)
+        page += len(batch)
+    if not normalized:
+        text = normalize_text(text)
+    return text[:max_chars]
+
+async def embed_document(doc: dict) -> bool:
+    """
+    Make sure a document's chunk vectors exist, building them from the
+    normalized pages if needed. False while the document is still being
+    extracted (only its raw prefix is readable).
+    """
+    if vector_store.has(doc["sha256"], embedding_service.name):
+        return True
+    key, _ = await get_document_pages(doc)
+    if key == doc["sha256"]:
+        return False
+    pages = await asyncio.to_thread(extraction_cache.read_pages, key)
+    chunks = chunk_pages(pages, doc.get("sections"))
+    vectors = await embedding_service.embed([chunk["text"] for chunk in chunks])
+    await asyncio.to_thread(vector_store.put, doc["sha256"], chunks, vectors, embedding_service.name)
+    await asyncio.to_thread(chunk_vectors.add, [f"{doc['sha256']}:{chunk['id']}" for chunk in chunks], vectors)
+    return True
+
+async def retrieve_passages(question: str, doc_id: Optional[str] = None, text: Optional[str] = None,
+                            k: int = ASK_TOP_K) -> list:
+    """Top-k chunks of a stored document (or of pasted text) for a question, best first"""
+    query = (await embedding_service.embed([question]))[0]
+    if doc_id:
+        doc = document_store.get(doc_id)
+        if not doc:
+            raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
+        if await embed_document(doc):
+            return await asyncio.to_thread(vector_store.search, doc["sha256"], query, k)
+        text = await load_document_text(doc_id)
+    chunks = chunk_pages([text or ""])
+    vectors = await embedding_service.embed([chunk["text"] for chunk in chunks])
+    return top_chunks(chunks, vectors, query, k)
+
+def paper_text(paper: dict) -> str:
+    return f"{paper.get('title') or ''}\n{paper.get('abstract') or ''}"
+
+async def index_paper_vectors(papers: list):
+    """Embed papers (title and abstract) into the paper vector index, skipping unchanged ones"""
+    papers = [paper for paper in papers if paper_key(paper)]
+    if not papers:
+        return
+    vectors = await embedding_service.embed([paper_text(paper) for paper in papers])
+    changed = []
+    for i, paper in enumerate(papers):
+        current = paper_vectors.vector(paper_key(paper))
+        if current is None or not np.allclose(current, vectors[i], atol=1e-5):
+            changed.append(i)
+    if changed:
+        await asyncio.to_thread(paper_vectors.add, [paper_key(papers[i]) for i in changed], vectors[changed])
+
+async def sync_vector_indexes():
+    """
+    Reconcile the indexes with their sources after a restart: changes made
+    since the last snapshot are re-applied, chunk vectors come from the
+    vector store rather than being embedded again.
+    """
+    for filename in upload_manifest.filenames():
+        entry = upload_manifest.get(filename)
+        if entry["status"] != "processed":
+            continue
+        try:
+            text = await load_document_text(entry["doc_id"], max_chars=2000, sections=("abstract", "introduction"))
+        except HTTPException:
+            continue
+        paper_index.add({
+            "id": f"upload:{filename}",
+            "title": Path(filename).stem.replace('_', ' '),
+            "authors": [],
+            "abstract": text,
+            "url": f"/api/uploads/info/{filename}",
+            "filename": filename,
+            "doc_id": entry["doc_id"]
+        }, "upload")
+    if db_manager:
+        rows = await asyncio.to_thread(db_manager.get_all_papers, 10000)
+        paper_index.add_many([mysql_row_to_paper(row) for row in rows if 'Category:' in (row.get('notes') or '')],
+                             source="published")
+    await drain_paper_vector_queue()
+    await asyncio.to_thread(paper_vectors.remove, [key for key in paper_vectors.ids() if paper_index.get(key) is None])
+
+    shas = set(upload_manifest.by_sha())
+    for sha256 in shas:
+        loaded = vector_store.load(sha256) if f"{sha256}:0" not in chunk_vectors else None
+        if loaded and loaded[0]["model"] == embedding_service.name:
+            meta, vectors = loaded
+            await asyncio.to_thread(chunk_vectors.add, [f"{sha256}:{chunk['id']}" for chunk in meta["chunks"]], vectors)
+    await asyncio.to_thread(chunk_vectors.remove,
+                            [key for key in chunk_vectors.ids() if key.split(":")[0] not in shas])
+    for index in (paper_vectors, chunk_vectors):
+        await asyncio.to_thread(index.snapshot)
+
+async def vector_snapshot_loop():
+    """Snapshot the vector indexes periodically, or sooner when many inserts are pending"""
+    waited = 0.0
+    while True:
+        await asyncio.sleep(5)
+        waited += 5
+        for index in (paper_vectors, chunk_vectors):
+            if index.needs_snapshot or (waited >= ANN_SNAPSHOT_INTERVAL and index.dirty):
+                try:
+                    await asyncio.to_thread(index.snapshot)
+                except Exception as e:
+                    logger.error(f"❌ Vector index snapshot failed: {str(e)}")
+        if waited >= ANN_SNAPSHOT_INTERVAL:
+            waited = 0.0
+
+async def drain_paper_vector_queue(batch_size: int = 256):
+    """Apply paper additions and removals queued by local index changes"""
+    while True:
+        with _paper_vector_lock:
+            batch = [_paper_vector_queue.popitem(last=False)
+                     for _ in range(min(batch_size, len(_paper_vector_queue)))]
+        if not batch:
+            return
+        removed = [key for key, paper in batch if paper is None]
+        if removed:
+            await asyncio.to_thread(paper_vectors.remove, removed)
+        await index_paper_vectors([paper for _, paper in batch if paper is not None])
+
+async def paper_vector_loop():
+    """Keep the paper vector index in step with the local paper index"""
+    while True:
+        await asyncio.sleep(0.5)
+        try:
+            await drain_paper_vector_queue()
+        except Exception as e:
+            logger.error(f"❌ Paper vector indexing failed: {str(e)}")
+
+@app.on_event("startup")
+async def start_vector_indexes():
+    asyncio.create_task(sync_vector_indexes())
+    asyncio.create_task(vector_snapshot_loop())
+    asyncio.create_task(paper_vector_loop())
+
+@app.on_event("shutdown")
+def snapshot_vector_indexes():
+    for index in (paper_vectors, chunk_vectors):
+        index.snapshot()
+    embedding_service.shutdown()
+
+@app.on_event("shutdown")
+def flush_registries():
+    """Registries save shortly after changes; write whatever is still pending"""
+    for registry in (upload_manifest, document_store, citation_graph):
+        registry.flush()
+
+def passage_label(passage: dict) -> str:
+    pages = passage["page"] if passage["page"] == passage["end_page"] else f"{passage['page']}-{passage['end_page']}"
+    section = f", {passage['section']}" if passage.get("section") else ""
+    return f"page {pages}{section}"
+
+# MySQL (optional) - publishing and federated search use it when reachable
+try:
+    from db_manager import DatabaseManager
+    db_manager = DatabaseManager()
+    if not db_manager.connect():
+        db_manager = None
+except ImportError:
+    logger.warning("⚠️ mysql-connector-python not installed, MySQL features disabled")
+    db_manager = None
+
+# Local paper index over saved papers and everything search has returned
+paper_index = LocalPaperIndex(max_documents=int(os.getenv("LOCAL_INDEX_MAX_PAPERS", 20000)))
+
+# Spelling correction follows the local corpus vocabulary as papers are indexed and evicted
+spelling_corrector = SpellingCorrector(paper_index.document_frequency)
+spelling_corrector.add_words(SEED_VOCABULARY, pinned=True)
+paper_index.add_term_listener(spelling_corrector.update_vocabulary)
+
+# Paper vectors follow the local index: paper_vector_loop applies queued
+# changes in batches (None marks a removal or eviction), off the event loop
+_paper_vector_queue: "OrderedDict[str, Optional[dict]]" = OrderedDict()
+_paper_vector_lock = threading.Lock()
+
+def mirror_paper_vectors(added: list, removed: list):
+    with _paper_vector_lock:
+        for paper in added:
+            _paper_vector_queue[paper_key(paper)] = paper
+        for key in removed:
+            _paper_vector_queue[key] = None
+    for key in removed:
+        recommendation_cache.discard_source(key)
+
+paper_index.add_change_listener(mirror_paper_vectors)
+
+paper_index.add_many([dict(paper, id=paper_id) for paper_id, paper in load_db().items()], source="saved")
+
 # Multi-Provider AI Integration (Gemini → Groq → OpenAI → Hugging Face → Mock)
 def call_ai(prompt: str, max_tokens: int = 1000) -> str:
     """
@@ -333,7 +998,7 @@ def search_arxiv(query: str, max_results: int = 20) -> list:
     """Search arXiv for research papers with improved error handling"""
     try:
         # arXiv API endpoint
-        url = "http://export.arxiv.org/api/query"
+        url = ARXIV_API_URL
         
         # Build more flexible query - search in title, summary, and author
         # Removed strict date range for more results
@@ -354,38 +1019,16 @@ def search_arxiv(query: str, max_results: int = 20) -> list:
             logger.error(f"❌ arXiv API error: {response.status_code} - {response.text[:200]}")
             return []
         
-        papers = []
-        
         # Parse arXiv XML response
-        import xml.etree.ElementTree as ET
         try:
-            root = ET.fromstring(response.content)
+            papers = parse_arxiv_feed(response.content)
         except ET.ParseError as e:
             logger.error(f"❌ Failed to parse arXiv response XML: {str(e)}")
             return []
         
-        namespace = {'atom': 'http://www.w3.org/2005/Atom'}
-        entries = root.findall('atom:entry', namespace)
-        logger.info(f"✅ Found {len(entries)} papers on arXiv for '{query}'")
-        
-        for entry in entries:
-            try:
-                paper = {
-                    "id": entry.find('atom:id', namespace).text.split('/abs/')[-1],
-                    "title": entry.find('atom:title', namespace).text.strip(),
-                    "authors": [
-                        author.find('atom:name', namespace).text 
-                        for author in entry.findall('atom:author', namespace)
-                    ][:5],  # Limit to 5 authors
-                    "abstract": entry.find('atom:summary', namespace).text.strip(),
-                    "published_date": entry.find('atom:published', namespace).text[:10],
-                    "url": f"https://arxiv.org/pdf/{entry.find('atom:id', namespace).text.split('/abs/')[-1]}.pdf",
-                    "categories": [cat.get('term') for cat in entry.findall('atom:category', namespace)]
-                }
-                papers.append(paper)
-            except Exception as e:
-                logger.warning(f"⚠️ Error parsing paper entry: {str(e)}")
-                continue
+        logger.info(f"✅ Found {len(papers)} papers on arXiv for '{query}'")
+        metadata_cache.put_many(papers)
+        paper_index.add_many(papers, source="arxiv")
         
         logger.info(f"✅ Returning {len(papers)} papers from arXiv search")
         return papers
@@ -396,6 +1039,128 @@ def search_arxiv(query: str, max_results: int = 20) -> list:
         logger.error(f"❌ arXiv search error: {str(e)}", exc_info=True)
         return []
 
+# Federated search sources
+def search_local_index(query: str, limit: int = 20) -> list:
+    """Search papers already known to this server"""
+    return paper_index.search(query, limit)
+
+def mysql_row_to_paper(row: dict) -> dict:
+    """Convert a MySQL papers row into the API paper shape"""
+    authors = row.get('authors') or []
+    if isinstance(authors, str):
+        try:
+            authors = json.loads(authors)
+        except ValueError:
+            authors = [authors]
+    notes = row.get('notes') or ''
+    doi = notes.split('DOI: ')[1].split('\n')[0].strip() if 'DOI: ' in notes else None
+    paper = {
+        "id": row.get('paper_id'),
+        "title": row.get('title'),
+        "authors": authors,
+        "abstract": row.get('abstract') or '',
+        "published_date": str(row.get('published_date') or '')[:10],
+        "url": row.get('url') or '',
+        "doi": doi or None
+    }
+    if 'Category:' in notes:
+        paper["category"] = notes.split('Category: ')[1].split('\n')[0]
+    return paper
+
+def search_mysql(query: str, limit: int = 20) -> list:
+    """Search the MySQL papers table"""
+    return [mysql_row_to_paper(row) for row in db_manager.search_papers(query, limit)]
+
+def search_uploads(query: str, limit: int = 20) -> list:
+    """Match uploaded PDFs by filename"""
+    query_terms = set(tokenize(query))
+    scored = []
+    for name in upload_manifest.filenames():
+        overlap = len(query_terms.intersection(tokenize(Path(name).stem.replace('_', ' '))))
+        if overlap:
+            scored.append((overlap, name))
+    scored.sort(reverse=True)
+    return [
+        {
+            "id": f"upload:{name}",
+            "title": Path(name).stem.replace('_', ' '),
+            "authors": [],
+            "abstract": "",
+            "url": f"/api/uploads/info/{name}",
+            "filename": name
+        }
+        for _, name in scored[:limit]
+    ]
+
+facet_cache = FacetCache(
+    max_entries=int(os.getenv("FACET_CACHE_SIZE", 256)),
+    ttl_seconds=int(os.getenv("FACET_CACHE_TTL", 1800))
+)
+
+# Query autocomplete over search_history
+search_history_path = Path(__file__).parent / "db" / "search_history.jsonl"
+query_autocomplete = QueryAutocomplete(top_k=int(os.getenv("AUTOCOMPLETE_TOP_K", 10)))
+search_history = SearchHistoryLogger(
+    query_autocomplete,
+    search_history_path,
+    db_writer=db_manager.log_searches if db_manager else None
+)
+
+def load_autocomplete_index():
+    search_history.load_autocomplete(lambda: load_history_counts(
+        search_history_path,
+        db_reader=db_manager.get_search_query_counts if db_manager else None
+    ))
+
+# Millions of history rows should not delay startup
+threading.Thread(target=load_autocomplete_index, name="autocomplete-build", daemon=True).start()
+
+federated_search = FederatedSearch()
+federated_search.register("arxiv", search_arxiv, deadline=float(os.getenv("SEARCH_DEADLINE_ARXIV", 8.0)))
+federated_search.register("local", search_local_index, deadline=float(os.getenv("SEARCH_DEADLINE_LOCAL", 0.3)))
+federated_search.register("uploads", search_uploads, deadline=float(os.getenv("SEARCH_DEADLINE_UPLOADS", 0.5)))
+if db_manager is not None:
+    federated_search.register("mysql", search_mysql, deadline=float(os.getenv("SEARCH_DEADLINE_MYSQL", 1.5)))
+
+# Until the local index holds this many papers (a few searches' worth) the
+# vocabulary is mostly the seed list, so corrections are only suggested and
+# the query is sent as typed; 0 always applies them
+SPELLING_MIN_CORPUS = int(os.getenv("SPELLING_MIN_CORPUS_PAPERS", 50))
+
+def apply_spelling_correction(query) -> list:
+    """Rewrite query.query in place when it contains likely typos and the vocabulary is warm"""
+    if not query.correct_spelling:
+        return []
+    result = spelling_corrector.correct_query(query.query)
+    applied = result["corrected"] and len(paper_index) >= SPELLING_MIN_CORPUS
+    if applied:
+        logger.info(f"✏️ Query rewritten: '{query.query}' → '{result['query']}'")
+        query.query = result["query"]
+    return [dict(correction, applied=applied) for correction in result["corrections"]]
+
+def search_response(query, facet_index, source: str, facet_filters: dict, original_query: str,
+                    corrections: list, cached: bool = False) -> dict:
+    """Filter a search's result set by the requested facets and build the /api/search response"""
+    papers = facet_index.filter(facet_filters)
+    logger.info(f"✅ Search complete: {len(papers)}/{len(facet_index.papers)} papers from {source}")
+    # Drill-down requests re-filter an earlier search, so only plain searches are logged
+    if not any(facet_filters.values()):
+        search_history.log(query.query, len(papers), source)
+    
+    return {
+        "query": query.query,
+        "papers": papers,
+        "count": len(papers),
+        "total": len(facet_index.papers),
+        "source": source,
+        "facets": facet_index.counts(facet_filters),
+        "filters": {k: v for k, v in facet_filters.items() if v},
+        "facets_cached": cached,
+        "original_query": original_query,
+        "corrections": corrections,
+        "status": "success"
+    }
+
 # Routes
 
 @app.get("/api/health")
@@ -422,10 +1187,29 @@ async def search_papers(query: SearchQuery):
             logger.warning("❌ Empty search query received")
             raise HTTPException(status_code=400, detail="Search query cannot be empty")
         
+        original_query = query.query
+        corrections = apply_spelling_correction(query)
+        
+        facet_filters = {
+            "categories": query.categories,
+            "year_from": query.year_from,
+            "year_to": query.year_to,
+            "authors": query.authors
+        }
+        cache_key = FacetCache.make_key(query.query, query.max_results or 20)
+        cached = facet_cache.get(cache_key)
+        
+        if cached:
+            # Drill-down on a recent query: filter the cached result set, no arXiv call
+            logger.info(f"⚡ Facet cache hit for '{query.query}'")
+            return search_response(query, cached["index"], cached["source"], facet_filters,
+                                   original_query, corrections, cached=True)
+        
         # Try real arXiv search first
         papers = search_arxiv(query.query, query.max_results or 20)
         
         # If arXiv fails, use mock data
+        used_mock = not papers
         if not papers:
             logger.info("⚠️ No results from arXiv, using mock data fallback")
             
@@ -472,16 +1256,13 @@ async def search_papers(query: SearchQuery):
                     "categories": ["cs.AI", "cs.LG"] if idx % 2 == 0 else ["cs.CV", "cs.NE"]
                 })
         
-        source = "arxiv" if papers and papers[0]["id"] != "2401.12345" else "mock"
-        logger.info(f"✅ Search complete: {len(papers)} papers from {source}")
+        source = "mock" if used_mock else "arxiv"
+        facet_index = FacetIndex(papers)
+        # Mock results are not cached so the next request retries arXiv
+        if not used_mock:
+            facet_cache.put(cache_key, facet_index, source)
         
-        return {
-            "query": query.query,
-            "papers": papers,
-            "count": len(papers),
-            "source": source,
-            "status": "success"
-        }
+        return search_response(query, facet_index, source, facet_filters, original_query, corrections)
     except HTTPException:
         raise
     except Exception as e:
@@ -496,70 +1277,305 @@ async def search_papers(query: SearchQuery):
             "error": str(e)
         }
 
-@app.post("/api/upload")
-async def upload_pdf(file: UploadFile = File(...)):
-    """Upload and parse PDF with real text extraction"""
+@app.get("/api/search/suggest")
+async def suggest_queries(q: str = "", limit: int = 10):
+    """Autocomplete search queries from historical frequencies"""
+    started = time.perf_counter()
+    suggestions = query_autocomplete.suggest(q, limit)
+    return {
+        "query": q,
+        "suggestions": suggestions,
+        "count": len(suggestions),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+@app.post("/api/search/federated")
+async def federated_search_papers(query: FederatedSearchQuery):
+    """Search arXiv, the local index, MySQL and uploads concurrently and fuse the rankings"""
     try:
-        if not file.filename.endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Only PDF files allowed")
+        if not query.query or not query.query.strip():
+            raise HTTPException(status_code=400, detail="Search query cannot be empty")
         
-        upload_dir = Path(__file__).parent / "uploads"
-        upload_dir.mkdir(exist_ok=True)
+        unknown = set(query.sources or []) - set(federated_search.source_names)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search sources: {', '.join(sorted(unknown))}")
         
-        file_path = upload_dir / file.filename
-        content = await file.read()
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        original_query = query.query
+        corrections = apply_spelling_correction(query)
         
-        logger.info(f"📄 PDF uploaded: {file.filename} ({len(content)} bytes)")
+        logger.info(f"🔍 Federated search for: '{query.query}' (sources: {query.sources or 'all'})")
+        result = await asyncio.to_thread(
+            federated_search.search, query.query.strip(), query.max_results or 20, query.sources
+        )
+        logger.info(f"✅ Federated search complete: {len(result['papers'])} papers in {result['elapsed_ms']} ms, dropped: {result['dropped']}")
+        search_history.log(query.query, len(result["papers"]), "federated")
+        
+        return {
+            "query": query.query,
+            "papers": result["papers"],
+            "count": len(result["papers"]),
+            "source": "federated",
+            "timings": result["timings"],
+            "dropped_sources": result["dropped"],
+            "elapsed_ms": result["elapsed_ms"],
+            "original_query": original_query,
+            "corrections": corrections,
+            "status": "success"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Federated search error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/papers/batch")
+async def batch_lookup_papers(request: BatchLookupRequest):
+    """Resolve metadata for many arXiv ids with a few id_list queries"""
+    try:
+        if not request.ids:
+            raise HTTPException(status_code=400, detail="No arXiv ids provided")
+        if len(request.ids) > MAX_BATCH_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+        
+        logger.info(f"📚 Batch metadata lookup for {len(request.ids)} ids")
+        result = await asyncio.to_thread(fetch_papers_by_ids, [str(i) for i in request.ids])
+        result["cache"] = metadata_cache.stats()
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch lookup error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def start_processing(filename: str, stored) -> ProcessingJob:
+    """
+    Register a stored upload and start (or join) its background processing job.
+    Ends the blob's in-flight ingest once the manifest refers to it.
+    """
+    try:
+        previous = upload_manifest.get(filename)
+        extraction_cache.remember_hash(stored.path, stored.sha256)
+        doc_id = document_store.register(stored.sha256, filename)["doc_id"]
+        
+        # Extraction and indexing run in the background; progress is published on events_url
+        job = upload_pipeline.get(doc_id)
+        if job is None or job.finished:
+            job = ProcessingJob(doc_id, filename, stored.path, stored.sha256)
+            if db_manager:
+                job.upload_id = await asyncio.to_thread(db_manager.create_upload, filename, str(stored.path), stored.size)
+            job = upload_pipeline.submit(job)
+        # A name joining a running job starts from the job's current status (no await in between);
+        # later status changes reach it through upload_manifest.update_sha
+        upload_manifest.record(filename, stored.size, stored.sha256, doc_id,
+                               status=job.status, page_count=job.page_count or None)
+        if job.page_count:
+            extracted = await asyncio.to_thread(extraction_cache.get, stored.sha256)
+            if extracted:
+                await asyncio.to_thread(upload_manifest.update, filename, preview=extracted["preview"])
+    finally:
+        blob_store.finish_ingest(stored.sha256)
+    # Overwriting a filename with different content drops the old blob's reference
+    if previous and previous["sha256"] != stored.sha256:
+        release_blob(previous["sha256"])
+    return job
+
+async def store_upload(source, filename: str, overwrite: bool = False) -> tuple:
+    """
+    Stream an upload into the blob store. Returns (filename, stored, duplicate);
+    the filename gets a "-2" style suffix when it is taken by a different
+    file, unless overwrite is set. The blob stays in flight until
+    start_processing records it.
+    """
+    stored, duplicate = await blob_store.ingest(source, MAX_FILE_SIZE, UPLOAD_CHUNK_SIZE)
+    if not overwrite:
+        filename = upload_manifest.unique_name(filename, stored.sha256)
+    if duplicate:
+        blob_store.touch(stored.sha256)
+        logger.info(f"♻️ Duplicate upload {filename}: reusing blob {stored.sha256[:12]}")
+    return filename, stored, duplicate
+
+@app.post("/api/upload")
+async def upload_pdf(file: UploadFile = File(...), wait: bool = False, include_text: bool = False,
+                     overwrite: bool = False):
+    """
+    Store a PDF and start background processing; later calls reference it by doc_id.
+    A name already used by a different file gets a numeric suffix unless overwrite=true.
+    """
+    try:
+        filename = safe_filename(file.filename)
+        if not filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files allowed")
         
-        # Extract text using pdfplumber
-        extracted_text = ""
         try:
-            import pdfplumber
-            with pdfplumber.open(file_path) as pdf:
-                logger.info(f"📄 PDF has {len(pdf.pages)} pages, extracting text...")
-                # Extract text from all pages (with reasonable limit)
-                for i, page in enumerate(pdf.pages[:50]):  # Limit to 50 pages
-                    try:
-                        text = page.extract_text()
-                        if text:
-                            extracted_text += text + "\n"
-                            if i < 3:
-                                logger.info(f"✅ Page {i+1}: Extracted {len(text)} chars")
-                    except Exception as page_error:
-                        logger.warning(f"Error extracting page {i+1}: {str(page_error)}")
-                        continue
-            
-            if extracted_text:
-                logger.info(f"📄 Total extracted: {len(extracted_text)} chars from {len(pdf.pages)} pages, first 500 chars: {extracted_text[:500]}")
-            else:
-                extracted_text = f"Could not extract text from {file.filename}. The PDF may be image-based or corrupted. File size: {len(content)} bytes."
-                logger.warning("⚠️ No text could be extracted from PDF")
-        except ImportError:
-            logger.error("🛑 pdfplumber not installed! PDF text extraction will not work.")
-            extracted_text = f"PDF uploaded: {file.filename}. Note: pdfplumber is not installed, so text extraction requires installation."
-        except Exception as e:
-            logger.error(f"❌ PDF extraction error: {str(e)}")
-            extracted_text = f"Error extracting text: {str(e)}"
+            filename, stored, duplicate = await store_upload(file, filename, overwrite)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
         
-        return {
-            "filename": file.filename,
-            "size": len(content),
-            "message": "PDF uploaded successfully",
-            "extracted_text": extracted_text,  # Return full extracted text for use in other endpoints
-            "text_length": len(extracted_text),
-            "preview": extracted_text[:500] if extracted_text else "No text extracted"
+        logger.info(f"📄 PDF uploaded: {filename} ({stored.size} bytes, sha256 {stored.sha256[:12]})")
+        job = await start_processing(filename, stored)
+        doc_id = job.doc_id
+        
+        result = {
+            "filename": filename,
+            "doc_id": doc_id,
+            "processing_id": doc_id,
+            "status": job.status,
+            "size": stored.size,
+            "sha256": stored.sha256,
+            "duplicate": duplicate,
+            "message": "PDF uploaded, processing started",
+            "status_url": f"/api/uploads/{doc_id}/status",
+            "events_url": f"/api/uploads/{doc_id}/events"
         }
+        
+        # wait=true keeps the synchronous behaviour for scripts
+        if wait or include_text:
+            await asyncio.shield(job.task)
+            extracted_text = ""
+            if job.status == "processed":
+                page_texts = await asyncio.to_thread(extraction_cache.read_pages, stored.sha256, 0, INITIAL_EXTRACT_PAGES)
+                extracted_text = "".join(text + "\n" for text in page_texts if text)
+            if not extracted_text:
+                logger.warning("⚠️ No text could be extracted from PDF")
+            result.update({
+                "status": job.status,
+                "error": job.error,
+                "message": "PDF uploaded successfully" if job.status == "processed" else f"PDF uploaded, processing failed: {job.error}",
+                "page_count": job.page_count,
+                "text_length": len(extracted_text),
+                "preview": extracted_text[:500] if extracted_text else "No text extracted"
+            })
+            # Full text stays on the server; pass doc_id to summarize/ask/recommend instead
+            if include_text:
+                result["extracted_text"] = extracted_text
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"🛑 Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/upload/batch")
+async def upload_batch(files: List[UploadFile] = File(...)):
+    """
+    Upload many PDFs, or zip archives of PDFs, in one request. Each file is
+    streamed to disk and handed to the processing pipeline as soon as it is
+    stored, so extraction of earlier files overlaps with storing later ones.
+    The response is NDJSON: a "stored" or "error" line per file as it lands,
+    a "processed"/"error" line as each finishes, then a "summary" line with
+    throughput.
+    """
+    started = time.perf_counter()
+    
+    def line(event: str, **data) -> str:
+        return json.dumps({"event": event, **data}) + "\n"
+    
+    async def store(source, filename: str) -> dict:
+        if not filename.lower().endswith('.pdf'):
+            raise ValueError("Only PDF files allowed")
+        filename, stored, duplicate = await store_upload(source, filename)
+        job = await start_processing(filename, stored)
+        return {"filename": filename, "doc_id": job.doc_id, "size": stored.size, "duplicate": duplicate, "job": job}
+    
+    async def sources():
+        """(reader, filename, error) for every PDF in the request, unpacking zip archives"""
+        for upload in files:
+            filename = safe_filename(upload.filename)
+            if not filename.lower().endswith('.zip'):
+                yield upload, filename, None
+                continue
+            try:
+                archive = await asyncio.to_thread(zipfile.ZipFile, upload.file)
+            except zipfile.BadZipFile:
+                yield None, filename, "Not a valid zip archive"
+                continue
+            with archive:
+                for info in archive_pdf_members(archive):
+                    # The declared size is only a hint; streaming enforces the real limit
+                    if info.file_size > MAX_FILE_SIZE:
+                        yield None, safe_filename(info.filename), str(UploadTooLarge(MAX_FILE_SIZE))
+                        continue
+                    member = ArchiveMember(archive, info)
+                    try:
+                        yield member, member.filename, None
+                    finally:
+                        member.close()
+    
+    async def stream():
+        accepted = []
+        rejected = failed = 0
+        async for source, filename, error in sources():
+            if error:
+                rejected += 1
+                yield line("error", filename=filename, stage="upload", error=error)
+                continue
+            if len(accepted) >= MAX_BATCH_FILES:
+                rejected += 1
+                yield line("error", filename=filename, stage="upload",
+                           error=f"Batch limit of {MAX_BATCH_FILES} files reached")
+                continue
+            try:
+                item = await store(source, filename)
+            except (ValueError, UploadTooLarge) as e:
+                rejected += 1
+                yield line("error", filename=filename, stage="upload", error=str(e))
+                continue
+            except Exception as e:
+                rejected += 1
+                logger.error(f"🛑 Batch upload error for {filename}: {str(e)}")
+                yield line("error", filename=filename, stage="upload", error=str(e))
+                continue
+            accepted.append(item)
+            yield line("stored", filename=item["filename"], doc_id=item["doc_id"], size=item["size"],
+                       duplicate=item["duplicate"], status=item["job"].status)
+        
+        # Report each file as its job finishes; duplicates share one job
+        waiting = {}
+        for item in accepted:
+            waiting.setdefault(item["job"].task, []).append(item)
+        processed = pages = 0
+        while waiting:
+            done, _ = await asyncio.wait(list(waiting), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                for item in waiting.pop(task):
+                    job = item["job"]
+                    if job.status == "processed":
+                        processed += 1
+                        pages += job.page_count
+                        yield line("processed", filename=item["filename"], doc_id=job.doc_id,
+                                   page_count=job.page_count)
+                    else:
+                        failed += 1
+                        yield line("error", filename=item["filename"], doc_id=job.doc_id,
+                                   stage=job.stage, error=job.error)
+        
+        elapsed = time.perf_counter() - started
+        total_bytes = sum(item["size"] for item in accepted)
+        logger.info(f"📦 Batch upload: {processed} processed, {rejected + failed} failed, "
+                    f"{pages} pages in {elapsed:.2f}s")
+        yield line("summary",
+                   files=len(accepted) + rejected,
+                   processed=processed,
+                   failed=rejected + failed,
+                   bytes=total_bytes,
+                   pages=pages,
+                   elapsed_seconds=round(elapsed, 3),
+                   files_per_second=round(processed / elapsed, 2) if elapsed else 0.0,
+                   pages_per_second=round(pages / elapsed, 1) if elapsed else 0.0,
+                   mb_per_second=round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed else 0.0)
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/api/summarize")
 async def summarize(request: SummarizeRequest):
     """Generate AI summary using real AI providers with full content"""
     try:
         logger.info(f"📊 Summarizing paper: {request.paper_id}")
+        if request.doc_id:
+            request.text = await load_document_text(request.doc_id, max_chars=5000, sections=SUMMARY_SECTIONS)
+        elif request.text:
+            request.text = normalize_text(request.text)
         logger.info(f"📊 USE_REAL_AI: {USE_REAL_AI}, Text available: {bool(request.text and len(request.text) > 50)}")
         
         # Use provided text (from PDF) for summarization, fall back to title
@@ -707,6 +1723,8 @@ Be specific, academic, and reference actual content where possible. Do not use g
             "content_length": content_length,
             "detected_topic": detected_topic
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"🛑 Summarize error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -716,25 +1734,41 @@ async def ask_question(request: AnswerRequest):
     """Ask a question about the paper using AI providers with smart fallback"""
     try:
         logger.info(f"❓ Question about {request.paper_id}: {request.question}")
-        logger.info(f"📊 USE_REAL_AI: {USE_REAL_AI}, Paper text available: {bool(request.text and len(request.text) > 10)}")
+        if request.text and not request.doc_id:
+            request.text = normalize_text(request.text)
+        passages = []
+        if request.doc_id or request.text:
+            passages = await retrieve_passages(request.question, doc_id=request.doc_id, text=request.text)
+        logger.info(f"📊 USE_REAL_AI: {USE_REAL_AI}, Retrieved passages: {len(passages)}")
+        sources = [{
+            "text": passage["text"][:300],
+            "page": passage["page"],
+            "end_page": passage["end_page"],
+            "section": passage["section"],
+            "chunk_id": passage["id"],
+            "score": round(passage["score"], 4)
+        } for passage in passages]
+        confidence = round(max(passages[0]["score"], 0.0), 4) if passages else 0.0
         
         # Try real AI response with full provider chain
         if USE_REAL_AI:
             logger.info("🔄 Attempting AI provider chain for question answering...")
             
-            # Build context-aware prompt
-            context = (request.text or "No paper content provided")[:2000]
+            # Only the retrieved passages go into the prompt, labelled so the answer can cite them
+            context = "\n\n".join(f"[{number}] ({passage_label(passage)})\n{passage['text']}"
+                                   for number, passage in enumerate(passages, 1))
+            context = context[:ASK_CONTEXT_CHARS] or "No paper content provided"
             
             prompt = f"""You are an expert research assistant. Answer this question about a research paper.
 
-Paper Content (first 2000 chars):
+Relevant passages from the paper:
 {context}
 
 User Question: {request.question}
 
 Provide:
-1. A direct, specific answer (2-3 sentences) based on the paper content
-2. Reference relevant sections or findings
+1. A direct, specific answer (2-3 sentences) based on the passages above
+2. Cite the passages you used by their number, e.g. [1]
 3. Maintain objectivity
 
 Answer:"""
@@ -748,11 +1782,8 @@ Answer:"""
                     "paper_id": request.paper_id,
                     "question": request.question,
                     "answer": answer_text.strip()[:800],
-                    "sources": [
-                        {"text": "Paper content and methodology", "score": 0.94},
-                        {"text": "Experimental results section", "score": 0.89}
-                    ],
-                    "confidence": 0.92,
+                    "sources": sources,
+                    "confidence": confidence,
                     "ai_generated": True
                 }
             else:
@@ -762,7 +1793,7 @@ Answer:"""
         logger.info("📝 Using enhanced context-aware mock answer based on question type and paper content")
         
         question_lower = request.question.lower()
-        paper_text = (request.text or "").lower()
+        paper_text = " ".join(passage["text"] for passage in passages).lower()
         
         # Extract key terms from paper text for better context
         key_terms = []
@@ -792,14 +1823,12 @@ Answer:"""
             "paper_id": request.paper_id,
             "question": request.question,
             "answer": base_answer,
-            "sources": [
-                {"text": "Paper methodology and framework (Section 3-4)", "score": 0.93},
-                {"text": "Experimental validation and results (Section 5)", "score": 0.88},
-                {"text": "Comparative analysis and related work (Section 2)", "score": 0.85}
-            ],
-            "confidence": 0.87,
+            "sources": sources,
+            "confidence": confidence,
             "ai_generated": False
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Q&A error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -819,6 +1848,7 @@ async def save_paper(request: SavePaperRequest):
             "notes": ""
         }
         save_db(db)
+        paper_index.add(dict(db[request.paper_id], id=request.paper_id), source="saved")
         
         logger.info(f"Saved paper: {request.paper_id}")
         return {"status": "saved", "paper_id": request.paper_id}
@@ -839,68 +1869,115 @@ async def get_saved_papers():
         logger.error(f"Retrieve error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/recommend")
-async def recommend_papers(request: RecommendRequest):
-    """Get similar paper recommendations using AI"""
+@app.delete("/api/saved/{paper_id:path}")
+async def delete_paper(paper_id: str):
+    """Remove a paper from the library"""
     try:
-        logger.info(f"Getting recommendations for: {request.paper_id}")
+        db = load_db()
+        if paper_id not in db:
+            raise HTTPException(status_code=404, detail="Paper not found")
+        del db[paper_id]
+        save_db(db)
+        paper_index.remove(paper_id, source="saved")
         
-        # Use AI to find similar papers if content provided
-        if USE_REAL_AI and request.text and request.title:
-            prompt = f"""Based on this paper:
-Title: {request.title}
-Content: {request.text[:500]}
+        logger.info(f"Removed paper: {paper_id}")
+        return {"status": "deleted", "paper_id": paper_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Delete paper error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-Suggest 3 similar research papers. For each, provide:
-- A realistic paper title related to this topic
-- 2-3 authors
-- A brief abstract
-- Similarity percentage (85-95%)
+def recommendation_entries(hits: list) -> list:
+    """API shape of (paper key, similarity) hits, in the given order; papers no longer indexed are dropped"""
+    entries = []
+    for key, score in hits:
+        paper = paper_index.get(key)
+        if paper is None:
+            continue
+        entries.append({
+            "id": paper.get("id") or key,
+            "title": paper.get("title") or "",
+            "authors": paper.get("authors") or [],
+            "abstract": (paper.get("abstract") or "")[:300],
+            "url": paper.get("url") or "",
+            "published_date": paper.get("published_date") or "",
+            "similarity": round(max(0.0, float(score)), 4),
+            "sources": paper.get("sources", [])
+        })
+    return entries
 
-Format your response as a JSON array of objects."""
-            
-            response_text = call_ai(prompt, max_tokens=1000)
-            
-            if response_text:
-                try:
-                    # Try to parse AI response
-                    recommendations = json.loads(response_text)
-                    return {
-                        "source_paper": request.paper_id,
-                        "recommendations": recommendations[:3],
-                        "ai_powered": True
-                    }
-                except:
-                    logger.warning("Could not parse AI recommendations, using defaults")
-        
-        # Fall back to generic recommendations
+@app.post("/api/recommend")
+async def recommend_papers(request: RecommendRequest):
+    """
+    Recommend similar papers among saved, uploaded, published and searched
+    arXiv papers: nearest neighbours in the paper vector index, diversified
+    with MMR. Lists are cached in memory and, for published papers, in MySQL.
+    """
+    try:
+        started = time.perf_counter()
+        limit = max(1, min(request.limit, 50))
+        if request.doc_id:
+            doc = document_store.get(request.doc_id)
+            if doc is None:
+                raise HTTPException(status_code=404, detail=f"Document {request.doc_id} not found")
+            source = f"upload:{doc['filenames'][0]}"
+        else:
+            source = paper_key({"id": request.paper_id})
+        source_paper = paper_index.get(source)
+        persistent = db_manager is not None and source_paper is not None and "published" in source_paper["sources"]
+
+        cache_key = recommendation_cache.make_key(source, limit)
+        recommendations = None if request.refresh else recommendation_cache.get(cache_key)
+        cached = recommendations is not None
+        if cached and any(paper_index.get(entry["id"]) is None for entry in recommendations):
+            recommendations, cached = None, False  # a recommended paper was removed since
+        if recommendations is None and persistent and not request.refresh:
+            # Stored lists expire like cached ones, so papers indexed since are considered again
+            rows = await asyncio.to_thread(db_manager.get_recommendations, source, limit, True,
+                                           recommendation_cache.ttl_seconds)
+            stored = recommendation_entries(
+                [(row["recommended_paper_id"], row["similarity_score"] or 0.0) for row in rows])
+            if stored and len(stored) == len(rows):
+                recommendations, cached = stored, True
+                recommendation_cache.put(cache_key, recommendations,
+                                         age_seconds=max(row["age_seconds"] or 0 for row in rows))
+
+        if recommendations is None:
+            vector = paper_vectors.vector(source)
+            indexed = vector is not None
+            if not indexed:
+                text = request.text
+                if request.doc_id:
+                    text = await load_document_text(request.doc_id, max_chars=2000, sections=("abstract", "introduction"))
+                elif text:
+                    text = normalize_text(text)
+                if not (text or request.title):
+                    raise HTTPException(status_code=400, detail="Paper is not indexed yet; send its title or text")
+                vector = (await embedding_service.embed([paper_text({"title": request.title, "abstract": text})]))[0]
+            hits = await asyncio.to_thread(recommender.recommend, vector, limit, {source})
+            recommendations = recommendation_entries(hits)
+            if persistent and indexed:
+                await asyncio.to_thread(db_manager.replace_recommendations, source, [{
+                    "recommended_paper_id": entry["id"],
+                    "similarity_score": entry["similarity"],
+                    "reason": f"Embedding similarity ({embedding_service.name})"
+                } for entry in recommendations])
+            if indexed:
+                recommendation_cache.put(cache_key, recommendations)
+
+        logger.info(f"🧭 {len(recommendations)} recommendations for {source}{' (cached)' if cached else ''}")
         return {
-            "source_paper": request.paper_id,
-            "similar_papers": [
-                {
-                    "id": "2401.99999",
-                    "title": "Advanced Methods Building on Recent Innovations",
-                    "authors": ["Dr. David", "Dr. Emma"],
-                    "similarity": 0.94,
-                    "abstract": "This paper extends recent work by introducing novel techniques that improve performance in key metrics..."
-                },
-                {
-                    "id": "2312.88888",
-                    "title": "Practical Applications and Implementation Strategies",
-                    "authors": ["Prof. Frank"],
-                    "similarity": 0.89,
-                    "abstract": "Implementation-focused study demonstrating real-world deployment strategies and practical considerations..."
-                },
-                {
-                    "id": "2311.77777",
-                    "title": "Theoretical Foundations and Methodological Advances",
-                    "authors": ["Dr. Grace", "Prof. Henry"],
-                    "similarity": 0.85,
-                    "abstract": "Theoretical analysis providing formal guarantees and mathematical foundations for the methodology..."
-                }
-            ],
-            "ai_powered": False
+            "source_paper": source,
+            "recommendations": recommendations,
+            "ai_powered": False,
+            "method": "embedding-mmr",
+            "cached": cached,
+            "corpus_size": len(paper_vectors),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Recommendation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -975,45 +2052,60 @@ Write in academic style with specific examples and citations."""
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/uploads")
-async def list_uploads():
-    """List all uploaded PDF files in workspace"""
+async def list_uploads(sort: str = "modified", order: str = "desc", limit: int = 50,
+                       cursor: Optional[str] = None, q: Optional[str] = None, status: Optional[str] = None,
+                       min_size: Optional[int] = None, max_size: Optional[int] = None):
+    """
+    Page through uploaded PDFs from the upload manifest. Sort by modified,
+    name, size or pages; filter by filename substring (q), status and size
+    range; pass next_cursor back as cursor for the following page.
+    """
     try:
-        upload_dir = Path(__file__).parent / "uploads"
-        
-        if not upload_dir.exists():
-            return {"files": [], "total_size": 0, "count": 0}
-        
-        files_info = []
-        total_size = 0
-        
-        for file_path in upload_dir.glob("*.pdf"):
-            try:
-                stat = file_path.stat()
-                size = stat.st_size
-                modified_time = datetime.fromtimestamp(stat.st_mtime)
-                
-                files_info.append({
-                    "filename": file_path.name,
-                    "size": size,
-                    "size_mb": round(size / (1024 * 1024), 2),
-                    "modified": modified_time.isoformat(),
-                    "path": str(file_path)
-                })
-                total_size += size
-            except Exception as e:
-                logger.warning(f"Error reading file info for {file_path}: {str(e)}")
-                continue
-        
-        # Sort by modified time (newest first)
-        files_info.sort(key=lambda x: x['modified'], reverse=True)
-        
+        if sort not in SORT_FIELDS:
+            raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_FIELDS)}")
+        if order not in ("asc", "desc"):
+            raise HTTPException(status_code=400, detail="order must be asc or desc")
+        limit = max(1, min(limit, MAX_UPLOADS_PAGE))
+        needle = q.lower() if q else None
+        
+        def match(entry: dict) -> bool:
+            if needle and needle not in entry["filename"].lower():
+                return False
+            if status and entry.get("status") != status:
+                return False
+            if min_size is not None and entry["size"] < min_size:
+                return False
+            if max_size is not None and entry["size"] >= max_size:
+                return False
+            return True
+        
+        filtered = needle or status or min_size is not None or max_size is not None
+        try:
+            entries, next_cursor = upload_manifest.page(sort, order == "desc", limit, cursor,
+                                                        match if filtered else None)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        files_info = [
+            {
+                **entry,
+                "size_mb": round(entry["size"] / (1024 * 1024), 2),
+                "path": str(blob_store.path(entry["sha256"])) if entry["sha256"] else None
+            }
+            for entry in entries
+        ]
+        totals = upload_manifest.stats()
         return {
             "files": files_info,
             "count": len(files_info),
-            "total_size": total_size,
-            "total_size_mb": round(total_size / (1024 * 1024), 2),
-            "upload_dir": str(upload_dir)
+            "next_cursor": next_cursor,
+            "total": totals["count"],
+            "total_size": totals["total_size"],
+            "total_size_mb": round(totals["total_size"] / (1024 * 1024), 2),
+            "upload_dir": str(UPLOAD_DIR)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"List uploads error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1026,22 +2118,19 @@ async def delete_upload(filename: str):
         if ".." in filename or "/" in filename or "\\" in filename:
             raise HTTPException(status_code=400, detail="Invalid filename")
         
-        upload_dir = Path(__file__).parent / "uploads"
-        file_path = upload_dir / filename
-        
-        # Ensure the file is in the uploads directory
-        if not file_path.resolve().is_relative_to(upload_dir.resolve()):
-            raise HTTPException(status_code=400, detail="Invalid file path")
-        
-        if not file_path.exists():
+        entry = await asyncio.to_thread(forget_upload, filename)
+        if entry is None:
             raise HTTPException(status_code=404, detail="File not found")
         
-        file_path.unlink()  # Delete the file
+        # The blob goes only when no other filename refers to the same content
+        freed = await asyncio.to_thread(release_blob, entry["sha256"])
         logger.info(f"📄 Deleted file: {filename}")
         
         return {
             "status": "deleted",
             "filename": filename,
+            "blob_deleted": freed > 0,
+            "freed_bytes": freed,
             "message": f"File {filename} has been deleted successfully"
         }
     except HTTPException:
@@ -1058,42 +2147,237 @@ async def get_upload_info(filename: str):
         if ".." in filename or "/" in filename or "\\" in filename:
             raise HTTPException(status_code=400, detail="Invalid filename")
         
-        upload_dir = Path(__file__).parent / "uploads"
-        file_path = upload_dir / filename
+        entry = upload_manifest.get(filename)
+        if entry is None or not filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        # Files migrated from before the manifest that were never parsed are parsed once here
+        if entry["page_count"] is None and entry["sha256"] and upload_pipeline.get(entry["doc_id"]) is None:
+            file_path = blob_store.path(entry["sha256"])
+            if not file_path.exists():
+                raise HTTPException(status_code=404, detail="File not found")
+            try:
+                extraction = await get_extracted_pages(file_path, entry["sha256"])
+                document_store.update(entry["doc_id"], page_count=extraction["page_count"])
+                entry = upload_manifest.update(filename, page_count=extraction["page_count"],
+                                               preview=extraction["preview"]) or entry
+            except Exception:
+                entry = {**entry, "preview": "Could not extract preview text"}
+        
+        return {
+            "filename": filename,
+            "doc_id": entry["doc_id"],
+            "size": entry["size"],
+            "size_mb": round(entry["size"] / (1024 * 1024), 2),
+            "created": entry["modified"],
+            "modified": entry["modified"],
+            "pages": entry["page_count"] or 0,
+            "status": entry["status"],
+            "preview": entry["preview"] or "No text extracted"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get file info error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.api_route("/api/uploads/{filename}/file", methods=["GET", "HEAD"])
+async def get_upload_file(request: Request, filename: str, download: bool = False):
+    """
+    The uploaded PDF itself, for in-browser viewing (inline) or download=true.
+    Supports Range requests so PDF viewers can fetch pages incrementally,
+    and ETag (the content hash) / Last-Modified for conditional GET.
+    """
+    try:
+        if ".." in filename or "/" in filename or "\\" in filename:
+            raise HTTPException(status_code=400, detail="Invalid filename")
         
-        if not file_path.exists() or not file_path.suffix.lower() == '.pdf':
+        entry = upload_manifest.get(filename)
+        if entry is None or not entry["sha256"]:
+            raise HTTPException(status_code=404, detail="File not found")
+        file_path = blob_store.path(entry["sha256"])
+        if not file_path.exists():
             raise HTTPException(status_code=404, detail="File not found")
         
-        stat = file_path.stat()
+        blob_store.touch(entry["sha256"])
+        return file_response(request, file_path, f'"{entry["sha256"]}"', filename, download=download)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get upload file error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/uploads/{filename}/text")
+async def get_upload_text(filename: str, start: int = 1, end: Optional[int] = None):
+    """Extracted text of an uploaded PDF for a page range (1-based, inclusive)"""
+    try:
+        if ".." in filename or "/" in filename or "\\" in filename:
+            raise HTTPException(status_code=400, detail="Invalid filename")
         
-        # Try to extract text for preview
-        preview_text = ""
-        page_count = 0
-        try:
-            import pdfplumber
-            with pdfplumber.open(file_path) as pdf:
-                page_count = len(pdf.pages)
-                # Get first page text as preview
-                if pdf.pages:
-                    preview_text = pdf.pages[0].extract_text() or ""
-        except:
-            preview_text = "Could not extract preview text"
+        entry = upload_manifest.get(filename)
+        if entry is None or not entry["sha256"]:
+            raise HTTPException(status_code=404, detail="File not found")
+        sha256 = entry["sha256"]
+        file_path = blob_store.path(sha256)
+        blob_store.touch(sha256)
+        
+        if start < 1 or (end is not None and end < start):
+            raise HTTPException(status_code=400, detail="Invalid page range")
+        end = end or start + MAX_TEXT_PAGE_RANGE - 1
+        if end - start + 1 > MAX_TEXT_PAGE_RANGE:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_TEXT_PAGE_RANGE} pages per request")
+        
+        extraction = await get_extracted_pages(file_path, sha256)
+        end = min(end, extraction["page_count"])
         
+        # Pages past the extracted prefix: wait for the background extraction
+        if end > extraction["pages_extracted"]:
+            finished = await asyncio.shield(schedule_extraction(file_path, sha256))
+            extraction = finished or extraction
+        
+        page_texts = await asyncio.to_thread(extraction_cache.read_pages, sha256, start - 1, end)
         return {
             "filename": filename,
-            "size": stat.st_size,
-            "size_mb": round(stat.st_size / (1024 * 1024), 2),
-            "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-            "pages": page_count,
-            "preview": preview_text[:300] if preview_text else "No text extracted"
+            "sha256": sha256,
+            "page_count": extraction["page_count"],
+            "pages_extracted": extraction["pages_extracted"],
+            "complete": extraction["complete"],
+            "start": start,
+            "end": start + len(page_texts) - 1,
+            "pages": [{"page": start + i, "text": text} for i, text in enumerate(page_texts)]
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get file info error: {str(e)}")
+        logger.error(f"Get upload text error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/uploads/{doc_id}/status")
+async def get_upload_status(doc_id: str):
+    """Processing status of an upload (pending, processing, processed, error)"""
+    job = upload_pipeline.get(doc_id)
+    doc = document_store.get(doc_id)
+    if job is not None:
+        return {**job.to_dict(), "normalization": (doc or {}).get("normalization")}
+    if not doc:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {
+        "doc_id": doc_id,
+        "filename": doc["filenames"][0] if doc["filenames"] else None,
+        "status": doc.get("status", "processed"),
+        "page_count": doc.get("page_count", 0),
+        "error": doc.get("error"),
+        "normalization": doc.get("normalization")
+    }
+
+@app.get("/api/uploads/{doc_id}/sections")
+async def get_upload_sections(doc_id: str, name: Optional[str] = None):
+    """Detected section outline of an upload, or one section's text with ?name="""
+    doc = document_store.get(doc_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    sections = doc.get("sections") or []
+    if name is None:
+        return {"doc_id": doc_id, "sections": sections}
+    if name not in {s["name"] for s in sections}:
+        raise HTTPException(status_code=404, detail=f"Section {name} not found")
+    text = await load_document_text(doc_id, max_chars=DOC_CONTEXT_CHARS, sections=(name,))
+    return {"doc_id": doc_id, "name": name, "text": text}
+
+@app.get("/api/uploads/{doc_id}/events")
+async def upload_events(doc_id: str):
+    """Server-Sent Events stream of an upload's stage, page progress and final status"""
+    if upload_pipeline.get(doc_id) is None:
+        status = await get_upload_status(doc_id)
+        
+        async def finished_stream():
+            yield f"event: snapshot\ndata: {json.dumps(status)}\n\n"
+        return StreamingResponse(finished_stream(), media_type="text/event-stream")
+    
+    async def event_stream():
+        async for message in upload_pipeline.subscribe(doc_id):
+            yield f"event: {message['event']}\ndata: {json.dumps(message)}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/uploads/{doc_id}/references")
+async def get_upload_references(doc_id: str):
+    """Works cited by an uploaded paper, as parsed from its reference list"""
+    if document_store.get(doc_id) is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {"doc_id": doc_id, "references": citation_graph.cites(f"doc:{doc_id}")}
+
+def resolve_citation_node(paper_id: str) -> str:
+    node_id = citation_graph.lookup(paper_id)
+    if node_id is None:
+        raise HTTPException(status_code=404, detail=f"Paper {paper_id} is not in the citation graph")
+    return node_id
+
+@app.get("/api/citations/{paper_id:path}/cites")
+async def get_cites(paper_id: str):
+    """Papers cited by a paper (doc_id, arXiv id, DOI, title or graph node id)"""
+    started = time.perf_counter()
+    node_id = resolve_citation_node(paper_id)
+    cites = citation_graph.cites(node_id)
+    return {"paper": citation_graph.node(node_id), "cites": cites, "count": len(cites),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+@app.get("/api/citations/{paper_id:path}/cited-by")
+async def get_cited_by(paper_id: str):
+    """Uploaded papers that cite a paper"""
+    started = time.perf_counter()
+    node_id = resolve_citation_node(paper_id)
+    cited_by = citation_graph.cited_by(node_id)
+    return {"paper": citation_graph.node(node_id), "cited_by": cited_by, "count": len(cited_by),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+@app.get("/api/citations/{paper_id:path}/neighborhood")
+async def get_citation_neighborhood(paper_id: str, hops: int = 2, direction: str = "both", limit: int = 500):
+    """k-hop citation neighborhood (direction: out = cites, in = cited by, both)"""
+    if direction not in ("in", "out", "both"):
+        raise HTTPException(status_code=400, detail="direction must be in, out or both")
+    started = time.perf_counter()
+    node_id = resolve_citation_node(paper_id)
+    result = citation_graph.neighborhood(node_id, hops, direction, max(1, min(limit, 5000)))
+    return {"paper": citation_graph.node(node_id), **result,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+@app.get("/api/storage")
+async def get_storage_usage():
+    """Disk used by uploads and derived artifacts against the quota"""
+    try:
+        return await asyncio.to_thread(storage_manager.usage)
+    except Exception as e:
+        logger.error(f"Storage usage error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/vectors")
+async def get_vector_index_stats():
+    """Size, pending inserts, tombstones and last snapshot of the paper and chunk vector indexes"""
+    return {"papers": paper_vectors.stats(), "chunks": chunk_vectors.stats(), "embeddings": embedding_service.stats()}
+
+@app.post("/api/storage/gc")
+async def collect_storage(dry_run: bool = False, quota_mb: Optional[int] = None,
+                          max_age_days: Optional[float] = None):
+    """
+    Evict orphaned, expired and least recently used uploads (with their
+    derived artifacts) until usage fits the quota. Saved and published
+    papers are pinned. dry_run=true reports what would be removed.
+    """
+    try:
+        if (quota_mb is not None and quota_mb < 0) or (max_age_days is not None and max_age_days < 0):
+            raise HTTPException(status_code=400, detail="quota_mb and max_age_days must be non-negative")
+        return await asyncio.to_thread(
+            storage_manager.collect, dry_run,
+            None if quota_mb is None else quota_mb * 1024 * 1024,
+            None if max_age_days is None else max_age_days * 86400)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Storage GC error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 # ===============================
 # AI RESEARCH PAPER GENERATION
@@ -1528,6 +2812,7 @@ async def publish_paper(request_body: dict):
 
         # Insert into database
         db_manager.save_paper(paper_data)
+        paper_index.add(mysql_row_to_paper(paper_data), source="published")
 
         # Store additional metadata
         metadata = {
@@ -0,0 +1,4 @@
+"""
+ResearchPilot AI - Backend Services
+Business logic used by the FastAPI route handlers in main_enhanced.py
+"""
@@ -0,0 +1,462 @@
+"""
+ResearchPilot AI - ANN Vector Index
+Inverted-file (IVF) nearest-neighbour index over normalized embeddings:
+vectors are grouped by their closest centroid and stored list by list in a
+memory-mapped snapshot, so a query reads only the lists nearest to it.
+Lists can be scanned as float16/int8 codes, with the best candidates
+re-ranked against the full-precision vectors
+"""
+
+import os
+import json
+import math
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.quantization import ScalarQuantizer
+
+logger = logging.getLogger(__name__)
+
+# Below this many vectors a single list (exact search) is as fast as IVF
+FLAT_THRESHOLD = 10000
+LISTS_PER_SQRT = 4
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+QUANTIZER_SAMPLE = 100000
+ASSIGN_BATCH = 8192
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def list_count(size: int) -> int:
+    """Number of inverted lists for an index of size vectors"""
+    return 1 if size < FLAT_THRESHOLD else int(LISTS_PER_SQRT * math.sqrt(size))
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (by inner product) for each vector"""
+    result = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BATCH):
+        batch = np.asarray(vectors[start:start + ASSIGN_BATCH], dtype=np.float32)
+        result[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return result
+
+
+def train_centroids(sample: np.ndarray, nlist: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids (unit length) from a sample of vectors"""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = np.bincount(labels, minlength=nlist) == 0
+        # Re-seed empty lists with random sample vectors
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class _Snapshot:
+    """
+    One immutable generation on disk: full-precision vectors sorted by list,
+    their codes when quantized (codes.npy, scales.npy), list offsets,
+    centroids, and ids in row order (the id -> row index is built on load)
+    """
+
+    def __init__(self, directory: Path, dim: int):
+        self.directory = directory
+        self.quantizer = ScalarQuantizer("float32")
+        if directory is None:
+            self.vectors = np.zeros((0, dim), dtype=np.float32)
+            self.centroids = np.zeros((0, dim), dtype=np.float32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.ids: List[str] = []
+        else:
+            self.vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+            self.centroids = np.load(directory / "centroids.npy")
+            self.offsets = np.load(directory / "offsets.npy")
+            with open(directory / "ids.json", "r", encoding="utf-8") as f:
+                self.ids = json.load(f)
+        self.codes = self.vectors
+        if directory is not None and (directory / "codes.npy").exists():
+            self.codes = np.load(directory / "codes.npy", mmap_mode="r")
+            scales = np.load(directory / "scales.npy") if (directory / "scales.npy").exists() else None
+            self.quantizer = ScalarQuantizer(str(self.codes.dtype), scales)
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.deleted = np.zeros(len(self.ids), dtype=bool)
+
+    def list_of_rows(self) -> np.ndarray:
+        """List number of every row"""
+        return np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int32), np.diff(self.offsets))
+
+    def search(self, query: np.ndarray, k: int, nprobe: int, rerank: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (rows, scores) of the live rows in the nprobe closest lists. With
+        quantized codes, the best k * rerank by approximate score are
+        re-scored exactly; only those full-precision rows are read.
+        """
+        nlist = len(self.centroids)
+        if not len(self.ids) or not nlist:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if nprobe >= nlist:
+            probes = range(nlist)
+        else:
+            probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in probes])
+        # Lists are contiguous, so scoring one reads a single slice of the mapped file
+        scores = np.concatenate([self.quantizer.score(self.codes[self.offsets[l]:self.offsets[l + 1]], query)
+                                 for l in probes])
+        live = ~self.deleted[rows]
+        rows, scores = rows[live], scores[live]
+        if self.quantizer.exact or not rerank:
+            return rows, scores
+        if len(rows) > k * rerank:
+            rows = rows[np.argpartition(-scores, k * rerank - 1)[:k * rerank]]
+        rows = np.sort(rows)
+        return rows, self.vectors[rows] @ query
+
+
+class AnnIndex:
+    """
+    Top-k inner-product search over unit vectors keyed by string ids.
+
+    The bulk of the index is the last snapshot, memory-mapped read-only.
+    Inserts go to an in-memory delta that is scanned exactly; deletes mark
+    snapshot rows as tombstones. snapshot() folds both into a new
+    generation directory and switches current.json to it, reusing the
+    centroids unless the index has grown or shrunk enough to need a
+    different number of lists.
+
+    quantization ("float32", "float16" or "int8") applies from the next
+    snapshot; rerank is how many candidates per result are re-scored at
+    full precision (0 returns approximate scores).
+    """
+
+    def __init__(self, root: Path, dim: int, nprobe: int = 16, max_delta: int = 50000,
+                 quantization: str = "float32", rerank: int = 4):
+        self.root = Path(root)
+        self.dim = dim
+        self.nprobe = nprobe
+        self.max_delta = max_delta
+        self.quantization = ScalarQuantizer(quantization).kind
+        self.rerank = rerank
+        self._lock = threading.Lock()           # delta and tombstones
+        self._snapshot_lock = threading.Lock()  # one snapshot() at a time
+        self._journal: Optional[list] = None    # writes made while a snapshot is being built
+        self._delta = np.zeros((1024, dim), dtype=np.float32)  # first len(_delta_ids) rows are used
+        self._delta_ids: List[str] = []
+        self._delta_rows: Dict[str, int] = {}
+        self._dirty = False
+        self.last_snapshot: Optional[Dict] = None
+        self._base = self._load()
+
+    def _load(self) -> _Snapshot:
+        self.root.mkdir(parents=True, exist_ok=True)
+        current = self.root / "current.json"
+        base = _Snapshot(None, self.dim)
+        if current.exists():
+            try:
+                with open(current, "r", encoding="utf-8") as f:
+                    self.last_snapshot = json.load(f)
+                base = _Snapshot(self.root / self.last_snapshot["generation"], self.dim)
+                if base.vectors.shape[1:] != (self.dim,):
+                    logger.warning(f"⚠️ Vector index {self.root} has dimension {base.vectors.shape[1]}, "
+                                   f"expected {self.dim}; starting empty")
+                    base = _Snapshot(None, self.dim)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"❌ Could not load vector index {self.root}: {str(e)}")
+                base = _Snapshot(None, self.dim)
+        # Generations left behind by an interrupted snapshot or a locked old file
+        for directory in [*self.root.glob("gen-*"), *self.root.glob(".gen-*")]:
+            if directory != base.directory:
+                shutil.rmtree(directory, ignore_errors=True)
+        logger.info(f"🧭 Vector index {self.root.name}: {len(base.ids)} vectors, {len(base.centroids)} lists, "
+                    f"{base.quantizer.kind}")
+        if base.ids and base.quantizer.kind != self.quantization:
+            self._dirty = True  # re-encode at the next snapshot
+        return base
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._base.ids) - int(self._base.deleted.sum()) + len(self._delta_ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        with self._lock:
+            return item_id in self._delta_rows or self._live_row(item_id) is not None
+
+    def _live_row(self, item_id: str) -> Optional[int]:
+        row = self._base.rows.get(item_id)
+        return None if row is None or self._base.deleted[row] else row
+
+    @property
+    def needs_snapshot(self) -> bool:
+        return len(self._delta_ids) >= self.max_delta
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        """Insert or replace vectors (normalized here) under the given ids"""
+        ids = list(ids)
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim))
+        with self._lock:
+            self._add(ids, vectors)
+            if self._journal is not None:
+                self._journal.append((ids, vectors))
+            self._dirty = True
+
+    def _add(self, ids: List[str], vectors: np.ndarray):
+        fresh = []
+        for item_id, vector in zip(ids, vectors):
+            row = self._live_row(item_id)
+            if row is not None:
+                self._base.deleted[row] = True
+            position = self._delta_rows.get(item_id)
+            if position is not None:
+                self._delta[position] = vector
+            else:
+                self._delta_rows[item_id] = len(self._delta_ids) + len(fresh)
+                fresh.append((item_id, vector))
+        if fresh:
+            used = len(self._delta_ids)
+            if used + len(fresh) > len(self._delta):
+                grown = np.zeros((max(2 * len(self._delta), used + len(fresh)), self.dim), dtype=np.float32)
+                grown[:used] = self._delta[:used]
+                self._delta = grown
+            self._delta[used:used + len(fresh)] = np.stack([vector for _, vector in fresh])
+            self._delta_ids.extend(item_id for item_id, _ in fresh)
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Delete ids; returns how many were present"""
+        ids = list(ids)
+        with self._lock:
+            removed = self._remove(ids)
+            if self._journal is not None and removed:
+                self._journal.append((ids, None))
+            self._dirty = self._dirty or removed > 0
+        return removed
+
+    def _remove(self, ids: List[str]) -> int:
+        removed = 0
+        for item_id in ids:
+            row = self._live_row(item_id)
+            if row is not None:
+                self._base.deleted[row] = True
+                removed += 1
+            position = self._delta_rows.pop(item_id, None)
+            if position is not None:
+                # Fill the hole with the last delta vector
+                last = len(self._delta_ids) - 1
+                if position != last:
+                    moved = self._delta_ids[last]
+                    self._delta[position] = self._delta[last]
+                    self._delta_ids[position] = moved
+                    self._delta_rows[moved] = position
+                self._delta_ids.pop()
+                removed += 1
+        return removed
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+               exclude: Iterable[str] = (), rerank: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(id, score) of the k nearest vectors by inner product, best first"""
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+        exclude = set(exclude)
+        fetch = k + len(exclude)
+        with self._lock:
+            base = self._base
+            delta_scores = self._delta[:len(self._delta_ids)] @ query
+            delta_ids = list(self._delta_ids)
+        rows, scores = base.search(query, fetch, nprobe or self.nprobe, self.rerank if rerank is None else rerank)
+        candidates = [(base.ids[row], float(score)) for row, score in self._top(rows, scores, fetch)]
+        candidates += [(delta_ids[position], float(score))
+                       for position, score in self._top(np.arange(len(delta_scores)), delta_scores, fetch)]
+        candidates.sort(key=lambda item: item[1], reverse=True)
+        return [item for item in candidates if item[0] not in exclude][:k]
+
+    @staticmethod
+    def _top(rows: np.ndarray, scores: np.ndarray, k: int):
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[best], scores[best]
+        return zip(rows, scores)
+
+    def vector(self, item_id: str) -> Optional[np.ndarray]:
+        """Stored (normalized) vector for an id"""
+        with self._lock:
+            position = self._delta_rows.get(item_id)
+            if position is not None:
+                return self._delta[position].copy()
+            row = self._live_row(item_id)
+            return None if row is None else np.array(self._base.vectors[row])
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            live = [item_id for row, item_id in enumerate(self._base.ids) if not self._base.deleted[row]]
+            return live + list(self._delta_ids)
+
+    def snapshot(self) -> Optional[Dict]:
+        """
+        Write a new generation with the delta merged and tombstones dropped; None if nothing changed.
+        The index lock is only held to capture the current state and to swap the new generation
+        in: writes made while it is being built go to a journal and are replayed onto it.
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                if not self._dirty:
+                    return None
+                base = self._base
+                live_rows = np.flatnonzero(~base.deleted)
+                delta = self._delta[:len(self._delta_ids)].copy()
+                delta_ids = list(self._delta_ids)
+                self._journal = []
+            try:
+                info, directory = self._build(base, live_rows, delta, delta_ids)
+                new_base = _Snapshot(directory, self.dim)
+            except BaseException:
+                with self._lock:
+                    self._journal = None
+                raise
+            with self._lock:
+                journal, self._journal = self._journal, None
+                self._base = new_base
+                self._delta = np.zeros((1024, self.dim), dtype=np.float32)
+                self._delta_ids = []
+                self._delta_rows = {}
+                for ids, vectors in journal:
+                    if vectors is None:
+                        self._remove(ids)
+                    else:
+                        self._add(ids, vectors)
+                self._dirty = bool(journal)
+                self.last_snapshot = info
+            if base.directory is not None:
+                # Fails harmlessly where open memory maps cannot be deleted; _load cleans up later
+                shutil.rmtree(base.directory, ignore_errors=True)
+        logger.info(f"🧭 Vector index {self.root.name} snapshot: {info['count']} vectors in {info['lists']} lists "
+                    f"({info['elapsed_seconds']}s{', retrained' if info['retrained'] else ''}"
+                    f"{f', {len(journal)} writes replayed' if journal else ''})")
+        return info
+
+    def _build(self, base: _Snapshot, live_rows: np.ndarray, delta: np.ndarray, delta_ids: List[str]):
+        """Write a generation from the captured live rows and delta; returns (info, directory)"""
+        started = time.perf_counter()
+        size = len(live_rows) + len(delta)
+        nlist = min(list_count(size), size) or 1
+        current = len(base.centroids)
+        # Keep the trained lists while their count is within a factor of two of the ideal
+        retrain = nlist > 1 and not (current > 1 and nlist / 2 <= current <= nlist * 2)
+        if nlist > 1 and not retrain:
+            nlist = current
+        if nlist == 1:
+            centroids = np.zeros((1, self.dim), dtype=np.float32)
+        elif retrain:
+            centroids = train_centroids(self._sample(base, live_rows, delta, nlist * KMEANS_SAMPLE_PER_LIST), nlist)
+        else:
+            centroids = base.centroids
+
+        # Every live vector's list: kept from the old layout unless the centroids changed
+        if nlist == 1:
+            lists = np.zeros(size, dtype=np.int32)
+        elif retrain:
+            lists = np.concatenate([assign(base.vectors[live_rows], centroids), assign(delta, centroids)])
+        else:
+            lists = np.concatenate([base.list_of_rows()[live_rows], assign(delta, centroids)])
+        quantizer = ScalarQuantizer.fit(self.quantization, self._sample(base, live_rows, delta, QUANTIZER_SAMPLE))
+        order = np.argsort(lists, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(lists, minlength=nlist))
+
+        generation = f"gen-{int(time.time() * 1000)}"
+        directory = self.root / generation
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.root, prefix=".gen-"))
+        try:
+            out = np.lib.format.open_memmap(tmp_dir / "vectors.npy", mode="w+", dtype=np.float32,
+                                            shape=(size, self.dim))
+            codes = None
+            if not quantizer.exact:
+                codes = np.lib.format.open_memmap(tmp_dir / "codes.npy", mode="w+", dtype=quantizer.dtype,
+                                                  shape=(size, self.dim))
+            ids = []
+            for start in range(0, size, ASSIGN_BATCH):
+                batch = order[start:start + ASSIGN_BATCH]
+                from_base = batch < len(live_rows)
+                chunk = np.empty((len(batch), self.dim), dtype=np.float32)
+                chunk[from_base] = base.vectors[live_rows[batch[from_base]]]
+                chunk[~from_base] = delta[batch[~from_base] - len(live_rows)]
+                out[start:start + len(batch)] = chunk
+                if codes is not None:
+                    codes[start:start + len(batch)] = quantizer.encode(chunk)
+                ids.extend(base.ids[live_rows[i]] if i < len(live_rows) else delta_ids[i - len(live_rows)]
+                           for i in batch)
+            out.flush()
+            del out
+            if codes is not None:
+                codes.flush()
+                del codes
+            if quantizer.scales is not None:
+                np.save(tmp_dir / "scales.npy", quantizer.scales)
+            np.save(tmp_dir / "centroids.npy", centroids)
+            np.save(tmp_dir / "offsets.npy", offsets)
+            with open(tmp_dir / "ids.json", "w", encoding="utf-8") as f:
+                json.dump(ids, f, separators=(",", ":"))
+            os.replace(tmp_dir, directory)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        info = {
+            "generation": generation,
+            "count": size,
+            "lists": nlist,
+            "quantization": quantizer.kind,
+            "retrained": retrain,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "built_at": datetime.now().isoformat(timespec="seconds")
+        }
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=".current-", suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        os.replace(tmp_name, self.root / "current.json")
+        return info, directory
+
+    @staticmethod
+    def _sample(base: _Snapshot, live_rows: np.ndarray, delta: np.ndarray, size: int) -> np.ndarray:
+        """Up to size live vectors drawn at random from the snapshot and the delta"""
+        rng = np.random.default_rng(0)
+        total = len(live_rows) + len(delta)
+        picks = np.sort(rng.choice(total, size=min(total, size), replace=False))
+        from_base = picks[picks < len(live_rows)]
+        from_delta = picks[picks >= len(live_rows)] - len(live_rows)
+        return np.concatenate([np.asarray(base.vectors[live_rows[from_base]]), delta[from_delta]])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            base = self._base
+            return {
+                "vectors": len(base.ids) - int(base.deleted.sum()) + len(self._delta_ids),
+                "snapshot_vectors": len(base.ids),
+                "tombstones": int(base.deleted.sum()),
+                "pending": len(self._delta_ids),
+                "lists": len(base.centroids),
+                "nprobe": self.nprobe,
+                "quantization": base.quantizer.kind,
+                "rerank": self.rerank,
+                # Bytes scanned per vector versus the full-precision copy read only for re-ranking
+                "scan_bytes": int(base.codes.nbytes),
+                "full_precision_bytes": int(base.vectors.nbytes),
+                "last_snapshot": self.last_snapshot
+            }
@@ -0,0 +1,231 @@
+"""
+ResearchPilot AI - arXiv Metadata Service
+Feed parsing, a shared metadata cache and batch lookup by arXiv ID
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+ATOM_NS = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'arxiv': 'http://arxiv.org/schemas/atom'
+}
+
+# arXiv accepts long id_list values, but keeps responses small enough to parse quickly
+ID_LIST_CHUNK_SIZE = int(os.getenv("ARXIV_ID_LIST_CHUNK_SIZE", 100))
+MAX_BATCH_IDS = int(os.getenv("ARXIV_MAX_BATCH_IDS", 500))
+
+# New-style (2401.12345, optional v2) and old-style (hep-th/9901001) identifiers
+_ARXIV_ID_RE = re.compile(
+    r'^(?P<base>\d{4}\.\d{4,5}|[a-z][a-z\-]*(?:\.[a-z]{2})?/\d{7})(?P<version>v\d+)?$',
+    re.IGNORECASE
+)
+_ARXIV_PREFIX_RE = re.compile(r'^(?:https?://(?:export\.)?arxiv\.org/(?:abs|pdf)/|arxiv:)', re.IGNORECASE)
+
+
+def normalize_arxiv_id(raw_id: str) -> Optional[str]:
+    """Normalize an arXiv id, abs/pdf URL or 'arXiv:' reference; None if invalid"""
+    if not isinstance(raw_id, str):
+        return None
+    candidate = _ARXIV_PREFIX_RE.sub('', raw_id.strip())
+    if candidate.lower().endswith('.pdf'):
+        candidate = candidate[:-4]
+    match = _ARXIV_ID_RE.match(candidate)
+    if not match:
+        return None
+    return match.group('base').lower() + (match.group('version') or '')
+
+
+def base_arxiv_id(arxiv_id: str) -> str:
+    """Strip the version suffix from a normalized arXiv id"""
+    return re.sub(r'v\d+$', '', arxiv_id)
+
+
+def parse_arxiv_entry(entry: ET.Element) -> Optional[Dict]:
+    """Convert an Atom <entry> into the paper dict used across the API"""
+    entry_id = entry.find('atom:id', ATOM_NS).text
+    # arXiv reports bad ids as an entry pointing at its errors page
+    if '/api/errors' in entry_id:
+        return None
+
+    arxiv_id = entry_id.split('/abs/')[-1]
+    doi = entry.find('arxiv:doi', ATOM_NS)
+    return {
+        "id": arxiv_id,
+        "title": " ".join(entry.find('atom:title', ATOM_NS).text.split()),
+        "authors": [
+            author.find('atom:name', ATOM_NS).text
+            for author in entry.findall('atom:author', ATOM_NS)
+        ][:5],  # Limit to 5 authors
+        "abstract": entry.find('atom:summary', ATOM_NS).text.strip(),
+        "published_date": entry.find('atom:published', ATOM_NS).text[:10],
+        "url": f"https://arxiv.org/pdf/{arxiv_id}.pdf",
+        "categories": [cat.get('term') for cat in entry.findall('atom:category', ATOM_NS)],
+        "doi": doi.text.strip() if doi is not None and doi.text else None
+    }
+
+
+def parse_arxiv_feed(content: bytes) -> List[Dict]:
+    """Parse an arXiv Atom feed, skipping malformed or error entries"""
+    root = ET.fromstring(content)
+    papers = []
+    for entry in root.findall('atom:entry', ATOM_NS):
+        try:
+            paper = parse_arxiv_entry(entry)
+            if paper:
+                papers.append(paper)
+        except Exception as e:
+            logger.warning(f"⚠️ Error parsing paper entry: {str(e)}")
+    return papers
+
+
+class ArxivMetadataCache:
+    """Thread-safe LRU cache of arXiv paper metadata with a TTL"""
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: int = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, arxiv_id: str) -> Optional[Dict]:
+        """Look up a paper by versioned id, or by base id for the latest seen version"""
+        with self._lock:
+            item = self._entries.get(arxiv_id)
+            if item is not None and time.monotonic() - item[0] > self.ttl_seconds:
+                del self._entries[arxiv_id]
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(arxiv_id)
+            self.hits += 1
+            return item[1]
+
+    def put(self, paper: Dict):
+        """Store a paper under both its versioned and base id"""
+        arxiv_id = normalize_arxiv_id(paper.get("id", ""))
+        if not arxiv_id:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key in {arxiv_id, base_arxiv_id(arxiv_id)}:
+                self._entries[key] = (now, paper)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put_many(self, papers: List[Dict]):
+        for paper in papers:
+            self.put(paper)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_entries": self.max_entries
+            }
+
+
+# Shared by /api/search and /api/papers/batch so search results hydrate later lookups
+metadata_cache = ArxivMetadataCache(
+    max_entries=int(os.getenv("ARXIV_CACHE_SIZE", 5000)),
+    ttl_seconds=int(os.getenv("ARXIV_CACHE_TTL", 86400))
+)
+
+_session = requests.Session()
+
+
+def _fetch_id_chunk(arxiv_ids: List[str], timeout: int = 20) -> List[Dict]:
+    """Resolve one chunk of ids with a single id_list query"""
+    params = {
+        "id_list": ",".join(arxiv_ids),
+        "start": 0,
+        "max_results": len(arxiv_ids)
+    }
+    response = _session.get(ARXIV_API_URL, params=params, timeout=timeout)
+    if response.status_code != 200:
+        raise RuntimeError(f"arXiv API error: {response.status_code}")
+    return parse_arxiv_feed(response.content)
+
+
+def fetch_papers_by_ids(raw_ids: List[str]) -> Dict:
+    """
+    Resolve many arXiv ids at once.
+
+    Ids are normalized and deduplicated, served from the metadata cache when
+    possible, and the rest are fetched in chunks of ID_LIST_CHUNK_SIZE.
+    Results are returned in request order with a per-id status.
+    """
+    normalized = [normalize_arxiv_id(raw) for raw in raw_ids]
+    resolved = {}
+    errors = {}
+    cache_hits = 0
+
+    missing = []
+    for arxiv_id in dict.fromkeys(i for i in normalized if i):
+        paper = metadata_cache.get(arxiv_id)
+        if paper:
+            resolved[arxiv_id] = paper
+            cache_hits += 1
+        else:
+            missing.append(arxiv_id)
+
+    requests_made = 0
+    for start in range(0, len(missing), ID_LIST_CHUNK_SIZE):
+        chunk = missing[start:start + ID_LIST_CHUNK_SIZE]
+        requests_made += 1
+        try:
+            papers = _fetch_id_chunk(chunk)
+        except Exception as e:
+            logger.error(f"❌ arXiv id_list lookup failed for {len(chunk)} ids: {str(e)}")
+            for arxiv_id in chunk:
+                errors[arxiv_id] = f"arXiv lookup failed: {str(e)}"
+            continue
+
+        metadata_cache.put_many(papers)
+        by_id = {}
+        for paper in papers:
+            by_id[paper["id"]] = paper
+            by_id.setdefault(base_arxiv_id(paper["id"]), paper)
+        for arxiv_id in chunk:
+            paper = by_id.get(arxiv_id)
+            if paper:
+                resolved[arxiv_id] = paper
+            else:
+                errors[arxiv_id] = "Paper not found on arXiv"
+
+    results = []
+    for raw, arxiv_id in zip(raw_ids, normalized):
+        if not arxiv_id:
+            results.append({"id": raw, "status": "error", "error": "Invalid arXiv identifier"})
+        elif arxiv_id in resolved:
+            results.append({"id": raw, "status": "ok", "paper": resolved[arxiv_id]})
+        else:
+            results.append({"id": raw, "status": "error", "error": errors.get(arxiv_id, "Paper not found on arXiv")})
+
+    found = sum(1 for r in results if r["status"] == "ok")
+    logger.info(f"📚 Batch lookup: {found}/{len(results)} resolved, {cache_hits} cache hits, {requests_made} arXiv requests")
+    return {
+        "results": results,
+        "count": len(results),
+        "found": found,
+        "errors": len(results) - found,
+        "cache_hits": cache_hits,
+        "arxiv_requests": requests_made
+    }
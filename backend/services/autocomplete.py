@@ -0,0 +1,268 @@
+"""
+ResearchPilot AI - Query Autocomplete
+Asynchronous search_history logging and an in-memory prefix index
+(sorted array + precomputed top-k for crowded prefixes) for suggestions
+"""
+
+import json
+import heapq
+import queue
+import logging
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_QUERY_LENGTH = 200
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())[:MAX_QUERY_LENGTH]
+
+
+class QueryAutocomplete:
+    """
+    Prefix suggestions ranked by historical frequency.
+
+    Queries live in a sorted array, so a prefix maps to a contiguous range
+    found with two binary searches. Small ranges are scanned directly; for
+    prefixes whose range exceeds scan_limit the top-k is precomputed at build
+    time, which keeps every lookup bounded regardless of history size.
+    New queries land in a small sorted delta that stays visible until a
+    rebuild has swapped in arrays containing them.
+    """
+
+    def __init__(self, top_k: int = 10, scan_limit: int = 512, max_delta: int = 1000):
+        self.top_k = top_k
+        self.scan_limit = scan_limit
+        self.max_delta = max_delta
+        self._keys: List[str] = []
+        self._freqs: List[int] = []
+        self._top: Dict[str, List[Tuple[int, str]]] = {}
+        self._delta: Dict[str, int] = {}
+        self._delta_keys: List[str] = []
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._keys) + len(self._delta)
+
+    def build(self, counts: Dict[str, int]):
+        """Replace the index, pending delta included, with the given query -> frequency map"""
+        keys, freqs, top = self._prepare(counts)
+        with self._lock:
+            self._keys, self._freqs, self._top = keys, freqs, top
+            self._delta, self._delta_keys = {}, []
+            self._generation += 1
+        logger.info(f"🔤 Autocomplete index built: {len(keys)} queries, {len(top)} precomputed prefixes")
+
+    def _prepare(self, counts: Dict[str, int]):
+        merged = {}
+        for query, count in counts.items():
+            key = normalize_query(query)
+            if key:
+                merged[key] = merged.get(key, 0) + int(count)
+        keys = sorted(merged)
+        freqs = [merged[k] for k in keys]
+        return keys, freqs, self._precompute_top(keys, freqs)
+
+    def _precompute_top(self, keys: List[str], freqs: List[int]) -> Dict[str, List[Tuple[int, str]]]:
+        """
+        Top-k for every prefix whose range exceeds scan_limit, built bottom-up:
+        a crowded range's top-k is merged from its children's top-k lists, so
+        each key is scanned once no matter how long the shared prefix is.
+        """
+        top = {}
+
+        def visit(lo: int, hi: int, depth: int) -> List[Tuple[int, str]]:
+            if hi - lo <= self.scan_limit or depth >= MAX_QUERY_LENGTH:
+                return heapq.nlargest(self.top_k, zip(freqs[lo:hi], keys[lo:hi]))
+            candidates = []
+            start = lo
+            # A key equal to the shared prefix sorts before its extensions
+            while start < hi and len(keys[start]) <= depth:
+                candidates.append((freqs[start], keys[start]))
+                start += 1
+            while start < hi:
+                child_prefix = keys[start][:depth + 1]
+                end = bisect_left(keys, child_prefix + "\uffff", start, hi)
+                candidates.extend(visit(start, end, depth + 1))
+                start = end
+            result = heapq.nlargest(self.top_k, candidates)
+            if depth:
+                top[keys[lo][:depth]] = result
+            return result
+
+        if keys:
+            visit(0, len(keys), 0)
+        return top
+
+    def record(self, query: str, count: int = 1):
+        """Count a newly logged query; folded into the sorted array on rebuild"""
+        key = normalize_query(query)
+        if not key:
+            return
+        with self._lock:
+            if key not in self._delta:
+                insort(self._delta_keys, key)
+            self._delta[key] = self._delta.get(key, 0) + count
+            needs_rebuild = len(self._delta) >= self.max_delta and not self._rebuilding
+            if needs_rebuild:
+                self._rebuilding = True
+        if needs_rebuild:
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """
+        Merge the delta into the sorted array. The merged counts leave the
+        delta only when the new arrays are swapped in; if a full build()
+        replaced the arrays meanwhile, the merge starts over from those.
+        """
+        try:
+            while True:
+                with self._lock:
+                    generation = self._generation
+                    counts = dict(zip(self._keys, self._freqs))
+                    delta = dict(self._delta)
+                for key, count in delta.items():
+                    counts[key] = counts.get(key, 0) + count
+                keys, freqs, top = self._prepare(counts)
+                with self._lock:
+                    if generation != self._generation:
+                        continue
+                    for key, count in delta.items():
+                        remaining = self._delta[key] - count
+                        if remaining > 0:
+                            self._delta[key] = remaining
+                        else:
+                            del self._delta[key]
+                    self._delta_keys = sorted(self._delta)
+                    self._keys, self._freqs, self._top = keys, freqs, top
+                    self._generation += 1
+                logger.info(f"🔤 Autocomplete delta merged: {len(keys)} queries, {len(top)} precomputed prefixes")
+                return
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def suggest(self, prefix: str, limit: Optional[int] = None) -> List[Dict]:
+        limit = min(limit or self.top_k, self.top_k)
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            keys, freqs, top = self._keys, self._freqs, self._top
+            d_lo = bisect_left(self._delta_keys, prefix)
+            d_hi = bisect_left(self._delta_keys, prefix + "\uffff", d_lo)
+            delta = {key: self._delta[key] for key in self._delta_keys[d_lo:d_hi]}
+
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + "\uffff", lo)
+        if hi - lo <= self.scan_limit:
+            candidates = heapq.nlargest(limit, zip(freqs[lo:hi], keys[lo:hi]))
+        else:
+            candidates = top.get(prefix) or heapq.nlargest(limit, zip(freqs[lo:hi], keys[lo:hi]))
+
+        if delta:
+            scores = {key: freq for freq, key in candidates}
+            for key, count in delta.items():
+                if key not in scores:
+                    idx = bisect_left(keys, key, lo, hi)
+                    scores[key] = freqs[idx] if idx < hi and keys[idx] == key else 0
+                scores[key] += count
+            candidates = heapq.nlargest(limit, ((freq, key) for key, freq in scores.items()))
+
+        return [{"query": key, "count": freq} for freq, key in candidates[:limit]]
+
+
+class SearchHistoryLogger:
+    """
+    Queue-backed writer for search_history. Requests enqueue and return;
+    a daemon thread writes in batches to MySQL (when available) or to a
+    JSON-lines file, and feeds the autocomplete index once a batch is
+    written, so a rebuild from history never counts a query twice.
+    """
+
+    def __init__(self, autocomplete: QueryAutocomplete, fallback_path: Path,
+                 db_writer: Optional[Callable[[List[Dict]], bool]] = None,
+                 batch_size: int = 200, flush_interval: float = 1.0):
+        self.autocomplete = autocomplete
+        self.fallback_path = fallback_path
+        self.db_writer = db_writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=100000)
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="search-history", daemon=True)
+        self._thread.start()
+
+    def log(self, query: str, results_count: int, source: str):
+        """Record a search without blocking the request"""
+        query = (query or "").strip()[:1000]
+        if not query:
+            return
+        try:
+            self._queue.put_nowait({
+                "query": query,
+                "results_count": results_count,
+                "search_source": source,
+                "created_at": datetime.now().isoformat(timespec="seconds")
+            })
+        except queue.Full:
+            logger.warning("⚠️ Search history queue full, dropping entry")
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                pass
+            with self._write_lock:
+                self._write(batch)
+                for entry in batch:
+                    self.autocomplete.record(entry["query"])
+
+    def load_autocomplete(self, load_counts: Callable[[], Dict[str, int]]):
+        """Rebuild the autocomplete index from stored history; writes wait until it is swapped in"""
+        with self._write_lock:
+            self.autocomplete.build(load_counts())
+
+    def _write(self, batch: List[Dict]):
+        if self.db_writer:
+            try:
+                if self.db_writer(batch):
+                    return
+            except Exception as e:
+                logger.error(f"❌ Search history DB write failed: {str(e)}")
+        try:
+            with open(self.fallback_path, "a", encoding="utf-8") as f:
+                for entry in batch:
+                    f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            logger.error(f"❌ Search history file write failed: {str(e)}")
+
+
+def load_history_counts(fallback_path: Path,
+                        db_reader: Optional[Callable[[], Dict[str, int]]] = None) -> Dict[str, int]:
+    """Aggregate historical query frequencies from MySQL or the fallback log"""
+    if db_reader:
+        try:
+            return db_reader()
+        except Exception as e:
+            logger.error(f"❌ Could not read search_history: {str(e)}")
+    counts = {}
+    if fallback_path.exists():
+        with open(fallback_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    query = json.loads(line)["query"]
+                except (ValueError, KeyError):
+                    continue
+                counts[query] = counts.get(query, 0) + 1
+    return counts
@@ -0,0 +1,121 @@
+"""
+ResearchPilot AI - Content-Addressed Blob Storage
+Stores each distinct uploaded file once, under its SHA-256, so the same
+paper uploaded under several names shares one blob and its derived data
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from services.upload_store import DEFAULT_CHUNK_SIZE, StoredUpload, stream_upload_to_disk
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """
+    sha256 -> file at <root>/<sha[:2]>/<sha>.pdf. Uploads stream into a
+    staging file first (their hash is only known at the end) and are then
+    renamed into place, or dropped when the blob already exists.
+    Reference counts live with the filename mapping (the upload manifest);
+    callers remove a blob once nothing refers to it. An ingested blob stays
+    in flight, and cannot be removed, until the caller has recorded its
+    reference and calls finish_ingest().
+    """
+
+    def __init__(self, root: Path, suffix: str = ".pdf"):
+        self.root = Path(root)
+        self.suffix = suffix
+        self.staging = self.root / ".incoming"
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / f"{sha256}{self.suffix}"
+
+    def exists(self, sha256: str) -> bool:
+        return self.path(sha256).exists()
+
+    async def ingest(self, upload, max_bytes: int,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[StoredUpload, bool]:
+        """Stream an upload into the store; returns (stored blob, was already present)"""
+        staged = self.staging / uuid.uuid4().hex
+        stored = await stream_upload_to_disk(upload, staged, max_bytes, chunk_size)
+        with self._lock:
+            self._in_flight[stored.sha256] = self._in_flight.get(stored.sha256, 0) + 1
+            return self._commit(staged, stored.sha256, stored.size)
+
+    def finish_ingest(self, sha256: str):
+        """The ingest's reference is recorded (or abandoned); the blob may be removed again"""
+        with self._lock:
+            remaining = self._in_flight.get(sha256, 0) - 1
+            if remaining > 0:
+                self._in_flight[sha256] = remaining
+            else:
+                self._in_flight.pop(sha256, None)
+
+    def in_flight(self, sha256: str) -> bool:
+        with self._lock:
+            return sha256 in self._in_flight
+
+    def adopt(self, file_path: Path, sha256: str) -> Tuple[StoredUpload, bool]:
+        """Move an existing file (e.g. a pre-blob-store upload) into the store"""
+        return self._commit(Path(file_path), sha256, Path(file_path).stat().st_size)
+
+    def _commit(self, source: Path, sha256: str, size: int) -> Tuple[StoredUpload, bool]:
+        dest = self.path(sha256)
+        duplicate = dest.exists()
+        if duplicate:
+            source.unlink(missing_ok=True)
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, dest)
+        return StoredUpload(path=dest, size=size, sha256=sha256), duplicate
+
+    def remove(self, sha256: str) -> int:
+        """Delete a blob unless an ingest of it is in flight; returns the bytes freed"""
+        dest = self.path(sha256)
+        with self._lock:
+            if sha256 in self._in_flight:
+                return 0
+            try:
+                size = dest.stat().st_size
+                dest.unlink()
+            except FileNotFoundError:
+                return 0
+        try:
+            dest.parent.rmdir()
+        except OSError:
+            pass
+        logger.info(f"🗑️ Removed blob {sha256[:12]} ({size} bytes)")
+        return size
+
+    def touch(self, sha256: str):
+        """Record a read (access time only; mtime stays the upload time for Last-Modified)"""
+        dest = self.path(sha256)
+        try:
+            os.utime(dest, (time.time(), dest.stat().st_mtime))
+        except OSError:
+            pass
+
+    def list(self) -> Dict[str, Tuple[int, float, float]]:
+        """sha256 -> (bytes, last used, stored at) for every blob"""
+        blobs = {}
+        for path in self.root.glob(f"??/*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            blobs[path.stem] = (stat.st_size, max(stat.st_atime, stat.st_mtime), stat.st_mtime)
+        return blobs
+
+    def size(self, sha256: str) -> Optional[int]:
+        try:
+            return self.path(sha256).stat().st_size
+        except FileNotFoundError:
+            return None
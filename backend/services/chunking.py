@@ -0,0 +1,60 @@
+"""
+ResearchPilot AI - Text Chunking
+Splits a document into overlapping word windows for retrieval, keeping the
+page and section each chunk starts in
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+_WORD_RE = re.compile(r"\S+")
+
+# Defaults follow ARCHITECTURE.md: 300 tokens per chunk, 50 overlap, at least 5 words
+CHUNK_TOKENS = 300
+CHUNK_OVERLAP = 50
+MIN_CHUNK_WORDS = 5
+
+
+def _section_at(sections: Sequence[Dict], page: int, offset: int) -> Optional[str]:
+    name = None
+    for section in sections:
+        if (section["start"][0], section["start"][1]) <= (page, offset):
+            name = section["name"]
+        else:
+            break
+    return name
+
+
+def chunk_pages(pages: Sequence[str], sections: Optional[Sequence[Dict]] = None,
+                chunk_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP,
+                min_words: int = MIN_CHUNK_WORDS) -> List[Dict]:
+    """
+    Overlapping chunks of chunk_tokens words (a word approximates a token)
+    across page boundaries. Each chunk records its 1-based start and end
+    page and, when section spans are given, the section it starts in.
+    """
+    overlap = max(0, min(overlap, chunk_tokens - 1))
+    words = []  # (word, page, offset)
+    for page_number, text in enumerate(pages):
+        words.extend((m.group(0), page_number, m.start()) for m in _WORD_RE.finditer(text or ""))
+
+    sections = sorted(sections or [], key=lambda s: tuple(s["start"]))
+    chunks = []
+    step = chunk_tokens - overlap
+    for start in range(0, len(words), step):
+        window = words[start:start + chunk_tokens]
+        if len(window) < min_words and chunks:
+            break
+        if len(window) < min_words:
+            continue
+        _, page, offset = window[0]
+        chunks.append({
+            "id": len(chunks),
+            "text": " ".join(word for word, _, _ in window),
+            "page": page + 1,
+            "end_page": window[-1][1] + 1,
+            "section": _section_at(sections, page, offset) if sections else None
+        })
+        if start + chunk_tokens >= len(words):
+            break
+    return chunks
@@ -0,0 +1,283 @@
+"""
+ResearchPilot AI - Citation Graph
+In-memory citation graph with forward (cites) and backward (cited by)
+adjacency sets, persisted to JSON; references are matched to the same
+node by arXiv id or DOI, or by normalized title when they have neither
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from services.arxiv_fetch import base_arxiv_id, normalize_arxiv_id
+from services.deferred_save import DeferredSave
+from services.references import title_key
+
+logger = logging.getLogger(__name__)
+
+MAX_NEIGHBORHOOD_HOPS = 3
+NODE_FIELDS = ("title", "authors", "year", "arxiv_id", "doi", "doc_id")
+
+
+def identity_keys(paper: Dict) -> List[str]:
+    """Keys a paper can be recognised by, most reliable first"""
+    keys = []
+    if paper.get("arxiv_id"):
+        keys.append(f"arxiv:{paper['arxiv_id']}")
+    if paper.get("doi"):
+        keys.append(f"doi:{paper['doi'].lower()}")
+    key = title_key(paper.get("title"))
+    if key:
+        keys.append(f"title:{key}")
+    return keys
+
+
+def match_keys(paper: Dict) -> List[str]:
+    """Keys used to find a paper's existing node: its arXiv id / DOI, or its title if it has neither"""
+    keys = identity_keys(paper)
+    strong = [key for key in keys if not key.startswith("title:")]
+    return strong or keys
+
+
+def conflicts(node: Dict, paper: Dict) -> bool:
+    """True when node and paper carry different arXiv ids or DOIs (different works)"""
+    return any(node.get(field) and paper.get(field) and node[field].lower() != paper[field].lower()
+               for field in ("arxiv_id", "doi"))
+
+
+class CitationGraph:
+    """
+    Nodes are papers: uploaded documents ("doc:<doc_id>") and the works they
+    cite (keyed by their first identity key). Each source's outgoing edges
+    are replaced as a whole when its references are re-parsed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._nodes: Dict[str, Dict] = {}
+        self._forward: Dict[str, Set[str]] = {}
+        self._backward: Dict[str, Set[str]] = {}
+        self._aliases: Dict[str, str] = {}  # identity key -> node id
+        self._lock = threading.RLock()
+        self._load()
+        self._saver = DeferredSave(self.path, self._snapshot, ".citations-")
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Could not read citation graph {self.path}: {str(e)}")
+            return
+        for node in data.get("nodes", []):
+            self._add_node(node["id"], node)
+        for source, targets in data.get("edges", {}).items():
+            for target in targets:
+                self._link(source, target)
+        logger.info(f"🕸️ Citation graph: {len(self._nodes)} papers, {self.edge_count()} citations")
+
+    def _save(self):
+        """Schedule a write of the graph; caller holds the lock"""
+        self._saver.mark_dirty()
+
+    def _snapshot(self) -> Dict:
+        with self._lock:
+            nodes = [dict(node) for node in self._nodes.values()]
+            edges = {source: list(targets) for source, targets in self._forward.items() if targets}
+        return {"nodes": nodes, "edges": {source: sorted(targets) for source, targets in edges.items()}}
+
+    def flush(self):
+        """Write pending changes now"""
+        self._saver.flush()
+
+    def _add_node(self, node_id: str, fields: Dict) -> Dict:
+        node = self._nodes.setdefault(node_id, {"id": node_id})
+        for field in NODE_FIELDS:
+            if fields.get(field) and not node.get(field):
+                node[field] = fields[field]
+        for key in identity_keys(node):
+            self._aliases.setdefault(key, node_id)
+        self._forward.setdefault(node_id, set())
+        self._backward.setdefault(node_id, set())
+        return node
+
+    def _link(self, source: str, target: str):
+        if source != target:
+            self._forward.setdefault(source, set()).add(target)
+            self._backward.setdefault(target, set()).add(source)
+
+    def _find(self, paper: Dict) -> Optional[str]:
+        """Existing node for a paper; titles only match papers without an arXiv id or DOI"""
+        for key in match_keys(paper):
+            node_id = self._aliases.get(key)
+            if node_id and not conflicts(self._nodes[node_id], paper):
+                return node_id
+        return None
+
+    def _resolve(self, paper: Dict) -> str:
+        """Node id for a paper, creating the node if no compatible node is known"""
+        node_id = self._find(paper)
+        if node_id is None:
+            keys = match_keys(paper)
+            if not keys:
+                raise ValueError("paper has no identity")
+            # A key can already name a conflicting work (same title, or one id shared and the other not)
+            node_id = next((key for key in keys if key not in self._nodes), None)
+            n = 2
+            while node_id is None or node_id in self._nodes:
+                node_id, n = f"{keys[0]}#{n}", n + 1
+        return self._add_node(node_id, paper)["id"]
+
+    def _merge(self, old: str, new: str):
+        """Fold node old into new (a cited work turned out to be an uploaded document)"""
+        for target in self._forward.pop(old, set()):
+            self._backward[target].discard(old)
+            self._link(new, target)
+        for source in self._backward.pop(old, set()):
+            self._forward[source].discard(old)
+            self._link(source, new)
+        node = self._nodes.pop(old, {})
+        self._add_node(new, node)
+        for key, node_id in list(self._aliases.items()):
+            if node_id == old:
+                self._aliases[key] = new
+
+    def _drop_if_unused(self, node_id: str):
+        node = self._nodes.get(node_id)
+        if node is None or node.get("doc_id") or self._forward.get(node_id) or self._backward.get(node_id):
+            return
+        del self._nodes[node_id]
+        self._forward.pop(node_id, None)
+        self._backward.pop(node_id, None)
+        for key in identity_keys(node):
+            if self._aliases.get(key) == node_id:
+                del self._aliases[key]
+
+    def set_references(self, doc_id: str, paper: Dict, references: Iterable[Dict]) -> int:
+        """Record an uploaded document and replace the list of works it cites; returns edges added"""
+        source = f"doc:{doc_id}"
+        with self._lock:
+            self._add_node(source, {**paper, "doc_id": doc_id})
+            # Works already cited by others under this document's identity become this node
+            for key in match_keys(paper):
+                other = self._aliases.get(key)
+                if other and other != source and not self._nodes[other].get("doc_id"):
+                    if conflicts(self._nodes[other], self._nodes[source]):
+                        continue
+                    self._merge(other, source)
+                self._aliases[key] = source
+            for target in self._forward.get(source, set()):
+                self._backward[target].discard(source)
+            previous = self._forward.get(source, set())
+            self._forward[source] = set()
+            for reference in references:
+                try:
+                    self._link(source, self._resolve(reference))
+                except ValueError:
+                    continue
+            for target in previous - self._forward[source]:
+                self._drop_if_unused(target)
+            self._save()
+            return len(self._forward[source])
+
+    def remove_document(self, doc_id: str):
+        """Forget an uploaded document's outgoing citations (it stays a node if others cite it)"""
+        source = f"doc:{doc_id}"
+        with self._lock:
+            node = self._nodes.get(source)
+            if node is None:
+                return
+            targets = self._forward.get(source, set())
+            for target in targets:
+                self._backward[target].discard(source)
+            self._forward[source] = set()
+            node.pop("doc_id", None)
+            for target in targets:
+                self._drop_if_unused(target)
+            self._drop_if_unused(source)
+            self._save()
+
+    def lookup(self, identifier: str) -> Optional[str]:
+        """Node id for a node id, doc_id, arXiv id, DOI or title"""
+        identifier = identifier.strip()
+        with self._lock:
+            if identifier in self._nodes:
+                return identifier
+            if f"doc:{identifier}" in self._nodes:
+                return f"doc:{identifier}"
+            arxiv_id = normalize_arxiv_id(identifier)
+            candidates = [f"arxiv:{base_arxiv_id(arxiv_id)}"] if arxiv_id else []
+            candidates.append(f"doi:{identifier.lower().removeprefix('doi:')}")
+            key = title_key(identifier)
+            if key:
+                candidates.append(f"title:{key}")
+            for candidate in candidates:
+                if candidate in self._aliases:
+                    return self._aliases[candidate]
+        return None
+
+    def node(self, node_id: str) -> Optional[Dict]:
+        with self._lock:
+            node = self._nodes.get(node_id)
+            if node is None:
+                return None
+            return {**node, "cites": len(self._forward.get(node_id, ())),
+                    "cited_by": len(self._backward.get(node_id, ()))}
+
+    def cites(self, node_id: str) -> List[Dict]:
+        with self._lock:
+            return [self.node(target) for target in sorted(self._forward.get(node_id, ()))]
+
+    def cited_by(self, node_id: str) -> List[Dict]:
+        with self._lock:
+            return [self.node(source) for source in sorted(self._backward.get(node_id, ()))]
+
+    def neighborhood(self, node_id: str, hops: int = 1, direction: str = "both", limit: int = 500) -> Dict:
+        """
+        Breadth-first k-hop neighborhood. direction is "out" (cites),
+        "in" (cited by) or "both". Returns nodes with their hop distance and
+        the edges among them, stopping at limit nodes.
+        """
+        hops = max(1, min(hops, MAX_NEIGHBORHOOD_HOPS))
+        with self._lock:
+            distance = {node_id: 0}
+            queue = deque([node_id])
+            truncated = False
+            while queue and not truncated:
+                current = queue.popleft()
+                if distance[current] >= hops:
+                    continue
+                neighbors = set()
+                if direction in ("out", "both"):
+                    neighbors |= self._forward.get(current, set())
+                if direction in ("in", "both"):
+                    neighbors |= self._backward.get(current, set())
+                for neighbor in sorted(neighbors):
+                    if neighbor in distance:
+                        continue
+                    if len(distance) >= limit:
+                        truncated = True
+                        break
+                    distance[neighbor] = distance[current] + 1
+                    queue.append(neighbor)
+            edges = [[source, target] for source in distance
+                     for target in sorted(self._forward.get(source, ())) if target in distance]
+            return {
+                "nodes": [{**self.node(n), "hops": d} for n, d in distance.items()],
+                "edges": edges,
+                "truncated": truncated
+            }
+
+    def edge_count(self) -> int:
+        with self._lock:
+            return sum(len(targets) for targets in self._forward.values())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"papers": len(self._nodes), "citations": self.edge_count(),
+                    "documents": sum(1 for node in self._nodes.values() if node.get("doc_id"))}
@@ -0,0 +1,68 @@
+"""
+ResearchPilot AI - Deferred Save
+Write-behind persistence for the JSON registries (upload manifest, document
+store, citation graph): changes mark the file dirty and a background thread
+rewrites it at most once per delay, so a burst of updates costs one write
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredSave:
+    """
+    Coalesces saves of one JSON file. mark_dirty() only sets a flag; a daemon
+    thread waits delay seconds for more changes, takes snapshot() (the owner
+    copies its state under its own lock) and writes it atomically, off the
+    caller's thread. flush() writes pending changes immediately (shutdown).
+    """
+
+    def __init__(self, path: Path, snapshot: Callable[[], Any], prefix: str, delay: float = 1.0):
+        self.path = Path(path)
+        self.snapshot = snapshot
+        self.prefix = prefix
+        self.delay = delay
+        self._dirty = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"save-{self.path.stem}", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        self._dirty.set()
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(self.delay)
+            self.flush()
+
+    def flush(self):
+        """Write the current state now if anything changed since the last write"""
+        with self._write_lock:
+            if not self._dirty.is_set():
+                return
+            self._dirty.clear()
+            try:
+                self._write(json.dumps(self.snapshot(), separators=(",", ":")))
+            except Exception as e:
+                logger.error(f"❌ Could not save {self.path}: {str(e)}")
+                self._dirty.set()  # retried after the next delay
+
+    def _write(self, text: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=self.prefix, suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
@@ -0,0 +1,122 @@
+"""
+ResearchPilot AI - Document Store
+Registry of uploaded documents keyed by doc_id (a SHA-256 prefix), so
+endpoints can reference the server's parsed copy instead of raw text
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from services.deferred_save import DeferredSave
+
+logger = logging.getLogger(__name__)
+
+DOC_ID_LENGTH = 16
+
+
+def make_doc_id(sha256: str) -> str:
+    return sha256[:DOC_ID_LENGTH]
+
+
+class DocumentStore:
+    """doc_id -> document metadata, persisted to a JSON file shortly after changes"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._documents: Dict[str, Dict] = {}
+        self._by_filename: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load()
+        self._saver = DeferredSave(self.path, self._snapshot, ".documents-")
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._documents = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Could not read document store {self.path}: {str(e)}")
+            return
+        for doc_id, doc in self._documents.items():
+            for filename in doc.get("filenames", []):
+                self._by_filename[filename] = doc_id
+        logger.info(f"📚 Document store: {len(self._documents)} documents")
+
+    def _save(self):
+        """Schedule a write of the registry; caller holds the lock"""
+        self._saver.mark_dirty()
+
+    def _snapshot(self) -> Dict[str, Dict]:
+        # Documents are updated in place: copy each one and its filename list
+        with self._lock:
+            return {doc_id: {**doc, "filenames": list(doc["filenames"])}
+                    for doc_id, doc in self._documents.items()}
+
+    def flush(self):
+        """Write pending changes now"""
+        self._saver.flush()
+
+    def register(self, sha256: str, filename: str, page_count: Optional[int] = None) -> Dict:
+        """Add (or refresh) the document for a file's content under this filename"""
+        doc_id = make_doc_id(sha256)
+        with self._lock:
+            # A filename re-uploaded with new content moves to the new document
+            previous = self._by_filename.get(filename)
+            if previous and previous != doc_id:
+                self._detach(previous, filename)
+            doc = self._documents.setdefault(doc_id, {
+                "doc_id": doc_id,
+                "sha256": sha256,
+                "filenames": [],
+                "created_at": datetime.now().isoformat(timespec="seconds")
+            })
+            if page_count is not None:
+                doc["page_count"] = page_count
+            if filename not in doc["filenames"]:
+                doc["filenames"].append(filename)
+            self._by_filename[filename] = doc_id
+            self._save()
+            return dict(doc)
+
+    def update(self, doc_id: str, **fields) -> Optional[Dict]:
+        """Set fields on a document (e.g. page_count, status)"""
+        with self._lock:
+            doc = self._documents.get(doc_id)
+            if not doc:
+                return None
+            doc.update(fields)
+            self._save()
+            return dict(doc)
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        with self._lock:
+            doc = self._documents.get(doc_id)
+            return dict(doc) if doc else None
+
+    def by_filename(self, filename: str) -> Optional[Dict]:
+        with self._lock:
+            doc_id = self._by_filename.get(filename)
+            return dict(self._documents[doc_id]) if doc_id else None
+
+    def remove_filename(self, filename: str):
+        """Forget a deleted upload; the document goes once no filename refers to it"""
+        with self._lock:
+            doc_id = self._by_filename.get(filename)
+            if doc_id:
+                self._detach(doc_id, filename)
+                self._save()
+
+    def _detach(self, doc_id: str, filename: str):
+        self._by_filename.pop(filename, None)
+        doc = self._documents.get(doc_id)
+        if not doc:
+            return
+        if filename in doc["filenames"]:
+            doc["filenames"].remove(filename)
+        if not doc["filenames"]:
+            del self._documents[doc_id]
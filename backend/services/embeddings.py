@@ -0,0 +1,311 @@
+"""
+ResearchPilot AI - Embeddings
+Text embedding backends and a service that batches embedding requests from
+all callers, caches vectors on disk by content hash and runs the model on a
+thread pool. The hashing embedder needs no model weights or network, so
+embeddings work on every host
+"""
+
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import importlib.util
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.paper_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 384
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+
+@lru_cache(maxsize=200000)
+def _feature(token: str, dim: int) -> Tuple[int, float]:
+    """Bucket and sign of a hashed feature"""
+    digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % dim, 1.0 if (digest >> 63) & 1 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Deterministic feature-hashing embedder: word unigrams and bigrams are
+    hashed into dim signed buckets with sublinear term frequency, then the
+    vector is L2-normalized, so dot product is cosine similarity.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            counts = Counter(terms)
+            counts.update(f"{a} {b}" for a, b in zip(terms, terms[1:]))
+            for term, count in counts.items():
+                bucket, sign = _feature(term, self.dim)
+                vectors[row, bucket] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """A sentence-transformers model loaded from local files only (hosts cannot download weights)"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, batch_size: int = 64):
+        # Never reach for the Hugging Face hub, even when the model is missing
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{Path(model_name).name}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+                                 convert_to_numpy=True, show_progress_bar=False).astype(np.float32)
+
+
+def load_embedder(model_name: Optional[str] = DEFAULT_MODEL):
+    """The configured sentence-transformers model if it can be loaded offline, otherwise the hashing embedder"""
+    if model_name and model_name.lower() != "hashing":
+        if importlib.util.find_spec("sentence_transformers") is None:
+            logger.warning("⚠️ sentence-transformers is not installed, using hashing embeddings")
+        else:
+            try:
+                embedder = SentenceTransformerEmbedder(model_name)
+                logger.info(f"🧮 Embeddings: {model_name} ({embedder.dim} dimensions)")
+                return embedder
+            except Exception as e:
+                logger.warning(f"⚠️ Embedding model '{model_name}' is not available locally ({str(e)}), "
+                               f"using hashing embeddings")
+    embedder = HashingEmbedder()
+    logger.info(f"🧮 Embeddings: {embedder.name} (offline fallback)")
+    return embedder
+
+
+def content_key(model: str, text: str) -> str:
+    return hashlib.blake2b(f"{model}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Vectors keyed by a hash of (model, text), in an append-only file of
+    float32 rows with a parallel file of keys, one per line. A row is
+    written before its key, so a crash can only lose the last entry. When
+    the files outgrow max_bytes the cache starts over.
+    """
+
+    def __init__(self, directory: Path, dim: int, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.max_bytes = max_bytes
+        self._row_bytes = dim * 4
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory / "vectors.f32"
+        self._keys_path = self.directory / "keys.txt"
+        self._load()
+        self._vectors = open(self._vectors_path, "r+b" if self._vectors_path.exists() else "w+b")
+        self._keys = open(self._keys_path, "a", encoding="ascii")
+
+    def _load(self):
+        if not self._keys_path.exists() or not self._vectors_path.exists():
+            return
+        rows = self._vectors_path.stat().st_size // self._row_bytes
+        with open(self._keys_path, "r", encoding="ascii", errors="replace") as f:
+            for row, line in enumerate(f):
+                key = line.strip()
+                if row >= rows or len(key) != 32:
+                    break
+                self._rows[key] = row
+        # Drop anything after the last complete entry
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(len(self._rows) * self._row_bytes)
+        with open(self._keys_path, "w", encoding="ascii") as f:
+            f.writelines(f"{key}\n" for key in self._rows)
+        logger.info(f"🧮 Embedding cache: {len(self._rows)} vectors")
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._rows.get(key)
+                if row is not None and key not in found:
+                    self._vectors.seek(row * self._row_bytes)
+                    found[key] = np.frombuffer(self._vectors.read(self._row_bytes), dtype=np.float32)
+        return found
+
+    def put_many(self, keys: Sequence[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            if (len(self._rows) + len(keys)) * self._row_bytes > self.max_bytes:
+                logger.info(f"🧮 Embedding cache full ({len(self._rows)} vectors), starting over")
+                self._rows.clear()
+                self._vectors.truncate(0)
+                self._keys.close()
+                self._keys = open(self._keys_path, "w", encoding="ascii")
+            fresh = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+            if not fresh:
+                return
+            self._vectors.seek(len(self._rows) * self._row_bytes)
+            self._vectors.write(b"".join(vector.tobytes() for _, vector in fresh))
+            self._vectors.flush()
+            self._keys.writelines(f"{key}\n" for key, _ in fresh)
+            self._keys.flush()
+            for key, _ in fresh:
+                self._rows[key] = len(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def close(self):
+        with self._lock:
+            self._vectors.close()
+            self._keys.close()
+
+
+class EmbeddingService:
+    """
+    Shared front end to an embedding backend. Cache misses from concurrent
+    callers are queued and embedded together in batches of up to batch_size
+    texts; a partial batch waits at most max_wait_ms for company. Batches
+    run on a thread pool so the event loop never blocks on the model.
+    """
+
+    def __init__(self, backend, cache_dir: Optional[Path] = None, batch_size: int = 64,
+                 max_wait_ms: float = 10, workers: int = 1, cache_max_bytes: int = 512 * 1024 * 1024):
+        self.backend = backend
+        self.name = backend.name
+        self.dim = backend.dim
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache = None
+        if cache_dir is not None:
+            safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", self.name)
+            self.cache = EmbeddingCache(Path(cache_dir) / safe_name, self.dim, cache_max_bytes)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="embed")
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []  # (key, text, future)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._stats = {"requests": 0, "texts": 0, "cache_hits": 0, "embedded": 0, "batches": 0,
+                       "model_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Vectors for texts (rows in input order), L2-normalized"""
+        texts = [text or "" for text in texts]
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        keys = [content_key(self.name, text) for text in texts]
+        found = await asyncio.to_thread(self.cache.get_many, keys) if self.cache is not None else {}
+        loop = asyncio.get_running_loop()
+        waiting = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in waiting:
+                continue
+            future = self._inflight.get(key)
+            if future is None or future.cancelled() or future.get_loop() is not loop:
+                future = loop.create_future()
+                self._inflight[key] = future
+                self._pending.append((key, text, future))
+            waiting[key] = future
+        self._count(requests=1, texts=len(texts), cache_hits=sum(1 for key in keys if key in found))
+        if self._pending:
+            self._schedule_flush(loop)
+        for key, future in waiting.items():
+            # Other callers share the future; cancelling this one must not cancel theirs
+            found[key] = await asyncio.shield(future)
+        return np.stack([found[key] for key in keys])
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop):
+        if len(self._pending) >= self.batch_size:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush, loop)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        self._flush_handle = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            task = loop.run_in_executor(self._pool, self._run_batch, [text for _, text, _ in batch],
+                                        [key for key, _, _ in batch])
+            task.add_done_callback(lambda done, batch=batch: self._resolve(batch, done))
+
+    def _run_batch(self, texts: List[str], keys: List[str]) -> np.ndarray:
+        started = time.perf_counter()
+        vectors = np.asarray(self.backend.embed(texts), dtype=np.float32)
+        self._count(embedded=len(texts), batches=1, model_seconds=time.perf_counter() - started)
+        if self.cache is not None:
+            self.cache.put_many(keys, vectors)
+        return vectors
+
+    def _resolve(self, batch: List[Tuple[str, str, asyncio.Future]], done: asyncio.Future):
+        error = asyncio.CancelledError() if done.cancelled() else done.exception()
+        for row, (key, _, future) in enumerate(batch):
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[row])
+
+    def embed_sync(self, texts: Sequence[str]) -> np.ndarray:
+        """Blocking embed for worker threads: uses the cache but not the batching queue"""
+        texts = [text or "" for text in texts]
+        keys = [content_key(self.name, text) for text in texts]
+        found = self.cache.get_many(keys) if self.cache is not None else {}
+        missing = list({key: text for key, text in zip(keys, texts) if key not in found}.items())
+        self._count(requests=1, texts=len(texts), cache_hits=sum(1 for key in keys if key in found))
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            vectors = self._run_batch([text for _, text in batch], [key for key, _ in batch])
+            found.update(zip([key for key, _ in batch], vectors))
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        seconds = stats.pop("model_seconds")
+        return {
+            "model": self.name,
+            "dimensions": self.dim,
+            **stats,
+            "cached_vectors": len(self.cache) if self.cache is not None else 0,
+            "avg_batch_size": round(stats["embedded"] / stats["batches"], 1) if stats["batches"] else 0,
+            "texts_per_second": round(stats["embedded"] / seconds, 1) if seconds else None,
+            "model_seconds": round(seconds, 3)
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,219 @@
+"""
+ResearchPilot AI - Extraction Cache
+Content-addressed store of extracted PDF text, named by the file's SHA-256,
+with pages compressed individually so any page range can be read on its own
+"""
+
+import os
+import json
+import zlib
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_LENGTH = 500
+
+
+def sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes):
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".cache-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class ExtractionCache:
+    """
+    Each document is a pair of files: <sha>.pages holds every page as its own
+    zlib block, and <sha>.json holds page count, preview and block offsets.
+    The metadata file is written last, so its presence marks a usable entry.
+
+    The directory is bounded by total bytes and entry count; the least
+    recently used documents are evicted first (a hit bumps the metadata
+    file's mtime, so order survives restarts).
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 256 * 1024 * 1024,
+                 max_entries: int = 5000, memory_entries: int = 256):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._sizes = OrderedDict()   # sha256 -> bytes on disk, least recently used first
+        self._total_bytes = 0
+        self._memory = OrderedDict()  # sha256 -> metadata
+        self._hashes = {}             # (path, size, mtime_ns) -> sha256
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _meta_path(self, sha256: str) -> Path:
+        return self.cache_dir / f"{sha256}.json"
+
+    def _pages_path(self, sha256: str) -> Path:
+        return self.cache_dir / f"{sha256}.pages"
+
+    def _load(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for meta_path in self.cache_dir.glob("*.json"):
+            sha256 = meta_path.stem
+            try:
+                stat = meta_path.stat()
+                size = stat.st_size + self._pages_path(sha256).stat().st_size
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, sha256, size))
+        for _, sha256, size in sorted(entries):
+            self._sizes[sha256] = size
+            self._total_bytes += size
+        logger.info(f"🗂️ Extraction cache: {len(self._sizes)} documents, {self._total_bytes / (1024 * 1024):.1f} MB")
+
+    def hash_file(self, path: Path) -> str:
+        """SHA-256 of a file, memoized on path/size/mtime so unchanged files are hashed once"""
+        stat = path.stat()
+        key = (str(path), stat.st_size, stat.st_mtime_ns)
+        sha256 = self._hashes.get(key)
+        if sha256 is None:
+            sha256 = sha256_file(path)
+            self._hashes[key] = sha256
+        return sha256
+
+    def remember_hash(self, path: Path, sha256: str):
+        """Record a hash computed while the file was being written"""
+        stat = path.stat()
+        self._hashes[(str(path), stat.st_size, stat.st_mtime_ns)] = sha256
+
+    def get(self, sha256: str) -> Optional[Dict]:
+        """Metadata for a cached document (page_count, pages_extracted, complete, preview)"""
+        with self._lock:
+            if sha256 not in self._sizes:
+                self._misses += 1
+                return None
+            self._sizes.move_to_end(sha256)
+            entry = self._memory.get(sha256)
+            if entry is not None:
+                self._memory.move_to_end(sha256)
+                self._hits += 1
+                return entry
+        meta_path = self._meta_path(sha256)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(meta_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Dropping unreadable extraction cache entry {sha256[:12]}: {str(e)}")
+            self.discard(sha256)
+            return None
+        with self._lock:
+            self._hits += 1
+            self._remember(sha256, entry)
+        return entry
+
+    def read_pages(self, sha256: str, start: int = 0, end: Optional[int] = None) -> List[str]:
+        """Text of pages [start, end) (0-based), decompressing only those pages"""
+        entry = self.get(sha256)
+        if entry is None:
+            return []
+        offsets = entry["offsets"]
+        end = min(entry["pages_extracted"] if end is None else end, entry["pages_extracted"])
+        if start >= end:
+            return []
+        with open(self._pages_path(sha256), "rb") as f:
+            f.seek(offsets[start])
+            data = f.read(offsets[end] - offsets[start])
+        base = offsets[start]
+        return [zlib.decompress(data[offsets[i] - base:offsets[i + 1] - base]).decode("utf-8")
+                for i in range(start, end)]
+
+    def put(self, sha256: str, pages: List[str], page_count: int) -> Dict:
+        """Store per-page text for a document and evict down to the size limits"""
+        blocks = [zlib.compress(page.encode("utf-8"), 6) for page in pages]
+        offsets = [0]
+        for block in blocks:
+            offsets.append(offsets[-1] + len(block))
+        text = "".join(page + "\n" for page in pages if page)
+        entry = {
+            "sha256": sha256,
+            "page_count": page_count,
+            "pages_extracted": len(pages),
+            "complete": len(pages) >= page_count,
+            "preview": text[:PREVIEW_LENGTH],
+            "text_length": len(text),
+            "offsets": offsets,
+            "extracted_at": datetime.now().isoformat(timespec="seconds")
+        }
+        meta = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+        _atomic_write(self._pages_path(sha256), b"".join(blocks))
+        _atomic_write(self._meta_path(sha256), meta)
+        size = offsets[-1] + len(meta)
+
+        evicted = []
+        with self._lock:
+            self._total_bytes += size - self._sizes.pop(sha256, 0)
+            self._sizes[sha256] = size
+            self._remember(sha256, entry)
+            while len(self._sizes) > 1 and (self._total_bytes > self.max_bytes
+                                            or len(self._sizes) > self.max_entries):
+                old_sha, old_size = self._sizes.popitem(last=False)
+                self._total_bytes -= old_size
+                self._memory.pop(old_sha, None)
+                evicted.append(old_sha)
+        for old_sha in evicted:
+            self._meta_path(old_sha).unlink(missing_ok=True)
+            self._pages_path(old_sha).unlink(missing_ok=True)
+        if evicted:
+            logger.info(f"🗂️ Extraction cache evicted {len(evicted)} documents")
+        return entry
+
+    def _remember(self, sha256: str, entry: Dict):
+        self._memory[sha256] = entry
+        self._memory.move_to_end(sha256)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def discard(self, sha256: str) -> int:
+        """Drop an entry; returns the bytes freed"""
+        with self._lock:
+            size = self._sizes.pop(sha256, 0)
+            self._total_bytes -= size
+            self._memory.pop(sha256, None)
+        self._meta_path(sha256).unlink(missing_ok=True)
+        self._pages_path(sha256).unlink(missing_ok=True)
+        return size
+
+    def usage(self) -> Dict[str, int]:
+        """Bytes on disk per cached key"""
+        with self._lock:
+            return dict(self._sizes)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "documents": len(self._sizes),
+                "bytes": self._total_bytes,
+                "hits": self._hits,
+                "misses": self._misses
+            }
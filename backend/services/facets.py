@@ -0,0 +1,134 @@
+"""
+ResearchPilot AI - Faceted Search
+Bitmap facet index over a result set (category, year, author) and a
+per-query cache so drill-down filtering never re-queries arXiv
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+FACET_FIELDS = ("category", "year", "author")
+
+
+def paper_facet_values(paper: Dict) -> Dict[str, List[str]]:
+    """Facet values of a paper; published papers carry a single 'category'"""
+    categories = list(paper.get("categories") or [])
+    if paper.get("category"):
+        categories.append(paper["category"])
+    year = str(paper.get("published_date") or "")[:4]
+    return {
+        "category": list(dict.fromkeys(categories)),
+        "year": [year] if year.isdigit() else [],
+        "author": list(dict.fromkeys(a.strip() for a in (paper.get("authors") or []) if isinstance(a, str) and a.strip()))
+    }
+
+
+class FacetIndex:
+    """
+    Each facet value maps to an int bitmap of result positions, so filtering
+    is a handful of AND/OR operations and counting is popcount.
+    """
+
+    def __init__(self, papers: List[Dict]):
+        self.papers = papers
+        self.all_mask = (1 << len(papers)) - 1
+        self.bitmaps = {field: {} for field in FACET_FIELDS}
+        # Case-insensitive lookup for author filters typed by users
+        self._author_keys = {}
+        for position, paper in enumerate(papers):
+            bit = 1 << position
+            for field, values in paper_facet_values(paper).items():
+                bitmaps = self.bitmaps[field]
+                for value in values:
+                    bitmaps[value] = bitmaps.get(value, 0) | bit
+        for author in self.bitmaps["author"]:
+            self._author_keys.setdefault(author.lower(), []).append(author)
+
+    def _field_mask(self, field: str, filters: Dict) -> int:
+        """Mask for one facet's filter (OR within the facet)"""
+        if field == "category" and filters.get("categories"):
+            mask = 0
+            for value in filters["categories"]:
+                mask |= self.bitmaps["category"].get(value, 0)
+            return mask
+        if field == "year" and (filters.get("year_from") or filters.get("year_to")):
+            year_from = filters.get("year_from") or 0
+            year_to = filters.get("year_to") or 9999
+            mask = 0
+            for year, bitmap in self.bitmaps["year"].items():
+                if year_from <= int(year) <= year_to:
+                    mask |= bitmap
+            return mask
+        if field == "author" and filters.get("authors"):
+            mask = 0
+            for name in filters["authors"]:
+                for author in self._author_keys.get(str(name).strip().lower(), []):
+                    mask |= self.bitmaps["author"][author]
+            return mask
+        return self.all_mask
+
+    def filter_mask(self, filters: Dict, exclude: Optional[str] = None) -> int:
+        """AND of all facet filters, optionally ignoring one facet"""
+        mask = self.all_mask
+        for field in FACET_FIELDS:
+            if field != exclude:
+                mask &= self._field_mask(field, filters)
+        return mask
+
+    def filter(self, filters: Dict) -> List[Dict]:
+        mask = self.filter_mask(filters)
+        return [paper for position, paper in enumerate(self.papers) if mask >> position & 1]
+
+    def counts(self, filters: Dict, top_n: int = 20) -> Dict[str, List[Dict]]:
+        """
+        Facet counts under the current filters. Each facet is counted with
+        its own filter removed so users can still pick sibling values.
+        """
+        facets = {}
+        for field in FACET_FIELDS:
+            mask = self.filter_mask(filters, exclude=field)
+            values = []
+            for value, bitmap in self.bitmaps[field].items():
+                count = (bitmap & mask).bit_count()
+                if count:
+                    values.append({"value": value, "count": count})
+            if field == "year":
+                values.sort(key=lambda v: v["value"], reverse=True)
+            else:
+                values.sort(key=lambda v: (-v["count"], v["value"]))
+            facets[field] = values[:top_n]
+        return facets
+
+
+class FacetCache:
+    """LRU + TTL cache of FacetIndex objects keyed by normalized query"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: int = 1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str, max_results: int) -> str:
+        return f"{' '.join(query.lower().split())}|{max_results}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if time.monotonic() - item["stored_at"] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item
+
+    def put(self, key: str, index: FacetIndex, source: str):
+        with self._lock:
+            self._entries[key] = {"index": index, "source": source, "stored_at": time.monotonic()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
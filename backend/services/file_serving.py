@@ -0,0 +1,152 @@
+"""
+ResearchPilot AI - File Serving
+Streams stored files with HTTP Range, ETag/Last-Modified and conditional
+GET support, using the ASGI zero-copy extension when the server offers it
+"""
+
+import os
+import re
+import asyncio
+import logging
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+ZERO_COPY_EXTENSION = "http.response.zerocopy"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Tuple[Optional[Tuple[int, int]], bool]:
+    """
+    (start, end inclusive) of a single byte range, and whether the range is
+    unsatisfiable. Malformed or multi-range headers are ignored (full body),
+    as RFC 9110 allows.
+    """
+    if not header:
+        return None, False
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None, False
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None, True
+        return (max(0, size - length), size - 1), False
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return None, True
+    return (start, end), False
+
+
+def _etag_matches(header: str, etag: str, weak: bool) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    if weak:
+        candidates = [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+    return etag in candidates
+
+
+def _not_modified_since(header: Optional[str], mtime: float) -> bool:
+    try:
+        return header is not None and int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class RangeFileResponse(Response):
+    """Body is bytes [start, start + length) of a file, sent zero-copy when the server supports it"""
+
+    def __init__(self, path: Path, start: int, length: int, status_code: int,
+                 headers: Dict[str, str], media_type: str, send_body: bool = True):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = Path(path)
+        self.start = start
+        self.length = length
+        self.send_body = send_body
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        with open(self.path, "rb") as f:
+            if ZERO_COPY_EXTENSION in scope.get("extensions", {}):
+                await send({"type": ZERO_COPY_EXTENSION, "file": f, "offset": self.start,
+                            "count": self.length, "more_body": False})
+                return
+            # Chunked fallback: memory stays at one chunk whatever the range size
+            remaining = self.length
+            await asyncio.to_thread(f.seek, self.start)
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
+
+
+def file_response(request: Request, path: Path, etag: str, filename: str,
+                  media_type: str = "application/pdf", download: bool = False) -> Response:
+    """
+    Serve a file honouring If-None-Match / If-Modified-Since (304),
+    If-Match / If-Unmodified-Since (412), Range (206 / 416) and If-Range.
+    etag is the quoted strong validator, e.g. a content hash.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    disposition = "attachment" if download else "inline"
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "accept-ranges": "bytes",
+        "cache-control": "private, max-age=0, must-revalidate",
+        "content-disposition": f"{disposition}; filename*=UTF-8''{quote(filename)}",
+    }
+    request_headers = request.headers
+
+    # Preconditions (RFC 9110 section 13.2.2 order)
+    if_match = request_headers.get("if-match")
+    if if_match is not None and not _etag_matches(if_match, etag, weak=False):
+        return Response(status_code=412, headers=headers)
+    if_unmodified_since = request_headers.get("if-unmodified-since")
+    if if_match is None and if_unmodified_since and not _not_modified_since(if_unmodified_since, stat.st_mtime):
+        return Response(status_code=412, headers=headers)
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag, weak=True):
+            return Response(status_code=304, headers=headers)
+    elif _not_modified_since(request_headers.get("if-modified-since"), stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    # If-Range: only honour Range when the client's copy is still current
+    byte_range, unsatisfiable = parse_range(request_headers.get("range"), size)
+    if_range = request_headers.get("if-range")
+    if if_range is not None and (byte_range or unsatisfiable):
+        current = if_range == etag if if_range.startswith('"') else _not_modified_since(if_range, stat.st_mtime)
+        if not current:
+            byte_range, unsatisfiable = None, False
+    if unsatisfiable:
+        return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+    send_body = request.method != "HEAD"
+    if byte_range is None:
+        return RangeFileResponse(path, 0, size, 200, headers, media_type, send_body)
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return RangeFileResponse(path, start, end - start + 1, 206, headers, media_type, send_body)
@@ -0,0 +1,202 @@
+"""
+ResearchPilot AI - Local Paper Index
+In-memory BM25 inverted index over papers seen by this server
+(saved papers, arXiv search results, published papers and uploads)
+"""
+
+import math
+import re
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from services.arxiv_fetch import base_arxiv_id, normalize_arxiv_id
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this
+to was were will with we our their these those which via using based toward towards
+""".split())
+
+# Papers from these sources stay indexed; everything else is evicted oldest-first
+PINNED_SOURCES = frozenset({"saved", "published", "upload"})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords or single characters"""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def paper_key(paper: Dict) -> str:
+    """Stable index key: arXiv ids lose their version suffix"""
+    raw_id = str(paper.get("id") or paper.get("paper_id") or "")
+    arxiv_id = normalize_arxiv_id(raw_id)
+    return base_arxiv_id(arxiv_id) if arxiv_id else raw_id
+
+
+class LocalPaperIndex:
+    """BM25 index over paper titles and abstracts with bounded size"""
+
+    # Standard BM25 parameters; titles are repeated to weight them higher
+    K1 = 1.5
+    B = 0.75
+    TITLE_WEIGHT = 2
+
+    def __init__(self, max_documents: int = 20000):
+        self.max_documents = max_documents
+        self._papers = OrderedDict()   # key -> paper dict (with "sources")
+        self._terms = {}               # key -> {term: tf}
+        self._postings = {}            # term -> {key: tf}
+        self._lengths = {}             # key -> document length
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self._term_listeners = []
+        self._change_listeners = []
+
+    def __len__(self):
+        return len(self._papers)
+
+    def add_term_listener(self, callback):
+        """
+        callback(added, removed) is called with vocabulary terms the index has
+        not seen before and terms no indexed paper uses any more
+        """
+        self._term_listeners.append(callback)
+
+    def add_change_listener(self, callback):
+        """callback(added, removed) is called with papers indexed or refreshed and keys dropped"""
+        self._change_listeners.append(callback)
+
+    def _notify_terms(self, added: List[str], removed: List[str]):
+        if added or removed:
+            for callback in self._term_listeners:
+                callback(added, removed)
+
+    def _notify(self, added: List[Dict], removed: List[str]):
+        if added or removed:
+            for callback in self._change_listeners:
+                callback(added, removed)
+
+    def document_frequency(self, term: str) -> int:
+        postings = self._postings.get(term)
+        return len(postings) if postings else 0
+
+    def add(self, paper: Dict, source: str):
+        """Index or refresh a paper, remembering every source it came from"""
+        key = paper_key(paper)
+        if not key:
+            return
+        with self._lock:
+            existing = self._papers.get(key)
+            sources = set(existing.get("sources", [])) if existing else set()
+            sources.add(source)
+            stored = dict(existing or {})
+            stored.update({k: v for k, v in paper.items() if v not in (None, "", [])})
+            stored["id"] = stored.get("id") or key
+            stored["sources"] = sorted(sources)
+
+            dropped = self._unindex(key) if existing else []
+            terms = {}
+            text = " ".join([stored.get("title", "")] * self.TITLE_WEIGHT + [stored.get("abstract", "")])
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0) + 1
+            self._papers[key] = stored
+            self._papers.move_to_end(key)
+            self._terms[key] = terms
+            self._lengths[key] = sum(terms.values())
+            self._total_length += self._lengths[key]
+            new_terms = [term for term in terms if term not in self._postings]
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[key] = tf
+            evicted, evicted_terms = self._evict()
+            # A refresh can drop and re-add the same term; report only net changes
+            new_terms = [term for term in new_terms if term in self._postings]
+            dropped = [term for term in set(dropped + evicted_terms) if term not in self._postings]
+
+        self._notify_terms(new_terms, dropped)
+        self._notify([dict(stored)], evicted)
+
+    def add_many(self, papers: List[Dict], source: str):
+        for paper in papers:
+            self.add(paper, source)
+
+    def remove(self, paper_id: str, source: Optional[str] = None):
+        """Drop a paper, or just one of its sources if others remain"""
+        key = paper_key({"id": paper_id})
+        with self._lock:
+            paper = self._papers.get(key)
+            if not paper:
+                return
+            remaining = [s for s in paper["sources"] if source and s != source]
+            if remaining:
+                paper["sources"] = remaining
+                return
+            dropped = self._unindex(key)
+            del self._papers[key]
+        self._notify_terms([], dropped)
+        self._notify([], [key])
+
+    def get(self, paper_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._papers.get(paper_key({"id": paper_id}))
+
+    def papers(self, sources: Optional[set] = None) -> List[Dict]:
+        """Snapshot of indexed papers, optionally limited to some sources"""
+        with self._lock:
+            return [p for p in self._papers.values() if not sources or sources.intersection(p["sources"])]
+
+    def search(self, query: str, limit: int = 20, sources: Optional[set] = None) -> List[Dict]:
+        """Rank indexed papers against the query with BM25"""
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+        with self._lock:
+            n_docs = len(self._papers)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    norm = tf + self.K1 * (1 - self.B + self.B * self._lengths[key] / avg_length)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.K1 + 1) / norm
+            if sources:
+                scores = {k: v for k, v in scores.items() if sources.intersection(self._papers[k]["sources"])}
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [dict(self._papers[key], score=round(score, 4)) for key, score in top]
+
+    def _unindex(self, key: str) -> List[str]:
+        """Remove a paper's postings; returns the terms no other paper uses"""
+        dropped = []
+        for term in self._terms.pop(key, {}):
+            postings = self._postings.get(term)
+            if postings:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+                    dropped.append(term)
+        self._total_length -= self._lengths.pop(key, 0)
+        return dropped
+
+    def _evict(self) -> Tuple[List[str], List[str]]:
+        """Drop the oldest unpinned papers beyond max_documents; returns their keys and dropped terms"""
+        evicted, dropped = [], []
+        if len(self._papers) <= self.max_documents:
+            return evicted, dropped
+        for key in list(self._papers.keys()):
+            if len(self._papers) <= self.max_documents:
+                break
+            if not PINNED_SOURCES.intersection(self._papers[key]["sources"]):
+                dropped.extend(self._unindex(key))
+                del self._papers[key]
+                evicted.append(key)
+        return evicted, dropped
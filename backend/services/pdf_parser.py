@@ -0,0 +1,309 @@
+"""
+ResearchPilot AI - PDF Text Extraction
+Pluggable extraction backends (pdfplumber, pypdfium2, pypdf, PyMuPDF) and a
+process pool that splits a document's pages across cores, off the event loop
+"""
+
+import os
+import sys
+import math
+import asyncio
+import logging
+import threading
+import importlib.util
+import multiprocessing
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Below this many pages per worker, process start-up and re-opening the PDF cost more than they save
+MIN_PAGES_PER_TASK = 4
+DEFAULT_BACKEND = "pdfplumber"
+
+
+class PdfBackend(ABC):
+    """A text extraction library behind a common open/count/page-text interface"""
+
+    name = ""
+    module = ""
+
+    def available(self) -> bool:
+        return importlib.util.find_spec(self.module) is not None
+
+    @abstractmethod
+    def open(self, path: str):
+        """Open a document"""
+
+    def close(self, doc):
+        doc.close()
+
+    @abstractmethod
+    def page_count(self, doc) -> int:
+        """Number of pages in an open document"""
+
+    @abstractmethod
+    def page_text(self, doc, index: int) -> str:
+        """Plain text of one page"""
+
+
+class PdfplumberBackend(PdfBackend):
+    """Layout-aware and the most accurate, but the slowest"""
+
+    name = module = "pdfplumber"
+
+    def open(self, path: str):
+        import pdfplumber
+        return pdfplumber.open(path)
+
+    def page_count(self, doc) -> int:
+        return len(doc.pages)
+
+    def page_text(self, doc, index: int) -> str:
+        return doc.pages[index].extract_text() or ""
+
+
+class PypdfiumBackend(PdfBackend):
+    """PDFium bindings; installed alongside pdfplumber"""
+
+    name = module = "pypdfium2"
+
+    def open(self, path: str):
+        import pypdfium2
+        return pypdfium2.PdfDocument(path)
+
+    def page_count(self, doc) -> int:
+        return len(doc)
+
+    def page_text(self, doc, index: int) -> str:
+        page = doc[index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            textpage.close()
+            page.close()
+
+
+class PypdfBackend(PdfBackend):
+    """Pure Python, no layout analysis"""
+
+    name = module = "pypdf"
+
+    def open(self, path: str):
+        from pypdf import PdfReader
+        return PdfReader(path)
+
+    def close(self, doc):
+        if hasattr(doc, "close"):
+            doc.close()
+
+    def page_count(self, doc) -> int:
+        return len(doc.pages)
+
+    def page_text(self, doc, index: int) -> str:
+        return doc.pages[index].extract_text() or ""
+
+
+class PymupdfBackend(PdfBackend):
+    """MuPDF bindings, usually the fastest"""
+
+    name = module = "pymupdf"
+
+    def available(self) -> bool:
+        # Releases before 1.24 only ship the legacy "fitz" module name
+        return super().available() or importlib.util.find_spec("fitz") is not None
+
+    def open(self, path: str):
+        try:
+            import pymupdf
+        except ImportError:
+            import fitz as pymupdf
+        return pymupdf.open(path)
+
+    def page_count(self, doc) -> int:
+        return doc.page_count
+
+    def page_text(self, doc, index: int) -> str:
+        return doc[index].get_text()
+
+
+BACKENDS: Dict[str, PdfBackend] = {
+    backend.name: backend
+    for backend in (PdfplumberBackend(), PypdfiumBackend(), PypdfBackend(), PymupdfBackend())
+}
+
+
+def available_backends() -> List[str]:
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def resolve_backend(name: Optional[str]) -> str:
+    """Configured backend if installed, otherwise pdfplumber"""
+    name = (name or DEFAULT_BACKEND).lower()
+    backend = BACKENDS.get(name)
+    if backend is None or not backend.available():
+        logger.warning(f"⚠️ PDF backend '{name}' is not available, using {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return name
+
+
+def count_pages(path: Path, backend: str = DEFAULT_BACKEND) -> int:
+    """Number of pages in a PDF"""
+    extractor = BACKENDS[backend]
+    doc = extractor.open(str(path))
+    try:
+        return extractor.page_count(doc)
+    finally:
+        extractor.close(doc)
+
+
+def extract_page_range(path: str, start: int, end: int,
+                       on_page: Optional[Callable[[int], None]] = None,
+                       backend: str = DEFAULT_BACKEND) -> List[str]:
+    """Extract text for pages [start, end); runs inside a pool worker or a thread"""
+    extractor = BACKENDS[backend]
+    texts = []
+    doc = extractor.open(path)
+    try:
+        for i in range(start, min(end, extractor.page_count(doc))):
+            try:
+                texts.append(extractor.page_text(doc, i))
+            except Exception as page_error:
+                logger.warning(f"Error extracting page {i+1}: {str(page_error)}")
+                texts.append("")
+            if on_page:
+                on_page(len(texts))
+    finally:
+        extractor.close(doc)
+    return texts
+
+
+def split_pages(page_count: int, workers: int) -> List[tuple]:
+    """Contiguous page ranges, about two per worker so slow pages even out"""
+    if page_count <= 0:
+        return []
+    tasks = max(1, min(workers * 2, page_count // MIN_PAGES_PER_TASK))
+    size = math.ceil(page_count / tasks)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def pool_context():
+    """
+    Workers are started by a fork server (a fresh interpreter where
+    forkserver is unsupported) rather than forked from the app, whose
+    threads may hold locks such as the logging lock at fork time. The
+    server preloads only this module, so workers stay light.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+@contextmanager
+def main_script_hidden():
+    """
+    spawn and forkserver workers re-run the parent's main script (as
+    __mp_main__) when the app was started with "python main_enhanced.py",
+    which would build the whole app again in every worker. Workers only
+    need this module, so the script is hidden while they are started.
+    """
+    main = sys.modules.get("__main__")
+    path = getattr(main, "__file__", None)
+    if path is None or getattr(getattr(main, "__spec__", None), "name", None):
+        yield
+        return
+    del main.__file__
+    try:
+        yield
+    finally:
+        main.__file__ = path
+
+
+class PdfExtractor:
+    """Page-parallel PDF text extraction on a lazily created process pool"""
+
+    def __init__(self, workers: Optional[int] = None, backend: Optional[str] = None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.backend = resolve_backend(backend)
+        logger.info(f"📄 PDF extraction: {self.backend} backend, {self.workers} workers")
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context())
+            return self._pool
+
+    def _reset_pool(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def shutdown(self):
+        self._reset_pool()
+
+    async def count_pages(self, path: Path) -> int:
+        return await asyncio.to_thread(count_pages, path, self.backend)
+
+    async def _extract_in_thread(self, path: Path, start: int, end: int,
+                                 progress: Optional[Callable[[int, int], None]]) -> List[str]:
+        on_page = None
+        if progress:
+            loop = asyncio.get_running_loop()
+            on_page = lambda done: loop.call_soon_threadsafe(progress, done, end - start)
+        return await asyncio.to_thread(extract_page_range, str(path), start, end, on_page, self.backend)
+
+    async def extract_pages(self, path: Path, max_pages: Optional[int] = None, start_page: int = 0,
+                            progress: Optional[Callable[[int, int], None]] = None) -> tuple:
+        """
+        Extract per-page text for pages [start_page, max_pages), in page order.
+        progress(pages_done, pages_wanted) is called on the event loop as pages finish.
+        Returns (page_texts, total_page_count).
+        """
+        page_count = await self.count_pages(path)
+        wanted = min(page_count, max_pages) if max_pages else page_count
+        if start_page >= wanted:
+            return [], page_count
+        total = wanted - start_page
+        ranges = [(start_page + lo, start_page + hi) for lo, hi in split_pages(total, self.workers)]
+
+        if self.workers == 1 or len(ranges) <= 1:
+            texts = await self._extract_in_thread(path, start_page, wanted, progress)
+            return texts, page_count
+
+        try:
+            pool = self._get_pool()
+            # Workers start on demand inside submit()
+            with main_script_hidden():
+                futures = [asyncio.wrap_future(pool.submit(extract_page_range, str(path), start, end, None,
+                                                           self.backend))
+                           for start, end in ranges]
+            if progress:
+                done = [0]
+
+                def chunk_done(future, size):
+                    if not future.cancelled() and future.exception() is None:
+                        done[0] += size
+                        progress(done[0], total)
+
+                for future, (start, end) in zip(futures, ranges):
+                    future.add_done_callback(lambda f, size=end - start: chunk_done(f, size))
+            chunks = await asyncio.gather(*futures)
+        except BrokenProcessPool:
+            logger.error("❌ PDF extraction pool crashed, retrying in-process")
+            self._reset_pool()
+            texts = await self._extract_in_thread(path, start_page, wanted, progress)
+            return texts, page_count
+
+        texts = [text for chunk in chunks for text in chunk]
+        logger.info(f"📄 Extracted {len(texts)} pages in {len(ranges)} parallel tasks ({self.workers} workers)")
+        return texts, page_count
@@ -0,0 +1,73 @@
+"""
+ResearchPilot AI - Vector Quantization
+Scalar quantization of embeddings to float16 or int8 codes, so vector
+indexes scan 2-4x fewer bytes and re-rank the best candidates at full precision
+"""
+
+from typing import Optional
+
+import numpy as np
+
+QUANTIZATIONS = ("float32", "float16", "int8")
+CODE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+# Codes are decoded this many rows at a time for scoring, so a query's working
+# memory stays at one block however long the scanned lists are
+SCORE_BLOCK = 256
+
+
+class ScalarQuantizer:
+    """
+    float16 halves each component; int8 stores round(x / scale) per
+    dimension, with scale = max |x| / 127 over the training vectors (values
+    beyond it are clipped). For scoring, codes are widened to float32
+    SCORE_BLOCK rows at a time into a reused buffer, and int8 scales are
+    folded into the query, so no full-size decoded copy is made.
+    """
+
+    def __init__(self, kind: str = "float32", scales: Optional[np.ndarray] = None):
+        if kind not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{kind}', expected one of {', '.join(QUANTIZATIONS)}")
+        self.kind = kind
+        self.dtype = CODE_DTYPES[kind]
+        self.scales = scales
+
+    @classmethod
+    def fit(cls, kind: str, sample: np.ndarray) -> "ScalarQuantizer":
+        scales = None
+        if kind == "int8":
+            peak = np.abs(np.asarray(sample, dtype=np.float32)).max(axis=0) if len(sample) else np.ones(sample.shape[1])
+            scales = np.where(peak > 0, peak / 127, 1.0).astype(np.float32)
+        return cls(kind, scales)
+
+    @property
+    def exact(self) -> bool:
+        return self.kind == "float32"
+
+    def bytes_per_vector(self, dim: int) -> int:
+        return dim * np.dtype(self.dtype).itemsize
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.kind == "int8":
+            return np.clip(np.rint(vectors / self.scales), -127, 127).astype(np.int8)
+        return vectors.astype(self.dtype)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        codes = np.asarray(codes, dtype=np.float32)
+        return codes * self.scales if self.kind == "int8" else codes
+
+    def score(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Approximate inner products of the encoded vectors with a float32 query"""
+        query = np.asarray(query, dtype=np.float32)
+        if self.exact:
+            return np.asarray(codes) @ query
+        if self.kind == "int8":
+            query = query * self.scales
+        scores = np.empty(len(codes), dtype=np.float32)
+        block = np.empty((min(SCORE_BLOCK, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK):
+            chunk = codes[start:start + SCORE_BLOCK]
+            decoded = block[:len(chunk)]
+            np.copyto(decoded, chunk, casting="unsafe")
+            np.dot(decoded, query, out=scores[start:start + len(chunk)])
+        return scores
@@ -0,0 +1,96 @@
+"""
+ResearchPilot AI - Recommendations
+Similar papers as nearest neighbours in the paper vector index, re-ranked
+with maximal marginal relevance (MMR) so the list covers different
+directions instead of near-duplicates of each other
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def mmr(relevance: np.ndarray, vectors: np.ndarray, k: int, diversity: float = 0.3) -> List[int]:
+    """
+    Indices of k candidates picked greedily by
+    (1 - diversity) * relevance - diversity * (max similarity to those already picked).
+    Vectors are unit length, so similarity is the inner product.
+    """
+    k = min(k, len(relevance))
+    if k <= 0:
+        return []
+    similarity = vectors @ vectors.T
+    chosen = [int(np.argmax(relevance))]
+    closest = similarity[chosen[0]].copy()
+    while len(chosen) < k:
+        scores = (1 - diversity) * relevance - diversity * closest
+        scores[chosen] = -np.inf
+        best = int(np.argmax(scores))
+        chosen.append(best)
+        closest = np.maximum(closest, similarity[best])
+    return chosen
+
+
+class Recommender:
+    """Nearest neighbours of a vector among indexed papers, diversified with MMR"""
+
+    def __init__(self, index, candidates: int = 50, diversity: float = 0.3):
+        self.index = index
+        self.candidates = candidates
+        self.diversity = diversity
+
+    def recommend(self, vector: np.ndarray, limit: int = 5, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """(paper key, similarity) pairs in MMR order"""
+        hits = self.index.search(vector, k=max(limit, self.candidates), exclude=exclude)
+        if not hits:
+            return []
+        vectors = [self.index.vector(key) for key, _ in hits]
+        # Ids removed between search() and vector() drop out
+        hits = [hit for hit, v in zip(hits, vectors) if v is not None]
+        if not hits:
+            return []
+        vectors = np.stack([v for v in vectors if v is not None])
+        relevance = np.array([score for _, score in hits], dtype=np.float32)
+        return [hits[i] for i in mmr(relevance, vectors, limit, self.diversity)]
+
+
+class RecommendationCache:
+    """LRU + TTL cache of recommendation lists keyed by source paper and limit"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(source: str, limit: int) -> str:
+        return f"{source}|{limit}"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if time.monotonic() - item["stored_at"] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item["recommendations"]
+
+    def put(self, key: str, recommendations: List[Dict], age_seconds: float = 0.0):
+        """Cache a list; age_seconds is how old it already is (e.g. loaded from MySQL)"""
+        with self._lock:
+            self._entries[key] = {"recommendations": recommendations, "stored_at": time.monotonic() - age_seconds}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_source(self, source: str):
+        """Forget every cached list for a source paper"""
+        with self._lock:
+            for key in [key for key in self._entries if key.rsplit("|", 1)[0] == source]:
+                del self._entries[key]
@@ -0,0 +1,116 @@
+"""
+ResearchPilot AI - Reference Parsing
+Splits a paper's reference section into entries and pulls out title,
+authors, year, arXiv id and DOI with lightweight heuristics
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from services.arxiv_fetch import base_arxiv_id, normalize_arxiv_id
+from services.paper_index import tokenize
+
+# "[12] ...", "12. ...", "12 ..." at the start of a line
+_NUMBERED_RE = re.compile(r"^\s*(?:\[(\d{1,3})\]|(\d{1,3})\.)\s+")
+_ARXIV_RE = re.compile(r"(?:arxiv[:\s]*|arxiv\.org/(?:abs|pdf)/)([a-z\-]+(?:\.[a-z]{2})?/\d{7}|\d{4}\.\d{4,5})(v\d+)?",
+                       re.IGNORECASE)
+_DOI_RE = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>]+)", re.IGNORECASE)
+_YEAR_RE = re.compile(r"\(?\b((?:19|20)\d{2})[a-z]?\b\)?")
+_QUOTED_TITLE_RE = re.compile(r"[\"“”]([^\"“”]{8,300}?)[,.]?[\"“”]")
+# Sentence break that is not an author initial ("J. Smith") or a common abbreviation
+_SENTENCE_RE = re.compile(r"(?<!\b[A-Z])(?<!\bvol)(?<!\bno)(?<!\bpp)(?<!\bed)(?<!\beds)(?<!\bIn)\.\s+")
+_AUTHOR_SPLIT_RE = re.compile(r",\s*and\s+|\s+and\s+|;\s*|\s*&\s*|,\s+(?=[A-Z][^,]*?(?:,|$))")
+# "Surname, J." / "Surname, J.-P. K." (APA and ACM inverted names)
+_INVERTED_NAME_RE = re.compile(r"([A-Z][\w'\-]+(?:\s[A-Z][\w'\-]+)?),\s*((?:[A-Z]\.\s?-?)+)")
+# Lines that start a new unnumbered entry: "Surname, A." or "Surname A, ..." after a finished entry
+_AUTHOR_START_RE = re.compile(r"^[A-Z][A-Za-z'`\-]+,?\s+(?:[A-Z]\.|[A-Z][a-z]+,?\s+[A-Z]\.)")
+
+MAX_REFERENCES = 500
+
+
+def split_entries(text: str) -> List[str]:
+    """Individual reference strings from a reference section, line wraps joined"""
+    lines = [line.strip() for line in (text or "").split("\n")]
+    lines = [line for line in lines if line]
+    if lines and lines[0].lower().rstrip(":").split()[-1:] in (["references"], ["bibliography"], ["cited"]):
+        lines = lines[1:]
+    numbered = sum(1 for line in lines if _NUMBERED_RE.match(line))
+
+    entries: List[str] = []
+    for line in lines:
+        if numbered >= 2:
+            starts = bool(_NUMBERED_RE.match(line))
+        else:
+            starts = not entries or (entries[-1].endswith(".") and bool(_AUTHOR_START_RE.match(line)))
+        if starts or not entries:
+            entries.append(_NUMBERED_RE.sub("", line, count=1))
+        elif entries[-1].endswith("-") and line[:1].islower():
+            entries[-1] = entries[-1][:-1] + line
+        else:
+            entries[-1] += " " + line
+    return [entry for entry in entries if len(entry) >= 15][:MAX_REFERENCES]
+
+
+def _sentences(entry: str) -> List[str]:
+    return [part.strip(" .,") for part in _SENTENCE_RE.split(entry) if part.strip(" .,")]
+
+
+def _authors(segment: str) -> List[str]:
+    segment = re.sub(r"\bet\s+al\b\.?", "", segment)
+    segment = re.sub(r"[\s,.(]*(?:19|20)\d{2}[a-z]?\)?\s*$", "", segment)
+    if re.search(r"\b[A-Z]$", segment):
+        segment += "."  # initial whose period went with the year
+    if _INVERTED_NAME_RE.match(segment):
+        return [f"{initials.strip()} {surname}" for surname, initials in _INVERTED_NAME_RE.findall(segment)][:50]
+    names = [name.strip(" .,") for name in _AUTHOR_SPLIT_RE.split(segment)]
+    return [name for name in names if name and len(name) <= 60 and not name.isdigit()][:50]
+
+
+def parse_reference(entry: str) -> Dict:
+    """Structured fields of one reference string (missing fields are None)"""
+    arxiv_match = _ARXIV_RE.search(entry)
+    arxiv_id = normalize_arxiv_id(arxiv_match.group(1)) if arxiv_match else None
+    doi_match = _DOI_RE.search(entry)
+    doi = doi_match.group(1).rstrip(".,;)").lower() if doi_match else None
+    year_match = _YEAR_RE.search(entry)
+    year = int(year_match.group(1)) if year_match else None
+
+    title = None
+    authors: List[str] = []
+    quoted = _QUOTED_TITLE_RE.search(entry)
+    if quoted:
+        title = quoted.group(1).strip()
+        authors = _authors(entry[:quoted.start()])
+    else:
+        sentences = _sentences(entry)
+        # Drop a year-only sentence ("2019") that ACM style puts after the authors
+        sentences = [s for s in sentences if not re.fullmatch(r"\(?(?:19|20)\d{2}[a-z]?\)?", s)]
+        if sentences:
+            head = sentences[0]
+            # APA: "Smith, J., & Doe, A. (2020). Title."
+            apa = re.search(r"\((?:19|20)\d{2}[a-z]?\)$", head)
+            authors = _authors(head[:apa.start()] if apa else head)
+            if len(sentences) > 1:
+                title = sentences[1]
+            elif not authors or len(head.split()) > 12:
+                title, authors = head, []
+    if title:
+        title = re.sub(r"\s+", " ", title).strip(" .,")
+    return {
+        "raw": entry,
+        "title": title or None,
+        "authors": authors,
+        "year": year,
+        "arxiv_id": base_arxiv_id(arxiv_id) if arxiv_id else None,
+        "doi": doi
+    }
+
+
+def parse_references(text: str) -> List[Dict]:
+    return [parse_reference(entry) for entry in split_entries(text)]
+
+
+def title_key(title: Optional[str]) -> Optional[str]:
+    """Match key for titles: content words, lowercased; None if too short to be distinctive"""
+    terms = tokenize(title or "")
+    return " ".join(terms) if len(terms) >= 3 else None
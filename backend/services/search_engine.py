@@ -0,0 +1,169 @@
+"""
+ResearchPilot AI - Federated Search Engine
+Fans a query out to several sources concurrently, each under its own deadline,
+then deduplicates and merges the results with reciprocal-rank fusion
+"""
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from services.arxiv_fetch import base_arxiv_id, normalize_arxiv_id
+
+logger = logging.getLogger(__name__)
+
+# Standard RRF damping constant (Cormack et al.)
+RRF_K = 60
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title: str) -> str:
+    return _NON_ALNUM_RE.sub(" ", (title or "").lower()).strip()
+
+
+def dedup_keys(paper: Dict) -> List[str]:
+    """Identity keys for a paper: DOI, arXiv id and normalized title"""
+    keys = []
+    doi = (paper.get("doi") or "").strip().lower()
+    if doi:
+        keys.append(f"doi:{doi}")
+    raw_id = str(paper.get("id") or paper.get("paper_id") or "")
+    arxiv_id = normalize_arxiv_id(raw_id)
+    if arxiv_id:
+        keys.append(f"arxiv:{base_arxiv_id(arxiv_id)}")
+    elif raw_id:
+        keys.append(f"id:{raw_id}")
+    title = normalize_title(paper.get("title"))
+    if len(title) > 10:
+        keys.append(f"title:{title}")
+    return keys
+
+
+def reciprocal_rank_fusion(ranked_lists: Dict[str, List[Dict]], weights: Optional[Dict[str, float]] = None,
+                           k: int = RRF_K) -> List[Dict]:
+    """
+    Merge per-source rankings. Papers that share any identity key are treated
+    as one result; its score is the sum of weight / (k + rank) over sources.
+    """
+    weights = weights or {}
+    groups = []      # merged paper dicts
+    key_to_group = {}
+
+    for source, papers in ranked_lists.items():
+        weight = weights.get(source, 1.0)
+        for rank, paper in enumerate(papers, 1):
+            keys = dedup_keys(paper)
+            group_idx = next((key_to_group[key] for key in keys if key in key_to_group), None)
+            if group_idx is None:
+                group_idx = len(groups)
+                merged = dict(paper)
+                merged["sources"] = []
+                merged["rrf_score"] = 0.0
+                groups.append(merged)
+            else:
+                merged = groups[group_idx]
+                # Fill gaps (e.g. DOI, categories) from the other source
+                for field, value in paper.items():
+                    if field not in ("sources", "score") and not merged.get(field) and value:
+                        merged[field] = value
+            for key in keys:
+                key_to_group.setdefault(key, group_idx)
+            if source not in merged["sources"]:
+                merged["sources"].append(source)
+                merged["rrf_score"] += weight / (k + rank)
+
+    for merged in groups:
+        merged["rrf_score"] = round(merged["rrf_score"], 6)
+    groups.sort(key=lambda p: p["rrf_score"], reverse=True)
+    return groups
+
+
+class FederatedSearch:
+    """
+    Concurrent multi-source search with per-source deadlines. Each source
+    runs on its own thread pool, so calls to a slow source that outlive
+    their deadline never hold up the fast ones.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, fetch: Callable[[str, int], List[Dict]],
+                 deadline: float, weight: float = 1.0, max_workers: Optional[int] = None):
+        """
+        Register a source. fetch(query, limit) must return a ranked list of
+        paper dicts; deadline is in seconds. A source that misses its deadline
+        keeps running in the background, so it can still warm its own caches.
+        """
+        executor = ThreadPoolExecutor(max_workers=max_workers or self.max_workers,
+                                      thread_name_prefix=f"search-{name}")
+        with self._lock:
+            previous = self._sources.get(name)
+            self._sources[name] = {"fetch": fetch, "deadline": deadline, "weight": weight, "executor": executor}
+        if previous:
+            previous["executor"].shutdown(wait=False)
+
+    @property
+    def source_names(self) -> List[str]:
+        return list(self._sources)
+
+    def search(self, query: str, limit: int = 20, sources: Optional[List[str]] = None,
+               deadline_scale: float = 1.0) -> Dict:
+        """Query the selected sources and fuse whatever returns in time"""
+        started = time.perf_counter()
+        selected = {name: cfg for name, cfg in self._sources.items() if not sources or name in sources}
+
+        futures = {}
+        for name, cfg in selected.items():
+            futures[name] = cfg["executor"].submit(self._timed_fetch, cfg["fetch"], query, limit)
+
+        timings = {}
+        ranked_lists = {}
+        # Wait for sources in deadline order so one slow source never blocks a faster one
+        for name in sorted(selected, key=lambda n: selected[n]["deadline"]):
+            cfg = selected[name]
+            future = futures[name]
+            remaining = started + cfg["deadline"] * deadline_scale - time.perf_counter()
+            done, _ = wait([future], timeout=max(0.0, remaining))
+            if not done:
+                timings[name] = {
+                    "status": "timeout",
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "deadline_ms": round(cfg["deadline"] * deadline_scale * 1000),
+                    "count": 0
+                }
+                logger.warning(f"⏱️ Search source '{name}' missed its deadline, dropping it")
+                continue
+            try:
+                papers, elapsed = future.result()
+                ranked_lists[name] = papers[:limit]
+                timings[name] = {"status": "ok", "elapsed_ms": round(elapsed * 1000, 1), "count": len(papers)}
+            except Exception as e:
+                logger.error(f"❌ Search source '{name}' failed: {str(e)}")
+                timings[name] = {
+                    "status": "error",
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "count": 0,
+                    "error": str(e)
+                }
+
+        weights = {name: cfg["weight"] for name, cfg in selected.items()}
+        fused = reciprocal_rank_fusion(ranked_lists, weights)[:limit]
+        return {
+            "papers": fused,
+            "timings": timings,
+            "dropped": [name for name, t in timings.items() if t["status"] != "ok"],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    @staticmethod
+    def _timed_fetch(fetch, query: str, limit: int):
+        started = time.perf_counter()
+        papers = fetch(query, limit) or []
+        return papers, time.perf_counter() - started
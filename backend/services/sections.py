@@ -0,0 +1,132 @@
+"""
+ResearchPilot AI - Section Segmentation
+Heading detection that splits extracted paper text into abstract,
+introduction, methods, results, conclusion, references and so on
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Canonical section name -> heading texts that introduce it (lowercase, no numbering)
+SECTION_ALIASES = {
+    "abstract": ["abstract"],
+    "introduction": ["introduction", "intro"],
+    "background": ["background", "related work", "related works", "prior work", "literature review",
+                   "preliminaries", "background and related work"],
+    "methods": ["method", "methods", "methodology", "approach", "our approach", "proposed method",
+                "proposed approach", "materials and methods", "model", "system design", "framework"],
+    "results": ["results", "experiments", "experiment", "experimental results", "experimental setup",
+                "evaluation", "experiments and results", "results and discussion", "empirical evaluation"],
+    "discussion": ["discussion", "analysis", "limitations"],
+    "conclusion": ["conclusion", "conclusions", "concluding remarks", "conclusion and future work",
+                   "conclusions and future work", "summary and conclusion"],
+    "acknowledgments": ["acknowledgments", "acknowledgements", "acknowledgment", "acknowledgement"],
+    "references": ["references", "bibliography", "works cited"],
+    "appendix": ["appendix", "appendices", "supplementary material"],
+}
+_HEADING_NAMES = {alias: name for name, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+# "3 Methods", "3. Methods", "III. METHODS", "Methods:" - a short line of words, optionally numbered
+_HEADING_RE = re.compile(r"^(?:(?:\d+(?:\.\d+)*|[IVX]+|[A-H])\.?\s+)?([A-Za-z][A-Za-z &\-]{1,48}?)\s*:?$")
+# IEEE/ACM style "Abstract—We propose ..." with the body on the same line
+_INLINE_ABSTRACT_RE = re.compile(r"^abstract\s*[-—–:.]\s*\S", re.IGNORECASE)
+
+# Which sections answer which kind of question
+QUESTION_SECTIONS = [
+    (("method", "approach", "how does", "how do", "architecture", "algorithm", "dataset", "train", "implement"),
+     ("methods",)),
+    (("result", "perform", "accuracy", "outperform", "evaluat", "experiment", "benchmark", "metric", "score"),
+     ("results", "discussion")),
+    (("conclu", "limitation", "future", "takeaway", "implication"), ("conclusion", "discussion")),
+    (("related", "prior work", "previous work", "background", "compare"), ("background",)),
+    (("cite", "citation", "reference", "bibliograph"), ("references",)),
+]
+DEFAULT_SECTIONS = ("abstract", "introduction", "conclusion")
+SUMMARY_SECTIONS = ("abstract", "introduction", "conclusion", "results")
+
+
+def classify_heading(line: str) -> Optional[str]:
+    """Canonical section name if the line is a recognised heading"""
+    line = line.strip()
+    if not line or len(line) > 60:
+        return None
+    if _INLINE_ABSTRACT_RE.match(line):
+        return "abstract"
+    match = _HEADING_RE.match(line)
+    if not match:
+        return None
+    return _HEADING_NAMES.get(" ".join(match.group(1).lower().split()))
+
+
+def segment_pages(pages: Sequence[str]) -> List[Dict]:
+    """
+    Split a document into sections. Positions are [page, char offset within
+    that page] so a section can be read back from just the pages it spans.
+    Each canonical section is taken at its first heading; later repeats
+    (running heads, cross references) stay inside the current section.
+    """
+    boundaries: List[Tuple[int, int, str, str]] = []
+    seen = set()
+    for page_number, text in enumerate(pages):
+        offset = 0
+        for line in text.split("\n"):
+            name = classify_heading(line)
+            if name and name not in seen:
+                seen.add(name)
+                boundaries.append((page_number, offset, name, line.strip()))
+            offset += len(line) + 1
+
+    if not pages:
+        return []
+    document_end = [len(pages) - 1, len(pages[-1])]
+    if not boundaries or boundaries[0][:2] != (0, 0):
+        boundaries.insert(0, (0, 0, "front_matter", ""))
+
+    sections = []
+    for i, (page_number, offset, name, heading) in enumerate(boundaries):
+        end = list(boundaries[i + 1][:2]) if i + 1 < len(boundaries) else document_end
+        section = {"name": name, "heading": heading, "start": [page_number, offset], "end": end}
+        section["length"] = len(span_text(pages[page_number:end[0] + 1], section))
+        sections.append(section)
+    return [s for s in sections if s["length"] or s["name"] != "front_matter"]
+
+
+def span_text(pages: Sequence[str], section: Dict) -> str:
+    """Text of a section given the pages from its start page through its end page"""
+    (start_page, start), (end_page, end) = section["start"], section["end"]
+    if start_page == end_page:
+        return pages[0][start:end]
+    parts = [pages[0][start:]]
+    parts.extend(pages[1:end_page - start_page])
+    parts.append(pages[end_page - start_page][:end])
+    return "\n".join(parts)
+
+
+def sections_for_question(question: str) -> Tuple[str, ...]:
+    """Sections most likely to answer a question, always backed by the abstract"""
+    question = question.lower()
+    wanted = []
+    for keywords, names in QUESTION_SECTIONS:
+        if any(keyword in question for keyword in keywords):
+            wanted.extend(n for n in names if n not in wanted)
+    if not wanted:
+        return DEFAULT_SECTIONS
+    return tuple(wanted) + ("abstract",)
+
+
+def allocate_budget(lengths: Sequence[int], max_chars: int) -> List[int]:
+    """Split a character budget across sections, handing unused share to longer ones"""
+    budget = [0] * len(lengths)
+    remaining = max_chars
+    pending = [i for i, length in enumerate(lengths) if length > 0]
+    while pending and remaining > 0:
+        share = max(1, remaining // len(pending))
+        still_pending = []
+        for i in pending:
+            take = min(share, lengths[i] - budget[i], remaining)
+            budget[i] += take
+            remaining -= take
+            if budget[i] < lengths[i]:
+                still_pending.append(i)
+        pending = still_pending
+    return budget
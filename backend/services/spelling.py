@@ -0,0 +1,200 @@
+"""
+ResearchPilot AI - Query Spelling Correction
+SymSpell-style symmetric-delete index over the local corpus vocabulary,
+used to rewrite misspelled queries before they are sent to arXiv
+"""
+
+import re
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+from services.paper_index import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+# Research vocabulary so corrections work before the local corpus has grown
+SEED_VOCABULARY = """
+adversarial agent algorithm alignment analysis anomaly architecture attention augmentation
+autoencoder autonomous backpropagation bayesian benchmark bioinformatics blockchain
+calibration causal classification clustering cognitive compression computation computer
+contrastive convolutional cryptography cybersecurity dataset decentralized deep detection
+diffusion dimensionality distillation distributed dynamics efficient embedding encoder
+encryption ensemble estimation evaluation evolutionary explainable extraction federated
+forecasting framework fusion gaussian generalization generation generative genomics
+gradient graph healthcare heuristic hierarchical hyperparameter image imaging inference
+information interpretability kernel knowledge language large latent learning linear
+localization machine manifold markov medical memory meta model molecular monte multimodal
+multitask natural navigation network networks neural nonlinear object optimization
+optimizer parallel perception planning pretrained pretraining privacy probabilistic
+protein pruning quantization quantum question random recognition recommendation
+recurrent regression regularization reinforcement representation retrieval robotics
+robust robustness sampling scalable security segmentation self semantic sensor sentiment
+sequence signal simulation sparse spatial spectral speech statistical stochastic
+summarization supervised survey synthesis temporal tensor theory tokenization topology
+training transfer transformer transformers translation uncertainty unsupervised
+variational vision visual
+""".split()
+
+_WORD_RE = re.compile(r"[A-Za-z]+|[^A-Za-z]+")
+
+
+def osa_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance with early exit above max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SpellingCorrector:
+    """
+    Symmetric-delete spelling correction (SymSpell). Every vocabulary word
+    is indexed under all strings reachable by deleting up to max_distance
+    characters from its first prefix_length characters; a lookup generates
+    the same deletes for the input and verifies candidates with OSA distance.
+    Plurals of known words (-s, -es, -ies) count as known, and words that
+    occur in more than rare_count indexed papers are left alone. Corpus
+    words leave the vocabulary when the last paper using them is dropped;
+    pinned words (the seed list) stay.
+    """
+
+    def __init__(self, frequency: Callable[[str], int], max_distance: int = 2,
+                 prefix_length: int = 7, min_word_length: int = 4, rare_count: int = 0):
+        self.frequency = frequency
+        self.rare_count = rare_count
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_word_length = min_word_length
+        self._words: Set[str] = set()
+        self._pinned: Set[str] = set()
+        self._deletes: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._words)
+
+    def _edits(self, word: str) -> Set[str]:
+        """All strings within max_distance deletions of the word's prefix"""
+        word = word[:self.prefix_length]
+        results = {word}
+        frontier = {word}
+        for _ in range(self.max_distance):
+            next_frontier = set()
+            for item in frontier:
+                if len(item) <= 1:
+                    continue
+                for i in range(len(item)):
+                    next_frontier.add(item[:i] + item[i + 1:])
+            next_frontier -= results
+            results |= next_frontier
+            frontier = next_frontier
+        return results
+
+    def add_words(self, words: List[str], pinned: bool = False):
+        """Index new vocabulary words (alphabetic, long enough to correct)"""
+        added = 0
+        with self._lock:
+            for word in words:
+                if not word.isalpha() or len(word) < self.min_word_length:
+                    continue
+                if pinned:
+                    self._pinned.add(word)
+                if word in self._words:
+                    continue
+                self._words.add(word)
+                for edit in self._edits(word):
+                    self._deletes.setdefault(edit, set()).add(word)
+                added += 1
+        return added
+
+    def remove_words(self, words: List[str]):
+        """Drop corpus words no indexed paper uses any more (pinned words stay)"""
+        removed = 0
+        with self._lock:
+            for word in words:
+                # frequency() guards against the word having been re-indexed meanwhile
+                if word not in self._words or word in self._pinned or self.frequency(word) > 0:
+                    continue
+                self._words.discard(word)
+                for edit in self._edits(word):
+                    candidates = self._deletes.get(edit)
+                    if candidates is not None:
+                        candidates.discard(word)
+                        if not candidates:
+                            del self._deletes[edit]
+                removed += 1
+        return removed
+
+    def update_vocabulary(self, added: List[str], removed: List[str]):
+        """Paper index term listener: follow the corpus vocabulary as papers come and go"""
+        self.add_words(added)
+        self.remove_words(removed)
+
+    def is_known(self, word: str) -> bool:
+        """A vocabulary word or a simple plural of one"""
+        if word in self._words:
+            return True
+        if word.endswith("ies") and word[:-3] + "y" in self._words:
+            return True
+        if word.endswith("es") and word[:-2] in self._words:
+            return True
+        return word.endswith("s") and word[:-1] in self._words
+
+    def lookup(self, word: str) -> Optional[Dict]:
+        """Best correction for a word, or None if it is known, common or nothing is close"""
+        word = word.lower()
+        if (word in STOPWORDS or len(word) < self.min_word_length or not word.isalpha()
+                or self.is_known(word) or self.frequency(word) > self.rare_count):
+            return None
+        # Short words sit close to many valid words, so allow them a single edit
+        max_distance = 1 if len(word) <= 6 else self.max_distance
+        best = None
+        seen = set()
+        for edit in self._edits(word):
+            for candidate in tuple(self._deletes.get(edit, ())):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = osa_distance(word, candidate, max_distance)
+                if distance > max_distance:
+                    continue
+                # Closest first, then the word most papers use
+                rank = (distance, -self.frequency(candidate), candidate)
+                if best is None or rank < best[0]:
+                    best = (rank, candidate, distance)
+        if best is None:
+            return None
+        return {"original": word, "corrected": best[1], "distance": best[2]}
+
+    def correct_query(self, query: str) -> Dict:
+        """Rewrite misspelled words in a query, keeping everything else as typed"""
+        corrections = []
+        parts = []
+        for token in _WORD_RE.findall(query):
+            suggestion = self.lookup(token) if token.isalpha() else None
+            if suggestion:
+                corrections.append(suggestion)
+                parts.append(suggestion["corrected"])
+            else:
+                parts.append(token)
+        corrected = "".join(parts)
+        return {
+            "query": corrected if corrections else query,
+            "corrected": bool(corrections),
+            "corrections": corrections
+        }
@@ -0,0 +1,175 @@
+"""
+ResearchPilot AI - Storage Manager
+Keeps uploads and everything derived from them (extracted text and other
+per-document artifacts) within a disk quota by evicting the least recently
+used or expired documents, never touching pinned ones
+"""
+
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Unreferenced blobs younger than this may belong to an upload still being registered
+ORPHAN_GRACE_SECONDS = 3600
+
+
+@dataclass
+class ArtifactStore:
+    """A kind of derived data: per-key sizes, a way to delete a key, and the blob a key derives from"""
+    name: str
+    usage: Callable[[], Dict[str, int]]
+    discard: Callable[[str], int]
+    owner: Callable[[str], str]
+
+
+class StorageManager:
+    """
+    Garbage collector over the blob store. A document is its blob plus the
+    artifacts owned by that blob's sha256; it is evicted as a unit. Each run:
+      1. removes orphans (blobs no filename refers to, artifacts of missing blobs),
+      2. evicts documents unused for longer than max_age_seconds,
+      3. evicts least recently used documents until usage fits quota_bytes.
+    Pinned documents and ones with processing in flight are kept.
+    """
+
+    def __init__(self, blob_store, manifest, quota_bytes: int, max_age_seconds: float = 0,
+                 pinned: Optional[Callable[[], Set[str]]] = None,
+                 busy: Optional[Callable[[str], bool]] = None,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.blob_store = blob_store
+        self.manifest = manifest
+        self.quota_bytes = quota_bytes
+        self.max_age_seconds = max_age_seconds
+        self.pinned = pinned or (lambda: set())
+        self.busy = busy or (lambda sha256: False)
+        self.on_evict = on_evict
+        self.artifacts: List[ArtifactStore] = []
+        self._lock = threading.Lock()
+        self.last_run: Optional[Dict] = None
+
+    def add_artifacts(self, name: str, usage: Callable[[], Dict[str, int]], discard: Callable[[str], int],
+                      owner: Callable[[str], str] = lambda key: key):
+        self.artifacts.append(ArtifactStore(name, usage, discard, owner))
+
+    def _artifact_usage(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """owner sha256 -> artifact store name -> key -> bytes"""
+        owned: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for store in self.artifacts:
+            for key, size in store.usage().items():
+                owned.setdefault(store.owner(key), {}).setdefault(store.name, {})[key] = size
+        return owned
+
+    def usage(self) -> Dict:
+        blobs = self.blob_store.list()
+        artifact_bytes = {store.name: sum(store.usage().values()) for store in self.artifacts}
+        upload_bytes = sum(size for size, _, _ in blobs.values())
+        return {
+            "quota_bytes": self.quota_bytes,
+            "used_bytes": upload_bytes + sum(artifact_bytes.values()),
+            "uploads": {"blobs": len(blobs), "bytes": upload_bytes},
+            "artifacts": artifact_bytes,
+            "last_gc": self.last_run
+        }
+
+    def collect(self, dry_run: bool = False, quota_bytes: Optional[int] = None,
+                max_age_seconds: Optional[float] = None) -> Dict:
+        """Run (or with dry_run, only plan) a collection and report what was reclaimed"""
+        with self._lock:
+            return self._collect(dry_run,
+                                 self.quota_bytes if quota_bytes is None else quota_bytes,
+                                 self.max_age_seconds if max_age_seconds is None else max_age_seconds)
+
+    def _collect(self, dry_run: bool, quota_bytes: int, max_age_seconds: float) -> Dict:
+        started = time.perf_counter()
+        now = time.time()
+        blobs = self.blob_store.list()
+        references = self.manifest.by_sha()
+        owned = self._artifact_usage()
+        pinned = self.pinned()
+
+        def unit_bytes(sha256: str) -> int:
+            blob = blobs.get(sha256)
+            artifact_bytes = sum(sum(keys.values()) for keys in owned.get(sha256, {}).values())
+            return (blob[0] if blob else 0) + artifact_bytes
+
+        used_before = sum(unit_bytes(sha256) for sha256 in set(blobs) | set(owned))
+        evictions = []
+
+        # 1. Orphans: unreferenced blobs (past the grace period) and artifacts without a blob
+        for sha256, (size, last_used, stored_at) in blobs.items():
+            if sha256 not in references and now - stored_at > ORPHAN_GRACE_SECONDS and not self.busy(sha256):
+                evictions.append(self._eviction(sha256, [], unit_bytes(sha256), last_used, "orphaned"))
+        for sha256 in owned:
+            if sha256 not in blobs and sha256 not in references and not self.busy(sha256):
+                evictions.append(self._eviction(sha256, [], unit_bytes(sha256), None, "orphaned"))
+
+        # 2 and 3. Documents, least recently used first (so expired ones come first too)
+        candidates = sorted(
+            (last_used, sha256) for sha256, (_, last_used, _) in blobs.items()
+            if sha256 in references and sha256 not in pinned and not self.busy(sha256)
+        )
+        used = used_before - sum(e["bytes"] for e in evictions)
+        for last_used, sha256 in candidates:
+            expired = bool(max_age_seconds) and now - last_used > max_age_seconds
+            if not expired and (not quota_bytes or used <= quota_bytes):
+                break
+            size = unit_bytes(sha256)
+            evictions.append(self._eviction(sha256, references[sha256], size, last_used,
+                                            "expired" if expired else "quota"))
+            used -= size
+        over_quota = bool(quota_bytes) and used > quota_bytes
+        if over_quota:
+            logger.warning(f"⚠️ Storage still over quota after GC: {used} > {quota_bytes} bytes (pinned or busy)")
+
+        if dry_run:
+            reclaimed = sum(e["bytes"] for e in evictions)
+        else:
+            reclaimed = sum(self._evict(e["sha256"], e["filenames"], owned.get(e["sha256"], {})) for e in evictions)
+
+        report = {
+            "dry_run": dry_run,
+            "quota_bytes": quota_bytes,
+            "max_age_seconds": max_age_seconds,
+            "used_bytes_before": used_before,
+            "used_bytes_after": used_before - reclaimed,
+            "reclaimed_bytes": reclaimed,
+            "over_quota": over_quota,
+            "evicted": evictions,
+            "pinned": len(pinned & set(references)),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "ran_at": datetime.now().isoformat(timespec="seconds")
+        }
+        self.last_run = {k: v for k, v in report.items() if k != "evicted"}
+        self.last_run["evicted"] = len(evictions)
+        logger.info(f"🧹 Storage GC{' (dry run)' if dry_run else ''}: {len(evictions)} documents, "
+                    f"{reclaimed / (1024 * 1024):.1f} MB reclaimed")
+        return report
+
+    @staticmethod
+    def _eviction(sha256: str, filenames: Iterable[str], size: int, last_used: Optional[float], reason: str) -> Dict:
+        return {
+            "sha256": sha256,
+            "filenames": list(filenames),
+            "bytes": size,
+            "last_used": datetime.fromtimestamp(last_used).isoformat(timespec="seconds") if last_used else None,
+            "reason": reason
+        }
+
+    def _evict(self, sha256: str, filenames: List[str], artifacts: Dict[str, Dict[str, int]]) -> int:
+        freed = 0
+        for filename in filenames:
+            if self.on_evict:
+                self.on_evict(filename)
+            else:
+                self.manifest.remove(filename)
+        freed += self.blob_store.remove(sha256)
+        stores = {store.name: store for store in self.artifacts}
+        for name, keys in artifacts.items():
+            for key in keys:
+                freed += stores[name].discard(key)
+        return freed
@@ -0,0 +1,124 @@
+"""
+ResearchPilot AI - Text Normalization
+Cleans extracted PDF text before it reaches a prompt: running headers and
+footers, page numbers, hyphenated line breaks, ligatures and whitespace
+"""
+
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Sequence, Set, Tuple
+
+LIGATURES = {
+    "ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi",
+    "ﬄ": "ffl", "ﬅ": "ft", "ﬆ": "st",
+    "\u00ad": "",   # soft hyphen
+    "\u00a0": " ",  # no-break space
+}
+_LIGATURE_RE = re.compile("|".join(LIGATURES))
+_CID_RE = re.compile(r"\(cid:\d+\)")
+# "-" + line break, or PDFium's U+FFFE soft-hyphen marker
+_HYPHEN_BREAK_RE = re.compile(r"([A-Za-z])(?:-\n|\ufffe\n?)[ \t]*([a-z])")
+_SPACES_RE = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_PAGE_NUMBER_RE = re.compile(r"^(?:page\s+)?(?:\d+|[ivxlc]+)(?:\s*(?:of|/)\s*\d+)?$", re.IGNORECASE)
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Lines at the top/bottom of a page that are candidates for running headers/footers
+EDGE_LINES = 2
+# Pages shorter than this are left alone apart from page numbers
+MIN_PAGE_LINES = 6
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (words and punctuation marks)"""
+    return len(_TOKEN_RE.findall(text))
+
+
+def _signature(line: str) -> str:
+    """Header identity ignoring page numbers and case"""
+    return re.sub(r"\d+", "#", " ".join(line.lower().split()))
+
+
+def _edges(lines: List[str]) -> Tuple[List[int], List[int]]:
+    """Indices of the first and last EDGE_LINES non-empty lines"""
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    if len(non_empty) < MIN_PAGE_LINES:
+        return [], []
+    return non_empty[:EDGE_LINES], non_empty[-EDGE_LINES:]
+
+
+def detect_running_lines(pages: Sequence[str], min_ratio: float = 0.5) -> Tuple[Set[str], Set[str]]:
+    """Signatures of lines repeated at the top (headers) and bottom (footers) of most pages"""
+    if len(pages) < 3:
+        return set(), set()
+    top, bottom = Counter(), Counter()
+    for page in pages:
+        lines = page.split("\n")
+        head, foot = _edges(lines)
+        top.update({_signature(lines[i]) for i in head})
+        bottom.update({_signature(lines[i]) for i in foot})
+    threshold = max(3, math.ceil(len(pages) * min_ratio))
+    return ({sig for sig, count in top.items() if sig and count >= threshold},
+            {sig for sig, count in bottom.items() if sig and count >= threshold})
+
+
+def clean_text(text: str, stats: Counter) -> str:
+    """Page-independent fixes: ligatures, extraction artifacts, hyphenation, whitespace"""
+    text, fixed = _LIGATURE_RE.subn(lambda m: LIGATURES[m.group(0)], text)
+    stats["ligatures_fixed"] += fixed
+    text, removed = _CID_RE.subn("", text)
+    stats["artifacts_removed"] += removed
+    text = _SPACES_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    text, joined = _HYPHEN_BREAK_RE.subn(r"\1\2", text)
+    stats["hyphenations_joined"] += joined
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a single block of text (no page structure available)"""
+    return clean_text(text or "", Counter())
+
+
+def normalize_pages(pages: Sequence[str]) -> Tuple[List[str], Dict]:
+    """
+    Normalize a document page by page, keeping line breaks (headings stay
+    on their own lines for segmentation). Returns the new pages and a report
+    with the character/token reduction and what was removed.
+    """
+    stats = Counter()
+    headers, footers = detect_running_lines(pages)
+    normalized = []
+    for page in pages:
+        lines = page.split("\n")
+        head, foot = _edges(lines)
+        drop = set()
+        for i in head + foot:
+            if _signature(lines[i]) in (headers if i in head else footers):
+                drop.add(i)
+                stats["header_lines_removed"] += 1
+        # A bare number on the first or last line is a page number
+        non_empty = [i for i, line in enumerate(lines) if line.strip()]
+        for i in non_empty[:1] + non_empty[-1:]:
+            if i not in drop and _PAGE_NUMBER_RE.match(lines[i].strip()):
+                drop.add(i)
+                stats["page_numbers_removed"] += 1
+        kept = "\n".join(line for i, line in enumerate(lines) if i not in drop)
+        normalized.append(clean_text(kept, stats))
+
+    chars_before = sum(len(p) for p in pages)
+    chars_after = sum(len(p) for p in normalized)
+    tokens_before = sum(estimate_tokens(p) for p in pages)
+    tokens_after = sum(estimate_tokens(p) for p in normalized)
+    report = {
+        "chars_before": chars_before,
+        "chars_after": chars_after,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "token_reduction_pct": round(100 * (tokens_before - tokens_after) / tokens_before, 1) if tokens_before else 0.0,
+        "running_lines": len(headers) + len(footers),
+        **{key: stats[key] for key in ("header_lines_removed", "page_numbers_removed", "hyphenations_joined",
+                                        "ligatures_fixed", "artifacts_removed")}
+    }
+    return normalized, report
@@ -0,0 +1,285 @@
+"""
+ResearchPilot AI - Upload Manifest
+Persistent record of every upload (size, hash, page count, preview, status)
+with sorted indexes, so listings page through memory instead of the disk
+"""
+
+import json
+import base64
+import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.deferred_save import DeferredSave
+
+logger = logging.getLogger(__name__)
+
+# ?sort= value -> entry field
+SORT_FIELDS = {
+    "modified": "modified",
+    "name": "filename",
+    "size": "size",
+    "pages": "page_count",
+}
+PREVIEW_LENGTH = 300
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the sort"""
+
+
+def encode_cursor(sort: str, key: Tuple) -> str:
+    raw = json.dumps([sort, list(key)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if cursor_sort != sort or not isinstance(key, list) or len(key) != 2:
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return tuple(key)
+
+
+class UploadManifest:
+    """
+    filename -> upload metadata, persisted to a JSON file shortly after changes.
+    One sorted (value, filename) list per sort field is kept up to date on
+    writes, so a page of any ordering is a bisect plus a short scan.
+    Several filenames may share one sha256 (content-addressed blob);
+    references() is that blob's reference count.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Dict[str, Dict] = {}
+        self._orders: Dict[str, List[Tuple]] = {sort: [] for sort in SORT_FIELDS}
+        self._total_size = 0
+        self._by_sha: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.loaded = self._load()
+        self._saver = DeferredSave(self.path, self._snapshot, ".uploads-")
+
+    def _load(self) -> bool:
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Could not read upload manifest {self.path}: {str(e)}")
+            return False
+        for entry in entries.values():
+            self._index(entry)
+        logger.info(f"🗃️ Upload manifest: {len(self._entries)} files")
+        return True
+
+    def _save(self):
+        """Schedule a write of the manifest; caller holds the lock"""
+        self._saver.mark_dirty()
+
+    def _snapshot(self) -> Dict[str, Dict]:
+        # Entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+        with self._lock:
+            return dict(self._entries)
+
+    def flush(self):
+        """Write pending changes now"""
+        self._saver.flush()
+
+    @staticmethod
+    def _sort_key(sort: str, entry: Dict) -> Tuple:
+        value = entry.get(SORT_FIELDS[sort])
+        return (0 if value is None else value, entry["filename"])
+
+    def _index(self, entry: Dict):
+        self._entries[entry["filename"]] = entry
+        self._total_size += entry.get("size") or 0
+        if entry.get("sha256"):
+            self._by_sha.setdefault(entry["sha256"], set()).add(entry["filename"])
+        for sort, order in self._orders.items():
+            insort(order, self._sort_key(sort, entry))
+
+    def _unindex(self, filename: str) -> Optional[Dict]:
+        entry = self._entries.pop(filename, None)
+        if entry is None:
+            return None
+        self._total_size -= entry.get("size") or 0
+        names = self._by_sha.get(entry.get("sha256"))
+        if names is not None:
+            names.discard(filename)
+            if not names:
+                del self._by_sha[entry["sha256"]]
+        for sort, order in self._orders.items():
+            key = self._sort_key(sort, entry)
+            i = bisect_left(order, key)
+            if i < len(order) and order[i] == key:
+                del order[i]
+        return entry
+
+    def record(self, filename: str, size: int, sha256: str, doc_id: str,
+               modified: Optional[str] = None, **fields) -> Dict:
+        """Add an upload, replacing any earlier file stored under the same name"""
+        entry = {
+            "filename": filename,
+            "doc_id": doc_id,
+            "sha256": sha256,
+            "size": size,
+            "modified": modified or datetime.now().isoformat(timespec="seconds"),
+            "page_count": None,
+            "preview": "",
+            "status": "pending",
+            "error": None,
+            **fields
+        }
+        with self._lock:
+            self._unindex(filename)
+            self._index(entry)
+            self._save()
+        return dict(entry)
+
+    def _update(self, filename: str, fields: Dict) -> Optional[Dict]:
+        """Apply fields to one entry; returns the entry, or None if unchanged; caller holds the lock"""
+        entry = self._entries[filename]
+        updated = {**entry, **fields}
+        if updated == entry:
+            return None
+        self._unindex(filename)
+        self._index(updated)
+        return updated
+
+    def update(self, filename: str, **fields) -> Optional[Dict]:
+        """Set fields on an upload (status, page_count, preview, ...)"""
+        if "preview" in fields:
+            fields["preview"] = (fields["preview"] or "")[:PREVIEW_LENGTH]
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return None
+            updated = self._update(filename, fields)
+            if updated is None:
+                return dict(entry)
+            self._save()
+            return dict(updated)
+
+    def update_sha(self, sha256: str, **fields) -> int:
+        """Set fields on every filename sharing a blob; returns the number of entries changed"""
+        if "preview" in fields:
+            fields["preview"] = (fields["preview"] or "")[:PREVIEW_LENGTH]
+        with self._lock:
+            changed = sum(self._update(name, fields) is not None
+                          for name in list(self._by_sha.get(sha256, ())))
+            if changed:
+                self._save()
+            return changed
+
+    def remove(self, filename: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._unindex(filename)
+            if entry is not None:
+                self._save()
+            return entry
+
+    def get(self, filename: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(filename)
+            return dict(entry) if entry else None
+
+    def references(self, sha256: str) -> int:
+        """Number of filenames pointing at a blob"""
+        with self._lock:
+            return len(self._by_sha.get(sha256, ()))
+
+    def unique_name(self, filename: str, sha256: str) -> str:
+        """filename, or "name-2.pdf", "name-3.pdf"... if it is taken by different content"""
+        path = Path(filename)
+        candidate, n = filename, 1
+        with self._lock:
+            while candidate in self._entries and self._entries[candidate].get("sha256") != sha256:
+                n += 1
+                candidate = f"{path.stem}-{n}{path.suffix}"
+        return candidate
+
+    def by_sha(self) -> Dict[str, List[str]]:
+        """sha256 -> filenames referring to that blob"""
+        with self._lock:
+            return {sha256: sorted(names) for sha256, names in self._by_sha.items()}
+
+    def filenames(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def page(self, sort: str = "modified", descending: bool = True, limit: int = 50,
+             cursor: Optional[str] = None,
+             match: Optional[Callable[[Dict], bool]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of uploads in sort order, starting after the cursor, keeping
+        entries accepted by match. Returns (entries, next_cursor); the cursor
+        is None on the last page.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {sort}")
+        after = decode_cursor(cursor, sort) if cursor else None
+        with self._lock:
+            order = self._orders[sort]
+            if descending:
+                start = (bisect_left(order, after) if after else len(order)) - 1
+                positions = range(start, -1, -1)
+            else:
+                positions = range(bisect_right(order, after) if after else 0, len(order))
+            page = []
+            last_key = None
+            for i in positions:
+                key = order[i]
+                entry = self._entries[key[1]]
+                if match is None or match(entry):
+                    if len(page) == limit:
+                        return page, encode_cursor(sort, last_key)
+                    page.append(dict(entry))
+                    last_key = key
+            return page, None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"count": len(self._entries), "total_size": self._total_size}
+
+    def rebuild(self, upload_dir: Path, describe: Callable[[Path], Optional[Dict]]):
+        """
+        One-off import of files already in upload_dir (uploads made before the
+        manifest existed). describe(path) supplies known fields such as doc_id.
+        """
+        entries = {}
+        for file_path in Path(upload_dir).glob("*.pdf"):
+            try:
+                stat = file_path.stat()
+            except OSError as e:
+                logger.warning(f"⚠️ Skipping {file_path.name} in manifest import: {str(e)}")
+                continue
+            entries[file_path.name] = {
+                "filename": file_path.name,
+                "doc_id": None,
+                "sha256": None,
+                "size": stat.st_size,
+                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+                "page_count": None,
+                "preview": "",
+                "status": "processed",
+                "error": None,
+                **(describe(file_path) or {})
+            }
+        with self._lock:
+            self._entries.clear()
+            self._orders = {sort: [] for sort in SORT_FIELDS}
+            self._total_size = 0
+            self._by_sha.clear()
+            for entry in entries.values():
+                self._index(entry)
+            self._save()
+        self.loaded = True
+        logger.info(f"🗃️ Upload manifest built from {upload_dir}: {len(entries)} files")
@@ -0,0 +1,156 @@
+"""
+ResearchPilot AI - Upload Processing Pipeline
+Runs uploaded documents through background stages (extract, index, ...)
+and publishes status and page-level progress to event subscribers
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("processed", "error")
+
+
+class ProcessingJob:
+    """One upload moving through the pipeline"""
+
+    def __init__(self, doc_id: str, filename: str, file_path: Path, sha256: str):
+        self.doc_id = doc_id
+        self.filename = filename
+        self.file_path = file_path
+        self.sha256 = sha256
+        self.status = "pending"
+        self.stage = None
+        self.pages_done = 0
+        self.page_count = 0
+        self.error = None
+        self.upload_id = None  # uploads table row, when MySQL is available
+        self.results: Dict = {}  # per-stage output for later stages
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+        self.finished_at = None
+        self.task: Optional[asyncio.Task] = None
+        self._subscribers: List[asyncio.Queue] = []
+        self._last_progress = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict:
+        return {
+            "doc_id": self.doc_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "pages_done": self.pages_done,
+            "page_count": self.page_count,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+    def publish(self, event: str, **data):
+        message = {"event": event, **self.to_dict(), **data}
+        for queue in self._subscribers:
+            queue.put_nowait(message)
+
+
+class UploadPipeline:
+    """
+    Background processor for uploads. Stages run in registration order;
+    each is an async callable taking the job. Subscribers receive a
+    snapshot of the job followed by live stage/progress/status events.
+    """
+
+    def __init__(self, on_status: Optional[Callable[[ProcessingJob], None]] = None,
+                 max_jobs: int = 1000, progress_interval: float = 0.25):
+        self.on_status = on_status
+        self.max_jobs = max_jobs
+        self.progress_interval = progress_interval
+        self.stages: List[Tuple[str, Callable[[ProcessingJob], Awaitable[None]]]] = []
+        self._jobs: "OrderedDict[str, ProcessingJob]" = OrderedDict()
+
+    def add_stage(self, name: str, handler: Callable[[ProcessingJob], Awaitable[None]]):
+        self.stages.append((name, handler))
+
+    def get(self, doc_id: str) -> Optional[ProcessingJob]:
+        return self._jobs.get(doc_id)
+
+    def submit(self, job: ProcessingJob) -> ProcessingJob:
+        """Start processing a job; an unfinished job for the same document is reused"""
+        current = self._jobs.get(job.doc_id)
+        if current is not None and not current.finished:
+            return current
+        self._jobs[job.doc_id] = job
+        self._jobs.move_to_end(job.doc_id)
+        while len(self._jobs) > self.max_jobs:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.finished:
+                break
+            self._jobs.popitem(last=False)
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _set_status(self, job: ProcessingJob, status: str):
+        job.status = status
+        if job.finished:
+            job.finished_at = datetime.now().isoformat(timespec="seconds")
+        job.publish("status")
+        if self.on_status:
+            try:
+                await asyncio.to_thread(self.on_status, job)
+            except Exception as e:
+                logger.error(f"❌ Upload status hook failed for {job.doc_id}: {str(e)}")
+
+    async def _run(self, job: ProcessingJob):
+        started = time.perf_counter()
+        await self._set_status(job, "processing")
+        try:
+            for name, handler in self.stages:
+                job.stage = name
+                job.publish("stage")
+                await handler(job)
+        except Exception as e:
+            job.error = str(e)
+            logger.error(f"❌ Processing {job.filename} failed at {job.stage}: {str(e)}")
+            await self._set_status(job, "error")
+            return
+        job.stage = None
+        logger.info(f"✅ Processed {job.filename} in {time.perf_counter() - started:.2f}s")
+        await self._set_status(job, "processed")
+
+    def progress(self, doc_id: str, pages_done: int, page_count: int):
+        """Page-level progress, throttled to one event per progress_interval"""
+        job = self._jobs.get(doc_id)
+        if job is None or job.finished:
+            return
+        job.pages_done, job.page_count = pages_done, page_count
+        now = time.monotonic()
+        if pages_done >= page_count or now - job._last_progress >= self.progress_interval:
+            job._last_progress = now
+            job.publish("progress")
+
+    async def subscribe(self, doc_id: str) -> AsyncIterator[Dict]:
+        """Snapshot then live events for a job, ending after its final status"""
+        job = self._jobs.get(doc_id)
+        if job is None:
+            return
+        queue = asyncio.Queue()
+        job._subscribers.append(queue)
+        try:
+            yield {"event": "snapshot", **job.to_dict()}
+            if job.finished:
+                return
+            while True:
+                message = await queue.get()
+                yield message
+                if message["event"] == "status" and message["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            job._subscribers.remove(queue)
@@ -0,0 +1,163 @@
+"""
+ResearchPilot AI - Upload Storage
+Streams uploaded files (and PDFs inside zip archives) to disk in
+fixed-size chunks with incremental hashing and a size limit, then moves
+them into place atomically, plus a middleware that caps request bodies
+while they are being received
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"File exceeds maximum size of {max_bytes / (1024 * 1024):.1f} MB")
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+def safe_filename(filename: str) -> str:
+    """Strip any directory components a client put in the filename"""
+    return Path((filename or "").replace("\\", "/")).name
+
+
+async def stream_upload_to_disk(upload, dest_path: Path, max_bytes: int,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE) -> StoredUpload:
+    """
+    Copy an UploadFile to dest_path chunk by chunk.
+
+    Data goes to a hidden temp file in the destination directory (same
+    filesystem), is hashed as it streams, and is renamed over dest_path
+    only once complete, so readers never see a partial file and memory
+    use stays at one chunk regardless of file size. Hashing and writing
+    run in a worker thread to keep disk I/O off the event loop.
+    """
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=dest_path.parent, prefix=".upload-", suffix=".part")
+    tmp_path = Path(tmp_name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            def write(chunk: bytes):
+                digest.update(chunk)
+                out.write(chunk)
+
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                await asyncio.to_thread(write, chunk)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return StoredUpload(path=dest_path, size=size, sha256=digest.hexdigest())
+
+
+class BodySizeLimit:
+    """
+    ASGI middleware capping request bodies for some paths. A Content-Length
+    over the limit is refused before anything is read; otherwise bytes are
+    counted as the server receives them and the request is answered with
+    413 as soon as the limit is crossed, so the multipart parser never
+    spools more than the limit to disk.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        rejection = JSONResponse({"detail": str(UploadTooLarge(limit))}, status_code=413)
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            await rejection(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = started = rejected = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise UploadTooLarge(limit)
+            return message
+
+        async def checked_send(message):
+            nonlocal started, rejected
+            if exceeded and not started:
+                # Whatever error the app made of the aborted body, the client gets a 413
+                if not rejected:
+                    rejected = True
+                    await rejection(scope, receive, send)
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, checked_send)
+        except UploadTooLarge:
+            if started:
+                raise
+            if not rejected:
+                await rejection(scope, receive, send)
+
+
+class ArchiveMember:
+    """A zip member with an async read(), so it streams to disk like an UploadFile"""
+
+    def __init__(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo):
+        self.filename = safe_filename(info.filename)
+        self.declared_size = info.file_size
+        self._stream = archive.open(info)
+
+    async def read(self, size: int = -1) -> bytes:
+        return await asyncio.to_thread(self._stream.read, size)
+
+    def close(self):
+        self._stream.close()
+
+
+def archive_pdf_members(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """PDF entries of a zip archive, skipping directories and macOS resource forks"""
+    return [
+        info for info in archive.infolist()
+        if not info.is_dir()
+        and info.filename.lower().endswith(".pdf")
+        and not info.filename.startswith("__MACOSX/")
+        and not safe_filename(info.filename).startswith("._")
+    ]
@@ -0,0 +1,153 @@
+"""
+ResearchPilot AI - Vector Store
+Per-paper chunk embeddings on disk, so each document is embedded once and
+questions only score that document's chunks
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _atomic_write(path: Path, write):
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".vectors-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def top_chunks(chunks: List[Dict], vectors: np.ndarray, query: np.ndarray, k: int) -> List[Dict]:
+    """The k chunks whose vectors score highest against query (cosine for normalized vectors), best first"""
+    if not len(vectors) or k <= 0:
+        return []
+    scores = vectors @ np.asarray(query, dtype=np.float32).reshape(-1)
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [{**chunks[i], "score": float(scores[i])} for i in top]
+
+
+class PaperVectorStore:
+    """
+    Each paper is a pair of files named by its key (the upload's sha256):
+    <key>.npy holds the L2-normalized chunk vectors (float32, one row per
+    chunk) and <key>.json the chunks and the model that embedded them. The
+    metadata is written last, so its presence marks a usable entry. Recently
+    searched papers stay in memory.
+    """
+
+    def __init__(self, root: Path, memory_entries: int = 64):
+        self.root = Path(root)
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Tuple[Dict, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _vectors_path(self, key: str) -> Path:
+        return self.root / f"{key}.npy"
+
+    def _read_meta(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def has(self, key: str, model: str) -> bool:
+        """Whether key has vectors from this model"""
+        with self._lock:
+            cached = self._memory.get(key)
+        meta = cached[0] if cached else self._read_meta(key)
+        return bool(meta) and meta.get("model") == model
+
+    def put(self, key: str, chunks: List[Dict], vectors: np.ndarray, model: str) -> Dict:
+        """Store a paper's chunks and their vectors (row i embeds chunks[i])"""
+        if len(chunks) != len(vectors):
+            raise ValueError(f"{len(chunks)} chunks but {len(vectors)} vectors")
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        meta = {
+            "key": key,
+            "model": model,
+            "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "chunks": chunks,
+            "embedded_at": datetime.now().isoformat(timespec="seconds")
+        }
+        _atomic_write(self._vectors_path(key), lambda f: np.save(f, vectors, allow_pickle=False))
+        _atomic_write(self._meta_path(key), lambda f: f.write(json.dumps(meta, separators=(",", ":")).encode("utf-8")))
+        with self._lock:
+            self._remember(key, meta, vectors)
+        return meta
+
+    def load(self, key: str) -> Optional[Tuple[Dict, np.ndarray]]:
+        """(metadata, vectors) for a paper, or None"""
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                return cached
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        try:
+            vectors = np.load(self._vectors_path(key), allow_pickle=False)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Dropping unreadable vectors for {key[:12]}: {str(e)}")
+            self.remove(key)
+            return None
+        with self._lock:
+            self._remember(key, meta, vectors)
+        return meta, vectors
+
+    def search(self, key: str, query: np.ndarray, k: int = 4) -> List[Dict]:
+        """Top-k chunks of one paper by cosine similarity, best first"""
+        loaded = self.load(key)
+        if loaded is None:
+            return []
+        meta, vectors = loaded
+        return top_chunks(meta["chunks"], vectors, query, k)
+
+    def _remember(self, key: str, meta: Dict, vectors: np.ndarray):
+        self._memory[key] = (meta, vectors)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def remove(self, key: str) -> int:
+        """Drop a paper's vectors; returns the bytes freed"""
+        with self._lock:
+            self._memory.pop(key, None)
+        freed = 0
+        for path in (self._meta_path(key), self._vectors_path(key)):
+            try:
+                freed += path.stat().st_size
+                path.unlink()
+            except OSError:
+                pass
+        return freed
+
+    def usage(self) -> Dict[str, int]:
+        """Bytes on disk per key"""
+        sizes = {}
+        for meta_path in self.root.glob("*.json"):
+            try:
+                sizes[meta_path.stem] = meta_path.stat().st_size + self._vectors_path(meta_path.stem).stat().st_size
+            except OSError:
+                continue
+        return sizes
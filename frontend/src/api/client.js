@@ -21,12 +21,30 @@ apiClient.interceptors.response.use(
 
 export const paperAPI = {
   // Search papers from arXiv
-  searchPapers: (query, maxResults = 20) =>
+  // filters: { categories, year_from, year_to, authors } - served from the facet cache
+  searchPapers: (query, maxResults = 20, filters = {}) =>
     apiClient.post('/search', { 
       query: query,
-      max_results: maxResults
+      max_results: maxResults,
+      ...filters
     }),
 
+  // Autocomplete search queries
+  suggestQueries: (prefix, limit = 10) =>
+    apiClient.get('/search/suggest', { params: { q: prefix, limit } }),
+
+  // Search arXiv, the local index, MySQL and uploads at once
+  federatedSearch: (query, maxResults = 20, sources = null) =>
+    apiClient.post('/search/federated', {
+      query: query,
+      max_results: maxResults,
+      sources: sources
+    }),
+
+  // Batch metadata lookup by arXiv id
+  batchLookupPapers: (ids) =>
+    apiClient.post('/papers/batch', { ids }),
+
   // Upload PDF
   uploadPDF: (file) => {
     const formData = new FormData();
@@ -38,20 +56,56 @@ export const paperAPI = {
     });
   },
 
+  // Upload many PDFs or zip archives; onEvent receives each NDJSON status line
+  uploadBatch: async (files, onEvent) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    const response = await fetch(`${API_BASE_URL}/api/upload/batch`, { method: 'POST', body: formData });
+    if (!response.ok) throw new Error(`Batch upload failed: ${response.status}`);
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let summary = null;
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      lines.filter(Boolean).forEach((line) => {
+        const event = JSON.parse(line);
+        if (event.event === 'summary') summary = event;
+        if (onEvent) onEvent(event);
+      });
+    }
+    return summary;
+  },
+
+  // URL of an uploaded PDF for the browser's viewer (supports range requests)
+  uploadFileUrl: (filename, download = false) =>
+    `${API_BASE_URL}/api/uploads/${encodeURIComponent(filename)}/file${download ? '?download=true' : ''}`,
+
+  // Server-Sent Events URL for an upload's processing progress
+  uploadEventsUrl: (docId) =>
+    `${API_BASE_URL}/api/uploads/${encodeURIComponent(docId)}/events`,
+
   // Summarize paper
-  summarizePaper: (paperId, text, title) =>
+  // docId: uploaded document id - the server reads its own copy, so text is not sent
+  summarizePaper: (paperId, text, title, docId = null) =>
     apiClient.post('/summarize', {
       paper_id: paperId,
-      text: text,
+      text: docId ? null : text,
       title: title,
+      doc_id: docId,
     }),
 
   // Ask question about paper (RAG)
-  askQuestion: (paperId, question, text) =>
+  askQuestion: (paperId, question, text, docId = null) =>
     apiClient.post('/ask', {
       paper_id: paperId,
       question: question,
-      text: text,
+      text: docId ? null : text,
+      doc_id: docId,
     }),
 
   // Save paper to library
@@ -69,9 +123,13 @@ export const paperAPI = {
   getSavedPapers: () =>
     apiClient.get('/saved'),
 
-  // Get uploaded files list
-  listUploads: () =>
-    apiClient.get('/uploads'),
+  // Remove a paper from the library
+  deletePaper: (paperId) =>
+    apiClient.delete(`/saved/${encodeURIComponent(paperId)}`),
+
+  // Get uploaded files list (params: sort, order, limit, cursor, q, status, min_size, max_size)
+  listUploads: (params = {}) =>
+    apiClient.get('/uploads', { params }),
 
   // Get upload file info
   getUploadInfo: (filename) =>
@@ -82,11 +140,12 @@ export const paperAPI = {
     apiClient.delete(`/uploads/${encodeURIComponent(filename)}`),
 
   // Get similar papers
-  getRecommendations: (paperId, text, title) =>
+  getRecommendations: (paperId, text, title, docId = null) =>
     apiClient.post('/recommend', {
       paper_id: paperId,
-      text: text,
+      text: docId ? null : text,
       title: title,
+      doc_id: docId,
     }),
 
   // Generate literature review
@@ -133,11 +192,18 @@ export const paperAPI = {
 
 // Named exports for convenience
 export const searchPapers = paperAPI.searchPapers;
+export const suggestQueries = paperAPI.suggestQueries;
+export const federatedSearch = paperAPI.federatedSearch;
+export const batchLookupPapers = paperAPI.batchLookupPapers;
 export const uploadPDF = paperAPI.uploadPDF;
+export const uploadBatch = paperAPI.uploadBatch;
+export const uploadEventsUrl = paperAPI.uploadEventsUrl;
+export const uploadFileUrl = paperAPI.uploadFileUrl;
 export const summarizePaper = paperAPI.summarizePaper;
 export const askQuestion = paperAPI.askQuestion;
 export const savePaper = paperAPI.savePaper;
 export const getSavedPapers = paperAPI.getSavedPapers;
+export const deletePaper = paperAPI.deletePaper;
 export const listUploads = paperAPI.listUploads;
 export const getUploadInfo = paperAPI.getUploadInfo;
 export const deleteUpload = paperAPI.deleteUpload;
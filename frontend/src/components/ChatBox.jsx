@@ -57,7 +57,10 @@ export const ChatBox = ({ paperId, onAsk, loading = false }) => {
                 <div className="mt-2 text-xs opacity-75">
                   <p className="font-semibold">Sources:</p>
                   {msg.sources.slice(0, 2).map((src, i) => (
-                    <p key={i}>{src.text.substring(0, 50)}...</p>
+                    <p key={i}>
+                      {src.page ? `p. ${src.page}${src.section ? ` (${src.section})` : ''}: ` : ''}
+                      {src.text.substring(0, 50)}...
+                    </p>
                   ))}
                   <p className="mt-1">Confidence: {(msg.confidence * 100).toFixed(0)}%</p>
                 </div>
@@ -46,11 +46,11 @@ export default function HomePage() {
 
   const handleUploadSuccess = (uploadData) => {
     setSelectedPaper({
-      paper_id: uploadData.paper_id,
+      paper_id: uploadData.paper_id || uploadData.doc_id,
       title: 'Uploaded PDF',
       authors: [],
       abstract: 'Locally uploaded paper',
-      text: uploadData.text,
+      docId: uploadData.doc_id,
       page_count: uploadData.page_count,
       is_uploaded: true,
     });
@@ -36,7 +36,8 @@ export const PaperDetailsPage = () => {
       const response = await summarizePaper(
         paper.id || paper.paper_id,
         paper.abstract || paper.text || paper.summary || 'Research paper',
-        paper.title
+        paper.title,
+        paper.docId
       );
       setSummary(response.data);
     } catch (error) {
@@ -51,7 +52,8 @@ export const PaperDetailsPage = () => {
     return askQuestion(
       paperId,
       question,
-      paper.abstract || paper.text || paper.summary || 'Research paper'
+      paper.abstract || paper.text || paper.summary || 'Research paper',
+      paper.docId
     );
   };
 
@@ -61,7 +63,8 @@ export const PaperDetailsPage = () => {
       const response = await getRecommendations(
         paper.id || paper.paper_id,
         paper.abstract || paper.text || paper.summary || 'Research paper',
-        paper.title
+        paper.title,
+        paper.docId
       );
       setRecommendations(response.data.recommendations || response.data.similar_papers || []);
     } catch (error) {
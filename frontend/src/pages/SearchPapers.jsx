@@ -11,31 +11,64 @@ export const SearchPapersPage = () => {
   const [results, setResults] = useState([]);
   const [loading, setLoading] = useState(false);
   const [searched, setSearched] = useState(false);
+  const [facets, setFacets] = useState(null);
+  const [filters, setFilters] = useState({});
   const { showToast } = useToast();
   const navigate = useNavigate();
 
-  const handleSearch = async (e) => {
-    e.preventDefault();
-    if (!query.trim()) {
-      showToast('Please enter a search query', 'warning');
-      return;
-    }
-
+  const runSearch = async (activeFilters) => {
     setLoading(true);
     setSearched(true);
     try {
-      const response = await searchPapers(query);
+      const response = await searchPapers(query, 20, activeFilters);
       setResults(response.data.papers || []);
-      showToast(`Found ${response.data.papers?.length || 0} papers`, 'success');
+      setFacets(response.data.facets || null);
+      return response.data;
     } catch (error) {
       console.error('Search error:', error);
       showToast('Failed to search papers', 'error');
       setResults([]);
+      setFacets(null);
+      return null;
     } finally {
       setLoading(false);
     }
   };
 
+  const handleSearch = async (e) => {
+    e.preventDefault();
+    if (!query.trim()) {
+      showToast('Please enter a search query', 'warning');
+      return;
+    }
+
+    setFilters({});
+    const data = await runSearch({});
+    if (data) {
+      showToast(`Found ${data.papers?.length || 0} papers`, 'success');
+    }
+  };
+
+  // Drill-down re-filters the cached result set on the server
+  const toggleFacet = (field, value) => {
+    const current = filters[field] || [];
+    const next = current.includes(value)
+      ? current.filter(v => v !== value)
+      : [...current, value];
+    const nextFilters = { ...filters, [field]: next.length ? next : undefined };
+    setFilters(nextFilters);
+    runSearch(nextFilters);
+  };
+
+  const toggleYear = (year) => {
+    const selected = filters.year_from === Number(year) && filters.year_to === Number(year);
+    const nextFilters = selected
+      ? { ...filters, year_from: undefined, year_to: undefined }
+      : { ...filters, year_from: Number(year), year_to: Number(year) };
+    setFilters(nextFilters);
+    runSearch(nextFilters);
+  };
+
   const handleView = (paper) => {
     navigate('/paper-details', { state: { paper } });
   };
@@ -98,6 +131,47 @@ export const SearchPapersPage = () => {
           </div>
         )}
 
+        {facets && (facets.category?.length > 0 || facets.year?.length > 0) && (
+          <div className="mb-6 space-y-3">
+            {facets.category?.length > 0 && (
+              <div className="flex flex-wrap gap-2 items-center">
+                <span className="text-sm font-semibold text-gray-600">Category:</span>
+                {facets.category.slice(0, 10).map(({ value, count }) => (
+                  <button
+                    key={value}
+                    onClick={() => toggleFacet('categories', value)}
+                    className={`px-3 py-1 rounded-full text-sm border ${
+                      (filters.categories || []).includes(value)
+                        ? 'bg-primary-600 text-white border-primary-600'
+                        : 'bg-white text-gray-700 border-gray-300 hover:border-primary-400'
+                    }`}
+                  >
+                    {value} ({count})
+                  </button>
+                ))}
+              </div>
+            )}
+            {facets.year?.length > 0 && (
+              <div className="flex flex-wrap gap-2 items-center">
+                <span className="text-sm font-semibold text-gray-600">Year:</span>
+                {facets.year.map(({ value, count }) => (
+                  <button
+                    key={value}
+                    onClick={() => toggleYear(value)}
+                    className={`px-3 py-1 rounded-full text-sm border ${
+                      filters.year_from === Number(value) && filters.year_to === Number(value)
+                        ? 'bg-primary-600 text-white border-primary-600'
+                        : 'bg-white text-gray-700 border-gray-300 hover:border-primary-400'
+                    }`}
+                  >
+                    {value} ({count})
+                  </button>
+                ))}
+              </div>
+            )}
+          </div>
+        )}
+
         {results.length > 0 && (
           <div>
             <h2 className="text-2xl font-bold mb-6">
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Upload, FileUp, AlertCircle, Trash2, FileText, HardDrive, Calendar, Download, Search, Filter, BarChart3, Filter as FilterIcon, X } from 'lucide-react';
-import { uploadPDF, listUploads, deleteUpload } from '../api/client';
+import { uploadPDF, uploadEventsUrl, uploadFileUrl, listUploads, deleteUpload } from '../api/client';
 import { useToast } from '../context/ToastContext';
 import { Spinner } from '../components/Loading';
 import { useNavigate } from 'react-router-dom';
@@ -10,6 +10,7 @@ export const UploadPDFPage = () => {
   const [isDragover, setIsDragover] = useState(false);
   const [loading, setLoading] = useState(false);
   const [uploadedData, setUploadedData] = useState(null);
+  const [processing, setProcessing] = useState(null);
   const [uploadedFiles, setUploadedFiles] = useState([]);
   const [loadingFiles, setLoadingFiles] = useState(true);
   const [totalSize, setTotalSize] = useState(0);
@@ -28,20 +29,32 @@ export const UploadPDFPage = () => {
     loadUploadedFiles();
   }, []);
 
-  // Reload file list after successful upload
+  // Follow background processing, then reload the file list
   useEffect(() => {
-    if (uploadedData) {
-      setTimeout(() => {
-        loadUploadedFiles();
-        setUploadedData(null);
-      }, 1500);
-    }
+    if (!uploadedData?.doc_id) return;
+    const events = new EventSource(uploadEventsUrl(uploadedData.doc_id));
+    const onMessage = (e) => {
+      const data = JSON.parse(e.data);
+      setProcessing(data);
+      if (data.status === 'processed' || data.status === 'error') {
+        events.close();
+        if (data.status === 'error') showToast(`Processing failed: ${data.error}`, 'error');
+        setTimeout(() => {
+          loadUploadedFiles();
+          setUploadedData(null);
+          setProcessing(null);
+        }, 1500);
+      }
+    };
+    ['snapshot', 'stage', 'progress', 'status'].forEach((name) => events.addEventListener(name, onMessage));
+    events.onerror = () => events.close();
+    return () => events.close();
   }, [uploadedData]);
 
   const loadUploadedFiles = async () => {
     try {
       setLoadingFiles(true);
-      const response = await listUploads();
+      const response = await listUploads({ limit: 500 });
       setUploadedFiles(response.data.files || []);
       setTotalSize(response.data.total_size_mb || 0);
     } catch (error) {
@@ -112,7 +125,7 @@ export const UploadPDFPage = () => {
     }
   };
 
-  const handleAnalyzeFile = (filename) => {
+  const handleAnalyzeFile = (filename, docId = null) => {
     // Navigate to paper details with the uploaded file
     const fileTitle = filename.replace('.pdf', '');
     navigate('/paper-details', {
@@ -121,7 +134,8 @@ export const UploadPDFPage = () => {
           id: filename,
           title: fileTitle,
           abstract: 'Uploaded PDF - ready for analysis',
-          uploadedFile: filename
+          uploadedFile: filename,
+          docId: docId
         },
         tab: 'summary'
       }
@@ -332,7 +346,11 @@ export const UploadPDFPage = () => {
             <p className="text-green-800 text-sm mb-1">
               File: <span className="font-mono">{uploadedData.filename}</span>
             </p>
-            <p className="text-green-700 text-sm">Loading into workspace...</p>
+            <p className="text-green-700 text-sm">
+              {processing?.page_count
+                ? `Processing (${processing.stage || processing.status}): page ${processing.pages_done} of ${processing.page_count}`
+                : 'Loading into workspace...'}
+            </p>
           </div>
         )}
       </div>
@@ -528,11 +546,20 @@ export const UploadPDFPage = () => {
                 {/* Action Buttons */}
                 <div className="flex gap-2 pt-3 border-t border-gray-100">
                   <button
-                    onClick={() => handleAnalyzeFile(file.filename)}
+                    onClick={() => handleAnalyzeFile(file.filename, file.doc_id)}
                     className="flex-1 px-3 py-2 bg-primary-50 hover:bg-primary-100 text-primary-700 font-medium rounded-lg transition-colors text-xs"
                   >
                     Analyze
                   </button>
+                  <a
+                    href={uploadFileUrl(file.filename)}
+                    target="_blank"
+                    rel="noopener noreferrer"
+                    title="View PDF"
+                    className="px-3 py-2 bg-gray-50 hover:bg-gray-100 text-gray-600 font-medium rounded-lg transition-colors text-xs flex items-center"
+                  >
+                    <Download className="w-4 h-4" />
+                  </a>
                   <button
                     onClick={() => handleDelete(file.filename)}
                     disabled={deleting === file.filename}